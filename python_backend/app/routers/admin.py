@@ -0,0 +1,114 @@
+import asyncio
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from ..services.sebi_advisor_service import SEBIAdvisorService
+from ..services.service_container import ServiceContainer, get_registry, get_services
+from ..utils.memory_tracking import document_memory
+from ..utils.prefork import read_process_memory, read_reports
+from ..utils.request_profiling import collapsed_stacks
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """
+    The X-Admin-Token header must match ADMIN_API_TOKEN; without a configured
+    token the admin endpoints do not exist
+    """
+    expected = os.getenv("ADMIN_API_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+@router.get("/registry")
+async def get_registry_snapshot(registry: SEBIAdvisorService = Depends(get_registry)):
+    """
+    Report the active advisor registry snapshot and the reload watcher state
+    """
+    return registry.get_reload_status()
+
+@router.post("/registry/reload")
+async def reload_registry(force: bool = False, registry: SEBIAdvisorService = Depends(get_registry)):
+    """
+    Check the registry files now and swap in a new snapshot if they changed (always with force=true)
+    """
+    swapped = await asyncio.to_thread(registry.reload, force)
+    return {"success": True, "swapped": swapped, **registry.get_reload_status()}
+
+@router.delete("/verification-cache")
+async def purge_verification_cache(
+    name: Optional[str] = None,
+    registrationNumber: Optional[str] = None,
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Purge cached advisor verification results, e.g. after the SEBI registry has been updated.
+    Without parameters the whole cache is cleared.
+    """
+    removed = services.verification_cache.purge(name=name, registration_number=registrationNumber)
+    return {"success": True, "purged": removed}
+
+@router.get("/workers")
+async def get_worker_memory():
+    """
+    Per-process memory report: the master and every worker under the prefork server
+    (run.py --workers), otherwise just this process
+    """
+    reports = read_reports()
+    if reports is None:
+        return {"mode": "single", "pid": os.getpid(), "memory_mb": read_process_memory()}
+    return {"mode": "prefork", **reports}
+
+@router.get("/services")
+async def get_service_status(services: ServiceContainer = Depends(get_services)):
+    """
+    Lifecycle state of the shared services (started, warm-up time, registry snapshot)
+    """
+    return services.get_stats()
+
+@router.get("/admission")
+async def get_admission_metrics(request: Request):
+    """
+    Concurrency, queue and rejection counts of every admission-controlled endpoint class
+    """
+    return request.app.state.admission.get_metrics()
+
+@router.get("/document-memory")
+async def get_document_memory():
+    """
+    Peak memory per document processing stage (DOCUMENT_MEMORY_SAMPLE_RATE of documents
+    are tracked), overall and per MB of input, plus the most recent tracked documents
+    """
+    return document_memory.get_metrics()
+
+@router.get("/profiles")
+async def list_request_profiles(request: Request):
+    """
+    Stored request profiles, newest first, with the profiler's settings and counters
+    """
+    profiler = request.app.state.profiler
+    return {"profiler": profiler.get_metrics(), "profiles": await asyncio.to_thread(profiler.store.list)}
+
+@router.get("/profiles/{profile_id}")
+async def download_request_profile(profile_id: str, request: Request, format: str = "json"):
+    """
+    One stored profile: stage timings and samples as JSON, or with format=collapsed the
+    samples as collapsed stacks for flamegraph.pl / speedscope
+    """
+    profile = await asyncio.to_thread(request.app.state.profiler.store.get, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_stacks(profile), headers={
+            "Content-Disposition": f'attachment; filename="{profile_id}.folded"'
+        })
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be json or collapsed")
+    return profile
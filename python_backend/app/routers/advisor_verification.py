@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Form, HTTPException
+from fastapi import APIRouter, Depends, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
 import json
+from ..services.batch_verification import BatchInputError, BatchVerificationService, parse_batch
 from ..services.groq_service import GroqService
+from ..services.service_container import ServiceContainer, get_batch_verification, get_groq_service, get_services
+from ..utils import fast_json
 
 router = APIRouter()
-groq_service = GroqService()
 
 @router.post("/verify")
 async def verify_advisor(
@@ -12,7 +15,8 @@ async def verify_advisor(
     licenseId: Optional[str] = Form(None),
     registrationNumber: Optional[str] = Form(None),
     companyName: Optional[str] = Form(None),
-    contactInfo: Optional[str] = Form(None)
+    contactInfo: Optional[str] = Form(None),
+    groq_service: GroqService = Depends(get_groq_service)
 ):
     """
     Verify advisor credentials against SEBI website
@@ -30,13 +34,14 @@ async def verify_advisor(
 
 @router.post("/verify-extracted")
 async def verify_extracted_advisor(
-    advisorInfo: str = Form(...)
+    advisorInfo: str = Form(...),
+    groq_service: GroqService = Depends(get_groq_service)
 ):
     """
     Verify advisor from extracted information
     """
     try:
-        advisor_data = json.loads(advisorInfo)
+        advisor_data = fast_json.loads(advisorInfo)
         
         # Prepare data for verification
         verification_data = {
@@ -59,6 +64,33 @@ async def verify_extracted_advisor(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Verification error: {str(e)}")
 
+@router.post("/verify-batch")
+async def verify_advisor_batch(
+    request: Request,
+    batch_verification_service: BatchVerificationService = Depends(get_batch_verification)
+):
+    """
+    Verify many advisors in one call. The body is a JSON array (or {"advisors": [...]})
+    or NDJSON with Content-Type application/x-ndjson; each record uses the /verify field
+    names or the extracted-advisor shape. Results stream back as NDJSON in input order,
+    followed by a summary line.
+    """
+    try:
+        records = parse_batch(await request.body(), request.headers.get("content-type"))
+    except BatchInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(records) > batch_verification_service.max_records:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(records)} records (max {batch_verification_service.max_records})"
+        )
+    
+    async def stream_lines():
+        async for line in batch_verification_service.verify_stream(records):
+            yield fast_json.dumps(line, default=str) + b"\n"
+    
+    return StreamingResponse(stream_lines(), media_type="application/x-ndjson")
+
 @router.get("/status")
 async def get_verification_status():
     """
@@ -75,3 +107,14 @@ async def get_verification_status():
             "Investment offer analysis"
         ]
     }
+
+@router.get("/metrics")
+async def get_verification_metrics(services: ServiceContainer = Depends(get_services)):
+    """
+    Get runtime metrics of the live SEBI verification layer
+    """
+    return {
+        **services.sebi_service.get_metrics(),
+        "verification_cache": services.verification_cache.get_metrics(),
+        "batch_verification": services.batch_verification.get_metrics()
+    }
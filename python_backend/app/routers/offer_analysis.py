@@ -1,64 +1,45 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import Optional, List
-import tempfile
-import os
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, Dict, Optional, List
+import asyncio
 import json
 import logging
-from pathlib import Path
 from ..models.schemas import TextData, AnalysisResponse
-from ..services.groq_service import GroqService
-from ..utils.text_processing import process_file, combine_text_data
+from ..services.batch_analysis import BatchAnalysisService
+from ..services.batch_verification import BatchInputError, parse_batch
+from ..services.analysis_jobs import AnalysisJobQueue, JobQueueFullError, SUCCEEDED
+from ..services.service_container import (
+    ServiceContainer, get_analysis_jobs, get_batch_analysis, get_services
+)
+from ..utils import fast_json
+from ..utils.processor_config import ProcessorConfig
+from ..utils.text_processing import combine_text_data
+from ..utils.upload_ingest import SpooledUpload, UploadRejected, remove_spooled, spool_upload
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-groq_service = GroqService()
 
-@router.post("/analyze", response_model=AnalysisResponse)
-async def analyze_offer(
-    textData: str = Form(...),
-    files: Optional[List[UploadFile]] = File(default=None),
-    contentType: Optional[str] = Form(default=None)
-):
-    logger.info("Received analyze request")
+# Longest a status/result request may block waiting for a job to finish
+MAX_LONG_POLL_S = 30.0
+
+async def run_analysis(
+    services: ServiceContainer, text_data_dict: Dict[str, Any], files: List[Dict[str, str]]
+) -> Dict[str, Any]:
     """
-    Analyze investment offer from text and uploaded files
+    Process the uploaded files ({"filename", "path"}) and analyze them together with the form text
     """
-    file_texts = []
-    
-    # Parse the text data from form
-    text_data_dict = json.loads(textData)
-    
-    # Parse the textData JSON
-    try:
-        text_data_dict = json.loads(textData)
-        logger.info("Successfully parsed text data")
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse text data: {str(e)}")
-        raise HTTPException(status_code=400, detail="Invalid text data format")
-
-    # Process uploaded files
     file_results = []
-    if files:
-        for file in files:
-            try:
-                suffix = Path(file.filename or '').suffix or '.tmp'
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                    content = await file.read()
-                    temp_file.write(content)
-                    temp_file.flush()
-                    
-                    # Process the file
-                    result = process_file(temp_file.name)
-                    file_results.append(result)
-                    logger.info(f"Processed file: {file.filename}")
-                    
-                    # Clean up
-                    os.unlink(temp_file.name)
-            except Exception as e:
-                logger.error(f"Error processing file {file.filename}: {str(e)}")
-                continue
+    for file in files:
+        try:
+            # Document processing is CPU-bound; keep it off the event loop
+            result = await asyncio.to_thread(services.document_processor.process_document, file["path"])
+            file_results.append(result)
+            logger.info(f"Processed file: {file['filename']}")
+        except Exception as e:
+            logger.error(f"Error processing file {file['filename']}: {str(e)}")
+            continue
     
     # Combine all data into structured format
     combined_data = combine_text_data(text_data_dict, file_results)
@@ -72,6 +53,167 @@ async def analyze_offer(
     }
     
     # Analyze with enhanced context
-    analysis_result = await groq_service.analyze_investment_offer(json.dumps(analysis_input, indent=2))
+    analysis_result = await services.groq_service.analyze_investment_offer(fast_json.dumps_str(analysis_input))
+    # Validate here so a job fails instead of storing a result the result endpoint cannot serve
+    return AnalysisResponse(**analysis_result).model_dump()
+
+async def run_analysis_job(services: ServiceContainer, payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Handler of the services' analysis job queue
+    return await run_analysis(services, payload["textData"], payload.get("files", []))
+
+async def spool_uploads(files: Optional[List[UploadFile]], config: ProcessorConfig) -> List[SpooledUpload]:
+    """
+    Stream the uploads to disk, checked against the document processor's per-type limits.
+    Unsupported files are skipped; an oversized file fails the request with 413 before
+    the rest of it is read.
+    """
+    spooled = []
+    for file in files or []:
+        try:
+            spooled.append(await spool_upload(file, config))
+        except UploadRejected as e:
+            if e.status_code != 413:
+                logger.warning(f"Skipping file {file.filename}: {str(e)}")
+                continue
+            remove_spooled(spooled)
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error processing file {file.filename}: {str(e)}")
+    return spooled
+
+def parse_text_data(textData: str) -> Dict[str, Any]:
+    try:
+        text_data_dict = fast_json.loads(textData)
+        logger.info("Successfully parsed text data")
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse text data: {str(e)}")
+        raise HTTPException(status_code=400, detail="Invalid text data format")
+    return text_data_dict
+
+@router.post("/analyze", response_model=AnalysisResponse)
+async def analyze_offer(
+    textData: str = Form(...),
+    files: List[UploadFile] = File(default=[]),
+    contentType: Optional[str] = Form(default=None),
+    services: ServiceContainer = Depends(get_services)
+):
+    logger.info("Received analyze request")
+    """
+    Analyze investment offer from text and uploaded files
+    """
+    # Parse the textData JSON
+    text_data_dict = parse_text_data(textData)
+
+    # Process uploaded files
+    spooled = await spool_uploads(files, services.document_processor.config)
+    try:
+        analysis_result = await run_analysis(
+            services, text_data_dict, [{"filename": upload.filename, "path": upload.path} for upload in spooled]
+        )
+    finally:
+        # Clean up
+        remove_spooled(spooled)
     
     return AnalysisResponse(**analysis_result)
+
+@router.post("/analyze/batch")
+async def analyze_offer_batch(
+    request: Request,
+    batch_analysis_service: BatchAnalysisService = Depends(get_batch_analysis)
+):
+    """
+    Analyze many offers in one call, e.g. a social or scan import. The body is NDJSON
+    (Content-Type application/x-ndjson) or a JSON array / {"offers": [...]}; each record
+    carries the /analyze textData fields plus the post text in "text", an optional "id"
+    and an optional "submitter"; only offers of the same submitter share an LLM request.
+    Results stream back as NDJSON in input order, followed by a summary line.
+    """
+    try:
+        records = parse_batch(await request.body(), request.headers.get("content-type"), key="offers")
+    except BatchInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(records) > batch_analysis_service.max_offers:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(records)} offers (max {batch_analysis_service.max_offers})"
+        )
+    
+    async def stream_lines():
+        async for line in batch_analysis_service.analyze_stream(records):
+            yield fast_json.dumps(line, default=str) + b"\n"
+    
+    return StreamingResponse(stream_lines(), media_type="application/x-ndjson")
+
+@router.post("/analyze/jobs", status_code=202)
+async def submit_analysis_job(
+    request: Request,
+    textData: str = Form(...),
+    files: List[UploadFile] = File(default=[]),
+    contentType: Optional[str] = Form(default=None),
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Queue an offer analysis and return its job id immediately; poll /jobs/{jobId} for the outcome
+    """
+    text_data_dict = parse_text_data(textData)
+    analysis_jobs = services.analysis_jobs
+    if analysis_jobs.pending_count() >= analysis_jobs.max_pending:
+        # Refuse before copying the uploads
+        raise HTTPException(status_code=429, detail="Analysis job queue is full", headers={"Retry-After": "5"})
+    spooled = await spool_uploads(files, services.document_processor.config)
+    try:
+        job = await analysis_jobs.submit(
+            {"textData": text_data_dict, "contentType": contentType},
+            [(upload.filename, upload.path) for upload in spooled],
+        )
+    except JobQueueFullError as e:
+        remove_spooled(spooled)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    logger.info(f"Queued analysis job {job.id}")
+    return {
+        **job.to_status(),
+        "statusUrl": str(request.url_for("get_analysis_job", job_id=job.id)),
+        "resultUrl": str(request.url_for("get_analysis_job_result", job_id=job.id)),
+    }
+
+def _wait_seconds(wait: float) -> float:
+    return max(0.0, min(wait, MAX_LONG_POLL_S))
+
+@router.get("/jobs/{job_id}")
+async def get_analysis_job(
+    job_id: str, wait: float = 0, analysis_jobs: AnalysisJobQueue = Depends(get_analysis_jobs)
+):
+    """
+    Job status; with wait > 0 the request is held until the job finishes or wait seconds pass
+    """
+    job = await analysis_jobs.wait(job_id, _wait_seconds(wait))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.to_status()
+
+@router.get("/jobs/{job_id}/result", response_model=AnalysisResponse)
+async def get_analysis_job_result(
+    job_id: str, wait: float = 0, analysis_jobs: AnalysisJobQueue = Depends(get_analysis_jobs)
+):
+    """
+    Analysis result of a finished job (202 with the status while it is still pending)
+    """
+    job = await analysis_jobs.wait(job_id, _wait_seconds(wait))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if not job.finished:
+        return JSONResponse(status_code=202, content=job.to_status())
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=job.to_status())
+    return AnalysisResponse(**job.result)
+
+@router.delete("/jobs/{job_id}")
+async def cancel_analysis_job(job_id: str, analysis_jobs: AnalysisJobQueue = Depends(get_analysis_jobs)):
+    job = await analysis_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.to_status()
+
+@router.get("/jobs-metrics")
+async def get_analysis_job_metrics(services: ServiceContainer = Depends(get_services)):
+    return {**services.analysis_jobs.get_metrics(), "batch_analysis": services.batch_analysis.get_metrics()}
@@ -0,0 +1,331 @@
+"""
+Background job queue for offer analysis.
+Submitting spools the uploads to disk and returns a job id at once; a fixed
+number of worker tasks run the analysis, and clients poll (or long-poll) for
+the status and result. Finished jobs are kept for a TTL. With a JobStore
+configured, jobs and their spooled uploads survive a restart: queued and
+interrupted jobs are queued again when the queue starts.
+"""
+
+import asyncio
+import json
+import logging
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class JobQueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of pending jobs"""
+
+
+@dataclass
+class AnalysisJob:
+    id: str
+    payload: Dict[str, Any]
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_status(self) -> Dict[str, Any]:
+        """
+        Public view of the job, without its payload or result
+        """
+        iso = lambda ts: time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)) if ts else None
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "createdAt": iso(self.created_at),
+            "startedAt": iso(self.started_at),
+            "finishedAt": iso(self.finished_at),
+            "expiresAt": iso(self.expires_at),
+            "error": self.error,
+        }
+
+
+class JobStore:
+    """
+    SQLite persistence for jobs (one row per job, written on every state change)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "expires_at REAL, job TEXT NOT NULL)"
+            )
+
+    def save(self, job: AnalysisJob):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_jobs (id, status, expires_at, job) VALUES (?, ?, ?, ?)",
+                (job.id, job.status, job.expires_at, json.dumps(asdict(job), ensure_ascii=False)),
+            )
+
+    def delete(self, job_ids: List[str]):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM analysis_jobs WHERE id = ?", [(job_id,) for job_id in job_ids])
+
+    def load_all(self) -> List[AnalysisJob]:
+        with self._lock:
+            rows = self._conn.execute("SELECT job FROM analysis_jobs").fetchall()
+        jobs = []
+        for (raw,) in rows:
+            try:
+                jobs.append(AnalysisJob(**json.loads(raw)))
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping unreadable analysis job: {e}")
+        return jobs
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AnalysisJobQueue:
+    """
+    Bounded worker pool over an in-memory job table, optionally persisted to a JobStore
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        workers: int = 4,
+        max_pending: int = 1000,
+        ttl_s: float = 3600.0,
+        spool_dir: Optional[Path] = None,
+        store: Optional[JobStore] = None,
+        max_attempts: int = 3,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_s = ttl_s
+        self.spool_dir = Path(spool_dir) if spool_dir else Path(tempfile.gettempdir()) / "sebi-analysis-jobs"
+        self.store = store
+        # Jobs interrupted this many times (e.g. a crash mid-analysis) are failed instead of retried
+        self.max_attempts = max_attempts
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._done: Dict[str, asyncio.Event] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stats = {"submitted": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "expired": 0,
+                       "rejected": 0, "recovered": 0}
+
+    async def start(self):
+        """
+        Start the workers and the expiry sweep, re-queueing persisted jobs that had not finished
+        """
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        if self.store is not None:
+            for job in await asyncio.to_thread(self.store.load_all):
+                self._jobs[job.id] = job
+                if job.finished:
+                    self._done_event(job.id).set()
+                    continue
+                job.status = QUEUED
+                job.started_at = None
+                self._queue.put_nowait(job.id)
+                self._stats["recovered"] += 1
+            if self._stats["recovered"]:
+                logger.info(f"Recovered {self._stats['recovered']} unfinished analysis jobs")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._expiry_loop()))
+
+    async def stop(self):
+        """
+        Stop the workers. Running jobs are interrupted and, with a store, resumed on the next start.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.store is not None:
+            self.store.close()
+
+    def _done_event(self, job_id: str) -> asyncio.Event:
+        event = self._done.get(job_id)
+        if event is None:
+            event = self._done[job_id] = asyncio.Event()
+        return event
+
+    async def _persist(self, job: AnalysisJob):
+        if self.store is not None:
+            await asyncio.to_thread(self.store.save, job)
+
+    def pending_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    async def submit(self, payload: Dict[str, Any], files: List[Tuple[str, str]] = ()) -> AnalysisJob:
+        """
+        Queue a job. files are (filename, path) pairs of uploads already on disk; they are
+        moved into the job's spool directory and the handler receives them as
+        payload["files"] = [{"filename", "path"}].
+        """
+        if self._queue is None:
+            raise RuntimeError("Analysis job queue is not started")
+        if self.pending_count() >= self.max_pending:
+            self._stats["rejected"] += 1
+            raise JobQueueFullError(f"{self.max_pending} analysis jobs already pending")
+
+        job = AnalysisJob(id=uuid.uuid4().hex, payload=dict(payload))
+        if files:
+            job.payload["files"] = await asyncio.to_thread(self._spool_files, job.id, files)
+        self._jobs[job.id] = job
+        await self._persist(job)
+        self._queue.put_nowait(job.id)
+        self._stats["submitted"] += 1
+        return job
+
+    def _spool_files(self, job_id: str, files: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+        job_dir = self.spool_dir / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        spooled = []
+        for position, (filename, source) in enumerate(files):
+            path = job_dir / f"{position}{Path(source).suffix or '.tmp'}"
+            shutil.move(source, path)
+            spooled.append({"filename": filename, "path": str(path)})
+        return spooled
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.expires_at is not None and job.expires_at <= time.time():
+            return None
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[AnalysisJob]:
+        """
+        Long-poll: return the job once it has finished or after timeout seconds, whichever is first
+        """
+        job = self.get(job_id)
+        if job is None or job.finished or timeout <= 0:
+            return job
+        try:
+            await asyncio.wait_for(self._done_event(job_id).wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.get(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[AnalysisJob]:
+        """
+        Cancel a queued or running job; finished jobs are returned unchanged
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        task = self._running.get(job_id)
+        if task is not None:
+            # The worker records the cancellation when the task unwinds
+            job.error = "Cancelled by client"
+            task.cancel()
+            await self._done_event(job_id).wait()
+        else:
+            await self._finish(job, CANCELLED, error="Cancelled by client")
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.attempts += 1
+            if job.attempts > self.max_attempts:
+                await self._finish(job, FAILED, error="Job was interrupted too many times")
+                continue
+            await self._persist(job)
+
+            task = asyncio.create_task(self.handler(job.payload))
+            self._running[job_id] = task
+            try:
+                result = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    # The worker itself is stopping: leave the job "running" so a restart resumes it
+                    task.cancel()
+                    raise
+                await self._finish(job, CANCELLED, error=job.error or "Cancelled")
+            except Exception as e:
+                logger.error(f"Analysis job {job_id} failed: {e}")
+                await self._finish(job, FAILED, error=str(e))
+            else:
+                await self._finish(job, SUCCEEDED, result=result)
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _finish(self, job: AnalysisJob, status: str, result: Optional[Dict[str, Any]] = None,
+                      error: Optional[str] = None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.expires_at = job.finished_at + self.ttl_s
+        self._stats[status] += 1
+        await self._persist(job)
+        # Uploads are only needed while the job can still run
+        await asyncio.to_thread(shutil.rmtree, self.spool_dir / job.id, True)
+        self._done_event(job.id).set()
+
+    async def _expiry_loop(self):
+        while True:
+            await asyncio.sleep(min(60.0, max(self.ttl_s / 4, 1.0)))
+            await self.purge_expired()
+
+    async def purge_expired(self) -> int:
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.expires_at is not None and job.expires_at <= now]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._done.pop(job_id, None)
+        if expired and self.store is not None:
+            await asyncio.to_thread(self.store.delete, expired)
+        self._stats["expired"] += len(expired)
+        return len(expired)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "ttl_s": self.ttl_s,
+            "durable": self.store is not None,
+            "jobs": statuses,
+            **self._stats,
+        }
@@ -0,0 +1,266 @@
+"""
+Bulk offer analysis for social and scan imports.
+A batch is deduplicated on the offer content, all post texts go through spaCy
+in one nlp.pipe pass, and the LLM analyses are packed: several short offers
+from the same submitter share one Groq request (an offer's text could steer
+the analysis of anything packed with it, so offers of different or unknown
+submitters never share one), long offers get a request of their own, and a
+bounded number of requests run at a time. Results are yielded in input order as soon
+as each prefix of the batch is complete.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..models.schemas import AnalysisResponse
+from ..utils import fast_json
+from ..utils.text_processing import combine_text_data, document_processor
+
+logger = logging.getLogger(__name__)
+
+TEXT_DATA_FIELDS = ("links", "emails", "companyName", "advisorName", "contactInfo")
+
+
+def normalize_offer_record(record: Any) -> Dict[str, Any]:
+    """
+    Map a batch record onto the /analyze inputs: textData (the form fields, nested as
+    "textData" or at the top level) plus the post text in "text", "content" or "description",
+    and the optional "submitter" (the account that posted the offer)
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Offer record must be a JSON object")
+    text_data = record.get("textData", record)
+    if isinstance(text_data, str):
+        text_data = json.loads(text_data)
+    if not isinstance(text_data, dict):
+        raise ValueError("textData must be a JSON object")
+    text = record.get("text") or record.get("content") or record.get("description") or ""
+    if not isinstance(text, str):
+        raise ValueError("Offer text must be a string")
+    offer = {
+        "textData": {field: text_data.get(field) for field in TEXT_DATA_FIELDS if text_data.get(field)},
+        "text": text.strip(),
+        "contentType": record.get("contentType"),
+        "submitter": str(record.get("submitter") or "").strip(),
+    }
+    if not offer["text"] and not offer["textData"]:
+        raise ValueError("Offer record needs text or at least one textData field")
+    return offer
+
+
+def offer_key(offer: Dict[str, Any]) -> str:
+    """
+    Content identity of an offer; reposts of the same text with the same details share it
+    """
+    canonical = json.dumps(
+        {"textData": offer["textData"], "text": " ".join(offer["text"].split())},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def _error_result(message: str) -> Dict[str, Any]:
+    return {
+        "overallRisk": "high",
+        "riskScore": 100,
+        "riskKeywords": ["analysis_error"],
+        "recommendations": ["Unable to complete analysis. Please try again."],
+        "redFlags": ["Analysis service error"],
+        "advisorStatus": "unknown",
+        "sebiRegistration": None,
+        "fraudProbability": 100,
+        "analysisDetails": message,
+    }
+
+
+class BatchAnalysisService:
+    def __init__(
+        self,
+        analyzer,
+        processor=None,
+        max_offers: Optional[int] = None,
+        pack_max_chars: Optional[int] = None,
+        pack_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        # analyzer is the GroqService: analyze_investment_offers packs several inputs into one request
+        self.analyzer = analyzer
+        self.processor = processor or document_processor
+        self.max_offers = max_offers or int(os.getenv("OFFER_BATCH_MAX_OFFERS", "5000"))
+        # Only inputs up to this size are packed, so a packed request stays well inside the context window
+        self.pack_max_chars = pack_max_chars or int(os.getenv("OFFER_BATCH_PACK_MAX_CHARS", "2500"))
+        self.pack_size = pack_size or int(os.getenv("OFFER_BATCH_PACK_SIZE", "6"))
+        self.max_concurrency = max_concurrency or int(os.getenv("OFFER_BATCH_CONCURRENCY", "4"))
+        self._stats = {
+            "batches": 0,
+            "offers": 0,
+            "duplicates": 0,
+            "invalid": 0,
+            "llm_requests": 0,
+            "packed_offers": 0,
+            "pack_retries": 0,
+            "analysis_errors": 0,
+        }
+
+    def build_analysis_input(self, offer: Dict[str, Any], document: Optional[Dict[str, Any]]) -> str:
+        """
+        The same analysis input /analyze builds, with the post text as the offer's only document
+        """
+        file_results = [document] if document is not None else []
+        analysis_input = {
+            "textData": offer["textData"],
+            "processedData": combine_text_data(offer["textData"], file_results),
+            "documentCount": len(file_results),
+            "documentsProcessed": all(result.get("success", False) for result in file_results),
+        }
+        return fast_json.dumps_str(analysis_input)
+
+    def pack(self, inputs: Dict[str, str], submitters: Dict[str, str]) -> List[List[str]]:
+        """
+        Group offer keys into LLM requests: short inputs of the same submitter up to pack_size
+        per request; long inputs and those without a submitter alone
+        """
+        packs: List[List[str]] = []
+        open_packs: Dict[str, Tuple[List[str], int]] = {}  # submitter -> (keys, chars)
+        for key, text in inputs.items():
+            submitter = submitters.get(key)
+            if not submitter or len(text) > self.pack_max_chars:
+                packs.append([key])
+                continue
+            current, current_chars = open_packs.get(submitter, ([], 0))
+            if current and (len(current) >= self.pack_size or current_chars + len(text) > self.pack_max_chars * 2):
+                packs.append(current)
+                current, current_chars = [], 0
+            current.append(key)
+            open_packs[submitter] = (current, current_chars + len(text))
+        packs.extend(current for current, _ in open_packs.values())
+        return packs
+
+    async def analyze_stream(self, records: List[Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield {"index", "id", "result"} per input record in input order,
+        followed by one {"summary": {...}} line
+        """
+        started = time.perf_counter()
+        counts = dict.fromkeys(("duplicates", "invalid", "llm_requests", "packed_offers"), 0)
+
+        # 1. Normalize and deduplicate on the offer content
+        outcomes: List[Dict[str, Any]] = []  # per input record: {"key"} or {"error"}
+        unique: Dict[str, Dict[str, Any]] = {}  # key -> {"index", "offer"}
+        for index, record in enumerate(records):
+            try:
+                offer = normalize_offer_record(record)
+            except ValueError as e:
+                counts["invalid"] += 1
+                outcomes.append({"error": str(e)})
+                continue
+            key = offer_key(offer)
+            if key in unique:
+                counts["duplicates"] += 1
+            else:
+                unique[key] = {"index": index, "offer": offer}
+            outcomes.append({"key": key})
+
+        # 2. One spaCy pass over every post text
+        text_keys = [key for key, entry in unique.items() if entry["offer"]["text"]]
+        documents = await asyncio.to_thread(
+            self.processor.process_texts, [unique[key]["offer"]["text"] for key in text_keys]
+        )
+        documents_by_key = dict(zip(text_keys, documents))
+        inputs = {
+            key: self.build_analysis_input(entry["offer"], documents_by_key.get(key))
+            for key, entry in unique.items()
+        }
+
+        # 3. Packed LLM requests, a bounded number at a time
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        futures: Dict[str, asyncio.Future] = {}
+        tasks = []
+        submitters = {key: entry["offer"]["submitter"] for key, entry in unique.items()}
+        for pack in self.pack(inputs, submitters):
+            pack_futures = [asyncio.get_running_loop().create_future() for _ in pack]
+            futures.update(zip(pack, pack_futures))
+            tasks.append(asyncio.create_task(
+                self._analyze_pack([inputs[key] for key in pack], pack_futures, semaphore)
+            ))
+            counts["llm_requests"] += 1
+            if len(pack) > 1:
+                counts["packed_offers"] += len(pack)
+
+        # 4. Stream in input order; duplicates repeat the first occurrence's result
+        try:
+            for index, outcome in enumerate(outcomes):
+                record_id = records[index].get("id") if isinstance(records[index], dict) else None
+                if "error" in outcome:
+                    yield {"index": index, "id": record_id, "error": outcome["error"]}
+                    continue
+                key = outcome["key"]
+                line = {"index": index, "id": record_id, "result": await futures[key]}
+                first_index = unique[key]["index"]
+                if first_index != index:
+                    line["duplicateOf"] = first_index
+                yield line
+        finally:
+            # Client went away or the stream failed: stop the outstanding requests
+            for task in tasks:
+                task.cancel()
+
+        self._record(len(records), counts)
+        yield {
+            "summary": {
+                "total": len(records),
+                "unique": len(unique),
+                **counts,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+        }
+
+    async def _analyze_pack(self, texts: List[str], futures: List[asyncio.Future], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                results = await self.analyzer.analyze_investment_offers(texts)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Batch offer analysis failed: %s", e)
+                results = None
+            if results is None or len(results) != len(texts):
+                # Retry the offers one at a time rather than failing the whole pack
+                self._stats["pack_retries"] += 1
+                results = [await self._analyze_one(text) for text in texts]
+        for future, result in zip(futures, results):
+            try:
+                result = AnalysisResponse(**result).model_dump()
+            except Exception as e:
+                self._stats["analysis_errors"] += 1
+                result = _error_result(f"Invalid analysis result: {e}")
+            future.set_result(result)
+
+    async def _analyze_one(self, text: str) -> Dict[str, Any]:
+        try:
+            return await self.analyzer.analyze_investment_offer(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Offer analysis failed: %s", e)
+            return _error_result(f"Error during analysis: {e}")
+
+    def _record(self, total: int, counts: Dict[str, int]):
+        self._stats["batches"] += 1
+        self._stats["offers"] += total
+        for name, value in counts.items():
+            self._stats[name] += value
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "max_offers": self.max_offers,
+            "pack_max_chars": self.pack_max_chars,
+            "pack_size": self.pack_size,
+            "max_concurrency": self.max_concurrency,
+            **self._stats,
+        }
@@ -0,0 +1,256 @@
+"""
+Bulk advisor verification.
+A batch is deduplicated on the verification cache key, resolved against the
+local registry in one pass over a single snapshot, and only the records the
+registry settles by their exact registration number skip live SEBI / AI
+verification; the rest are checked live, a bounded number at a time. Results are yielded in input order as soon as each prefix
+of the batch is complete.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .sebi_advisor_service import SEBIAdvisorService, get_sebi_advisor_service
+from ..utils import fast_json
+from ..utils.registry_tables import REGISTRATION_FIELDS, normalize_registration
+
+logger = logging.getLogger(__name__)
+
+# Registry outcomes that need no live check, when they come from an exact registration match
+LOCALLY_RESOLVED_STATUSES = {"verified", "suspicious"}
+
+
+class BatchInputError(ValueError):
+    """Raised when a batch body cannot be parsed"""
+
+
+def parse_batch(body: bytes, content_type: Optional[str], key: str = "advisors") -> List[Any]:
+    """
+    Parse a batch body: NDJSON (one record per line) when the content type says so,
+    otherwise a JSON array or an object with a `key` array
+    """
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise BatchInputError("Batch body must be UTF-8") from e
+
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"):
+        records = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(fast_json.loads(line))
+            except ValueError as e:
+                raise BatchInputError(f"Invalid JSON on line {line_number}: {e}") from e
+        return records
+
+    try:
+        payload = fast_json.loads(text)
+    except ValueError as e:
+        raise BatchInputError(f"Invalid JSON: {e}") from e
+    if isinstance(payload, dict):
+        payload = payload.get(key)
+    if not isinstance(payload, list):
+        raise BatchInputError(f'Expected a JSON array of {key} or {{"{key}": [...]}}')
+    return payload
+
+
+def normalize_advisor_record(record: Any) -> Dict[str, Any]:
+    """
+    Map a batch record onto the fields used by /verify. Accepts both the /verify form
+    field names and the extracted-advisor shape used by /verify-extracted.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Advisor record must be a JSON object")
+    credentials = record.get("credentials") if isinstance(record.get("credentials"), dict) else {}
+    contact_info = record.get("contactInfo")
+    if isinstance(contact_info, (dict, list)):
+        contact_info = json.dumps(contact_info)
+    advisor = {
+        "name": record.get("name") or record.get("advisorName"),
+        "licenseId": record.get("licenseId") or credentials.get("licenseId"),
+        "registrationNumber": record.get("registrationNumber") or credentials.get("registrationNumber"),
+        "companyName": record.get("companyName"),
+        "contactInfo": contact_info,
+    }
+    if not advisor["name"] and not advisor["registrationNumber"] and not advisor["licenseId"]:
+        raise ValueError("Advisor record needs a name, registrationNumber or licenseId")
+    return advisor
+
+
+def is_exact_registration_match(advisor: Dict[str, Any], registry_result: Dict[str, Any]) -> bool:
+    """
+    Whether the registry result is for the record with exactly the advisor's registration
+    number (canonical form); name matches never qualify
+    """
+    canonical = normalize_registration(advisor.get("registrationNumber") or advisor.get("licenseId"))
+    details = registry_result.get("details")
+    if not canonical or not isinstance(details, dict):
+        return False
+    return any(normalize_registration(details.get(field)) == canonical for field in REGISTRATION_FIELDS)
+
+
+def _error_result(message: str) -> Dict[str, Any]:
+    return {
+        "status": "error",
+        "isRegistered": False,
+        "registrationStatus": "unknown",
+        "riskLevel": "high",
+        "warnings": [message],
+        "recommendations": ["Manual verification required"],
+        "details": None,
+    }
+
+
+class BatchVerificationService:
+    def __init__(
+        self,
+        verifier,
+        registry: Optional[SEBIAdvisorService] = None,
+        max_concurrency: Optional[int] = None,
+        max_records: Optional[int] = None,
+    ):
+        # verifier is the GroqService: cached live SEBI check + AI analysis for the residue
+        self.verifier = verifier
+        self.registry = registry or get_sebi_advisor_service()
+        self.max_concurrency = max_concurrency or int(os.getenv("SEBI_BATCH_CONCURRENCY", "8"))
+        self.max_records = max_records or int(os.getenv("SEBI_BATCH_MAX_RECORDS", "10000"))
+        self._stats = {
+            "batches": 0,
+            "records": 0,
+            "duplicates": 0,
+            "invalid": 0,
+            "fraud_pattern": 0,
+            "local_registry": 0,
+            "live_verification": 0,
+            "live_errors": 0,
+        }
+
+    async def verify_stream(self, records: List[Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield {"index", "resolvedBy", "result"} per input record in input order,
+        followed by one {"summary": {...}} line
+        """
+        started = time.perf_counter()
+        counts = dict.fromkeys(("duplicates", "invalid", "fraud_pattern", "local_registry", "live_verification"), 0)
+
+        # 1. Normalize and deduplicate on the verification cache key
+        outcomes: List[Dict[str, Any]] = []  # per input record: {"key"} or {"error"}
+        unique: Dict[Any, Dict[str, Any]] = {}  # key -> {"index", "advisor"}
+        cache = self.verifier.verification_cache
+        for index, record in enumerate(records):
+            try:
+                advisor = normalize_advisor_record(record)
+            except ValueError as e:
+                counts["invalid"] += 1
+                outcomes.append({"error": str(e)})
+                continue
+            key = cache.make_key(advisor)
+            if key in unique:
+                counts["duplicates"] += 1
+            else:
+                unique[key] = {"index": index, "advisor": advisor}
+            outcomes.append({"key": key})
+
+        # 2. Fraud patterns, then one pass over the local registry for everything else
+        resolved: Dict[Any, Dict[str, Any]] = {}  # key -> {"resolvedBy", "result"}
+        registry_keys = []
+        for key, entry in unique.items():
+            fraud_check = self.verifier.sebi_service.check_fraud_patterns(entry["advisor"])
+            if fraud_check["is_suspicious"]:
+                resolved[key] = {"resolvedBy": "fraud_pattern_check", "result": self._fraud_result(fraud_check)}
+                counts["fraud_pattern"] += 1
+            else:
+                registry_keys.append(key)
+
+        registry_results = await asyncio.to_thread(
+            self.registry.verify_advisors, [unique[key]["advisor"] for key in registry_keys]
+        )
+        residue = []
+        for key, registry_result in zip(registry_keys, registry_results):
+            if (registry_result["status"] in LOCALLY_RESOLVED_STATUSES
+                    and is_exact_registration_match(unique[key]["advisor"], registry_result)):
+                registry_result["verification_method"] = "local_registry"
+                resolved[key] = {"resolvedBy": "local_registry", "result": registry_result}
+                counts["local_registry"] += 1
+            else:
+                residue.append(key)
+
+        # 3. Live / AI verification for the residue, a bounded number at a time
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks: Dict[Any, asyncio.Task] = {
+            key: asyncio.create_task(self._verify_live(unique[key]["advisor"], semaphore)) for key in residue
+        }
+        counts["live_verification"] = len(residue)
+
+        # 4. Stream in input order; duplicates repeat the first occurrence's result
+        try:
+            for index, outcome in enumerate(outcomes):
+                if "error" in outcome:
+                    yield {"index": index, "resolvedBy": "invalid_input", "result": _error_result(outcome["error"])}
+                    continue
+                key = outcome["key"]
+                if key not in resolved:
+                    resolved[key] = {"resolvedBy": "live_verification", "result": await tasks[key]}
+                line = {"index": index, **resolved[key]}
+                first_index = unique[key]["index"]
+                if first_index != index:
+                    line["duplicateOf"] = first_index
+                yield line
+        finally:
+            # Client went away or the stream failed: stop the outstanding live checks
+            for task in tasks.values():
+                task.cancel()
+
+        self._record(len(records), counts)
+        yield {
+            "summary": {
+                "total": len(records),
+                "unique": len(unique),
+                **counts,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+        }
+
+    async def _verify_live(self, advisor: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await self.verifier.verify_advisor(advisor)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Batch live verification failed: %s", e)
+                self._stats["live_errors"] += 1
+                return _error_result(f"Verification error: {e}")
+
+    @staticmethod
+    def _fraud_result(fraud_check: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "status": "suspicious",
+            "isRegistered": False,
+            "registrationStatus": "not_found",
+            "riskLevel": "high",
+            "warnings": list(fraud_check.get("warnings", [])),
+            "recommendations": list(fraud_check.get("recommendations", [])),
+            "details": None,
+            "verification_method": "fraud_pattern_check",
+        }
+
+    def _record(self, total: int, counts: Dict[str, int]):
+        self._stats["batches"] += 1
+        self._stats["records"] += total
+        for name, value in counts.items():
+            self._stats[name] += value
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_records": self.max_records,
+            **self._stats,
+        }
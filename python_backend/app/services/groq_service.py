@@ -1,39 +1,23 @@
 import os
+import asyncio
 import groq
 import json
-from typing import Dict, Any
+import logging
+from typing import Dict, Any, List
 from dotenv import load_dotenv
 import os
 from pathlib import Path
 from .sebi_live_verification import SEBILiveVerificationService
+from .verification_cache import VerificationCache, verification_cache
+from ..utils.request_profiling import stage
+
+logger = logging.getLogger(__name__)
 
 # Load .env once globally
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path, override=True)
 
-class GroqService:
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
-        print("Loaded API key:", os.getenv("GROQ_API_KEY"))
-
-        if not api_key:
-            raise ValueError("GROQ_API_KEY environment variable is not set")
-
-        self.client = groq.Groq(
-            api_key=api_key,
-            base_url="https://api.groq.com/v1"
-        )
-        self.model = "mixtral-8x7b-32768"
-        
-        # Initialize SEBI live verification service
-        self.sebi_service = SEBILiveVerificationService()
-
-
-    async def analyze_investment_offer(self, text: str) -> Dict[str, Any]:
-        """
-        Analyze investment offer text using Groq API
-        """
-        system_prompt = """You are an expert financial fraud detector at SEBI (Securities and Exchange Board of India). 
+OFFER_ANALYSIS_SYSTEM_PROMPT = """You are an expert financial fraud detector at SEBI (Securities and Exchange Board of India). 
         Your task is to analyze investment offers and detect potential fraud or suspicious activities.
         You will receive structured data including:
         1. Text input from the form
@@ -75,7 +59,61 @@ class GroqService:
             }
         }
         """
+
+# Several short offers can share one completion; each gets its own analysis object
+PACKED_OFFERS_INSTRUCTIONS = """You will receive several independent investment offers, numbered from 0.
+Analyze each offer on its own, exactly as you would if it were the only one, and never let
+details of one offer influence another. Respond with a JSON object of the form
+{"results": [{"offerIndex": 0, ...analysis object...}, {"offerIndex": 1, ...}, ...]}
+with one analysis object per offer, in order, each using the schema above.
+"""
+
+class GroqService:
+    def __init__(
+        self,
+        cache: VerificationCache | None = None,
+        client: groq.Groq | None = None,
+        sebi_service: SEBILiveVerificationService | None = None,
+    ):
+        # The application's ServiceContainer passes its pooled client and SEBI service
+        if client is None:
+            api_key = os.getenv("GROQ_API_KEY")
+            if not api_key:
+                raise ValueError("GROQ_API_KEY environment variable is not set")
+            client = groq.Groq(
+                api_key=api_key,
+                base_url="https://api.groq.com/v1"
+            )
+        self.client = client
+        self.model = "mixtral-8x7b-32768"
         
+        # SEBI live verification service
+        self.sebi_service = sebi_service or SEBILiveVerificationService()
+        
+        # Completions run in worker threads; at most this many are in flight at once
+        self.max_in_flight = int(os.getenv("GROQ_MAX_IN_FLIGHT", "8"))
+        self._completion_slots = asyncio.Semaphore(self.max_in_flight)
+        
+        # Shared verification result cache (positive/negative TTL, stale-while-revalidate)
+        self.verification_cache = cache or verification_cache
+
+
+    async def _complete(self, **kwargs):
+        """
+        One chat completion, off the event loop and within the in-flight limit
+        """
+        with stage("groq.wait_for_slot"):
+            await self._completion_slots.acquire()
+        try:
+            with stage("groq.completion", max_tokens=kwargs.get("max_tokens")):
+                return await asyncio.to_thread(self.client.chat.completions.create, **kwargs)
+        finally:
+            self._completion_slots.release()
+
+    async def analyze_investment_offer(self, text: str) -> Dict[str, Any]:
+        """
+        Analyze investment offer text using Groq API
+        """
         analysis_prompt = f"""Analyze this investment offer for potential fraud:
         {text}
         
@@ -88,10 +126,10 @@ class GroqService:
         """
         
         try:
-            completion = self.client.chat.completions.create(
+            completion = await self._complete(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": OFFER_ANALYSIS_SYSTEM_PROMPT},
                     {"role": "user", "content": analysis_prompt}
                 ],
                 temperature=0.1,
@@ -113,12 +151,56 @@ class GroqService:
                 "analysisDetails": f"Error during analysis: {str(e)}"
             }
 
+    async def analyze_investment_offers(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze several short offers with one Groq request (results in input order).
+        Only pack offers of one submitter: an offer's text can steer the analysis of the
+        others. Falls back to one request per offer when the packed response does not line up.
+        """
+        if len(texts) == 1:
+            return [await self.analyze_investment_offer(texts[0])]
+        
+        offers = "\n\n".join(f"Offer {index}:\n{text}" for index, text in enumerate(texts))
+        try:
+            completion = await self._complete(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": OFFER_ANALYSIS_SYSTEM_PROMPT + "\n" + PACKED_OFFERS_INSTRUCTIONS},
+                    {"role": "user", "content": f"Analyze these {len(texts)} investment offers for potential fraud:\n{offers}"}
+                ],
+                temperature=0.1,
+                max_tokens=min(1200 * len(texts), 8000),
+            )
+            results = json.loads(completion.choices[0].message.content).get("results")
+            if (
+                not isinstance(results, list)
+                or len(results) != len(texts)
+                or any(not isinstance(r, dict) or r.get("offerIndex", i) != i for i, r in enumerate(results))
+            ):
+                raise ValueError(f"expected {len(texts)} ordered results")
+            for result in results:
+                result.pop("offerIndex", None)
+            return results
+        except Exception as e:
+            logger.warning(f"Packed Groq analysis failed, analyzing offers one by one: {e}")
+            return [await self.analyze_investment_offer(text) for text in texts]
+
     async def verify_advisor(self, advisor_data: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Verify advisor credentials, serving repeat verifications from the result cache
+        """
+        key = self.verification_cache.make_key(advisor_data)
+        return await self.verification_cache.get_or_compute(
+            key, lambda: self._verify_advisor_uncached(advisor_data)
+        )
+
+    async def _verify_advisor_uncached(self, advisor_data: Dict[str, str]) -> Dict[str, Any]:
         """
         Verify advisor credentials using live SEBI verification and AI analysis
         """
-        # First check against SEBI website live
-        sebi_result = self.sebi_service.verify_advisor_on_sebi_website(advisor_data)
+        # First check against SEBI website live (blocking, bounded by the service latency budget)
+        with stage("groq.sebi_live_verification"):
+            sebi_result = await asyncio.to_thread(self.sebi_service.verify_advisor_on_sebi_website, advisor_data)
         
         # If found on SEBI website, return that result with high confidence
         if sebi_result["status"] in ["found_on_sebi", "verified"]:
@@ -128,6 +210,11 @@ class GroqService:
         if sebi_result["status"] == "suspicious":
             return sebi_result
         
+        # Incomplete SEBI check (latency budget ran out or the website was unavailable): "not found"
+        # means nothing here, so return the degraded result as is; the cache does not keep it
+        if sebi_result.get("partial") or sebi_result.get("upstreamUnavailable"):
+            return sebi_result
+        
         # If not found on SEBI website, use AI analysis as backup
         system_prompt = """You are a SEBI compliance expert. Analyze the given advisor details for potential red flags.
         Since this advisor was not found on the official SEBI website, provide risk assessment and recommendations.
@@ -164,7 +251,7 @@ class GroqService:
         """
         
         try:
-            completion = self.client.chat.completions.create(
+            completion = await self._complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
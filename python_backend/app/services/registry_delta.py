@@ -0,0 +1,145 @@
+"""
+Content-hash delta between registry snapshots.
+Every record gets a stable key (canonical registration number, else
+normalized name) and a hash of its canonical JSON. A manifest of key -> hash
+is kept next to the registry; the next sync streams its records through a
+DeltaTracker, which writes only added, changed and removed records to an
+NDJSON delta file; the manifest is replaced once the new snapshot is in place.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from ..utils.ndjson import NDJSONWriter
+from ..utils.registry_tables import NAME_FIELDS, REGISTRATION_FIELDS, normalize_name, normalize_registration
+
+
+def record_key(record: Dict[str, Any]) -> Optional[str]:
+    """
+    Stable identity of a registry record: its registration number, or its name when it has none
+    """
+    for field in REGISTRATION_FIELDS:
+        canonical = normalize_registration(record.get(field))
+        if canonical:
+            return f"reg:{canonical}"
+    for field in NAME_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str) and normalize_name(value):
+            return f"name:{normalize_name(value)}"
+    return None
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def load_manifest(path: Path) -> Dict[str, str]:
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get("records", {})
+
+
+def build_manifest(records: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Manifest of an existing snapshot, for the first sync after a registry written without one
+    """
+    manifest = {}
+    for record in records:
+        key = record_key(record)
+        if key is not None and key not in manifest:
+            manifest[key] = record_hash(record)
+    return manifest
+
+
+@dataclass
+class DeltaReport:
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    unkeyed: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class DeltaTracker:
+    """
+    Streaming diff of a new snapshot against the previous manifest.
+    Delta lines: {"op": "added" | "changed" | "removed", "key": ..., "record": ... (not for removed)}
+    """
+
+    def __init__(self, previous: Dict[str, str], delta_path: Path):
+        self.previous = previous
+        self.delta_path = Path(delta_path)
+        self.current: Dict[str, str] = {}
+        self.report = DeltaReport()
+        self.delta_path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.delta_path.with_name(self.delta_path.name + ".tmp")
+        self._tmp_path.unlink(missing_ok=True)
+        self._writer = NDJSONWriter(self._tmp_path)
+        self._pending = []
+
+    def observe(self, record: Dict[str, Any]) -> Optional[str]:
+        """
+        Feed one record of the new snapshot; returns the delta op written for it, if any
+        """
+        key = record_key(record)
+        if key is None:
+            self.report.unkeyed += 1
+            return None
+        if key in self.current:
+            # First occurrence wins, as in the registry index
+            self.report.duplicates += 1
+            return None
+        digest = self.current[key] = record_hash(record)
+        old = self.previous.get(key)
+        if old == digest:
+            self.report.unchanged += 1
+            return None
+        op = "added" if old is None else "changed"
+        setattr(self.report, op, getattr(self.report, op) + 1)
+        self._pending.append({"op": op, "key": key, "record": record})
+        if len(self._pending) >= 1000:
+            self._writer.append(self._pending)
+            self._pending = []
+        return op
+
+    def finish(self) -> DeltaReport:
+        """
+        Write removals and publish the delta file
+        """
+        removed = [{"op": "removed", "key": key} for key in self.previous if key not in self.current]
+        self._writer.append(self._pending + removed)
+        self._pending = []
+        self.report.removed = len(removed)
+        self._writer.close()
+        os.replace(self._tmp_path, self.delta_path)
+        return self.report
+
+    def write_manifest(self, manifest_path: Path):
+        """
+        Replace the manifest with the new snapshot's; call once the snapshot itself is in place
+        """
+        manifest_path = Path(manifest_path)
+        tmp_manifest = manifest_path.with_name(manifest_path.name + ".tmp")
+        with open(tmp_manifest, 'w', encoding='utf-8') as f:
+            json.dump({
+                "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "delta": asdict(self.report),
+                "records": self.current,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_manifest, manifest_path)
+
+    def abort(self):
+        self._writer.close()
+        self._tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,457 @@
+"""
+Concurrent, resumable SEBI registry fetcher.
+Listing pages are fetched by a bounded thread pool with retry and exponential
+backoff. As each page arrives its records are appended to an NDJSON journal
+and a small per-page checkpoint records where they landed, so an interrupted
+sync resumes where it stopped and only failed or missing pages are fetched
+again; once a sync has completed, the next one starts over. Response parsing is pluggable (JSON API responses or HTML listings).
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..utils.ndjson import NDJSONWriter, iter_ndjson
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL_TEMPLATE = (
+    "https://www.sebi.gov.in/sebiweb/other/OtherAction.do?doRecognisedFpi=yes&intmId=14&doDirect={page}"
+)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PageFetchError(Exception):
+    """Raised when a page could not be fetched or parsed after all retries"""
+
+
+@dataclass
+class PageResult:
+    records: List[Dict[str, Any]]
+    # False when this page is past the end of the listing
+    has_more: bool = True
+
+
+@dataclass
+class SyncReport:
+    pages_fetched: int = 0
+    pages_resumed: int = 0
+    failed_pages: Dict[int, str] = field(default_factory=dict)
+    last_page: Optional[int] = None
+    records: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.failed_pages
+
+
+class PageParser(ABC):
+    """
+    Turns one listing response into records. Subclass to support other layouts.
+    """
+
+    @abstractmethod
+    def parse(self, body: str, content_type: str = "") -> PageResult:
+        """
+        Parse one response body; raise ValueError when it cannot be parsed
+        """
+
+
+class JSONPageParser(PageParser):
+    """
+    JSON responses: a list of records, or an object holding them under records_key
+    """
+
+    def __init__(self, records_key: str = "records"):
+        self.records_key = records_key
+
+    def parse(self, body: str, content_type: str = "") -> PageResult:
+        data = json.loads(body)
+        records = data.get(self.records_key) if isinstance(data, dict) else data
+        if records is None:
+            records = []
+        if not isinstance(records, list):
+            raise ValueError(f"Expected a list of records under '{self.records_key}'")
+        return PageResult(records=[record for record in records if isinstance(record, dict)], has_more=bool(records))
+
+
+# SEBI listing labels -> record fields used by SEBIAdvisorService
+HTML_FIELD_MAP = {
+    "name": "name",
+    "registration no.": "registrationNumber",
+    "registration no": "registrationNumber",
+    "registration number": "registrationNumber",
+    "e-mail": "email",
+    "email": "email",
+    "telephone": "phone",
+    "phone": "phone",
+    "address": "address",
+    "contact person": "contactPerson",
+    "correspondence address": "address",
+    "validity": "validUntil",
+    "from": "registrationDate",
+    "to": "validUntil",
+}
+
+
+class _ListingParser(HTMLParser):
+    """
+    Collects records from either a table (header row + data rows) or SEBI's
+    card layout (title/value pairs; a card-table block or a repeated label starts the next entity)
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[str]] = []
+        self.header: Optional[List[str]] = None
+        self.cards: List[List[tuple]] = []
+        self._row: Optional[List[str]] = None
+        self._row_is_header = False
+        self._cell: Optional[List[str]] = None
+        self._card_role: Optional[str] = None  # "title" / "value" while inside one
+        self._card_depth = 0
+        self._card_text: List[str] = []
+        self._pending_title: Optional[str] = None
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style', 'noscript'):
+            self._skip_depth += 1
+            return
+        classes = set((dict(attrs).get('class') or '').split())
+        if 'card-table' in classes and (not self.cards or self.cards[-1]):
+            self.cards.append([])
+        if self._card_role is not None:
+            self._card_depth += 1
+        elif classes & {'title', 'value'}:
+            self._card_role = 'title' if 'title' in classes else 'value'
+            self._card_depth = 1
+            self._card_text = []
+        if tag == 'tr':
+            self._row, self._row_is_header = [], False
+        elif tag in ('td', 'th') and self._row is not None:
+            self._cell = []
+            self._row_is_header = self._row_is_header or tag == 'th'
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style', 'noscript'):
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._card_role is not None:
+            self._card_depth -= 1
+            if self._card_depth == 0:
+                self._finish_card_part()
+        if tag in ('td', 'th') and self._cell is not None and self._row is not None:
+            self._row.append(' '.join(''.join(self._cell).split()))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            if self._row_is_header and self.header is None:
+                self.header = self._row
+            elif any(self._row):
+                self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._cell is not None:
+            self._cell.append(data)
+        if self._card_role is not None:
+            self._card_text.append(data)
+
+    def _finish_card_part(self):
+        text = ' '.join(''.join(self._card_text).split())
+        if self._card_role == 'title':
+            self._pending_title = text
+        elif self._pending_title is not None:
+            # A label seen again starts the next entity when cards are not wrapped individually
+            if not self.cards or any(label == self._pending_title for label, _ in self.cards[-1]):
+                self.cards.append([])
+            self.cards[-1].append((self._pending_title, text))
+            self._pending_title = None
+        self._card_role = None
+
+
+class HTMLPageParser(PageParser):
+    """
+    HTML listings: tables with a header row, or SEBI's title/value card layout
+    """
+
+    def __init__(self, field_map: Optional[Dict[str, str]] = None):
+        self.field_map = field_map or HTML_FIELD_MAP
+
+    def _field(self, label: str) -> str:
+        label = label.strip().rstrip(':').strip()
+        return self.field_map.get(label.lower(), label)
+
+    def parse(self, body: str, content_type: str = "") -> PageResult:
+        parser = _ListingParser()
+        parser.feed(body)
+        parser.close()
+
+        records = []
+        for card in parser.cards:
+            record = {self._field(label): value for label, value in card if value}
+            if record:
+                records.append(record)
+        if not records and parser.header:
+            header = [self._field(label) for label in parser.header]
+            for row in parser.rows:
+                record = {name: value for name, value in zip(header, row) if name and value}
+                if record:
+                    records.append(record)
+        return PageResult(records=records, has_more=bool(records))
+
+
+class AutoPageParser(PageParser):
+    """
+    Picks the JSON or HTML parser from the content type (or the body when it is not set)
+    """
+
+    def __init__(self, json_parser: Optional[PageParser] = None, html_parser: Optional[PageParser] = None):
+        self.json_parser = json_parser or JSONPageParser()
+        self.html_parser = html_parser or HTMLPageParser()
+
+    def parse(self, body: str, content_type: str = "") -> PageResult:
+        if 'json' in content_type.lower() or body.lstrip()[:1] in ('{', '['):
+            return self.json_parser.parse(body, content_type)
+        return self.html_parser.parse(body, content_type)
+
+
+PARSERS = {"auto": AutoPageParser, "json": JSONPageParser, "html": HTMLPageParser}
+
+_PAGE_FILE = re.compile(r'^page_(\d+)\.json$')
+
+
+class RegistryFetcher:
+    def __init__(
+        self,
+        checkpoint_dir: Path,
+        url_template: str = DEFAULT_URL_TEMPLATE,
+        parser: Optional[PageParser] = None,
+        max_workers: int = 8,
+        start_page: int = 1,
+        max_pages: int = 700,
+        max_attempts: int = 4,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 30.0,
+        timeout: float = 20.0,
+        session: Optional[requests.Session] = None,
+    ):
+        if '{page}' not in url_template:
+            # Without a placeholder every request would fetch the same page
+            raise ValueError("url_template must contain a {page} placeholder")
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.url_template = url_template
+        self.parser = parser or AutoPageParser()
+        self.max_workers = max_workers
+        self.start_page = start_page
+        self.max_pages = max_pages
+        self.max_attempts = max_attempts
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+
+    @property
+    def last_allowed_page(self) -> int:
+        return self.start_page + self.max_pages - 1
+
+    def page_url(self, page: int) -> str:
+        return self.url_template.format(page=page)
+
+    def _page_file(self, page: int) -> Path:
+        return self.checkpoint_dir / f"page_{page:05d}.json"
+
+    def _state_file(self) -> Path:
+        return self.checkpoint_dir / "sync_state.json"
+
+    def _journal_file(self) -> Path:
+        return self.checkpoint_dir / "records.ndjson"
+
+    # Checkpoints
+
+    def _prepare_checkpoints(self, restart: bool) -> Dict[str, Any]:
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        state_file = self._state_file()
+        state = {}
+        if state_file.exists() and not restart:
+            state = json.loads(state_file.read_text(encoding='utf-8'))
+            if state.get("url_template") != self.url_template:
+                raise ValueError(
+                    f"Checkpoints in {self.checkpoint_dir} belong to {state.get('url_template')}; "
+                    "use another checkpoint directory or restart"
+                )
+        if not restart and state.get("complete"):
+            # Checkpoints only help an interrupted sync; a finished one must see upstream changes
+            logger.info("Previous sync completed, fetching every page again")
+            restart = True
+        if restart:
+            for path in self.checkpoint_dir.glob("page_*.json"):
+                path.unlink()
+            self._journal_file().unlink(missing_ok=True)
+        state = {"url_template": self.url_template, "failed_pages": state.get("failed_pages", {})}
+        self._write_json(state_file, state)
+        return state
+
+    def checkpointed_pages(self) -> Dict[int, bool]:
+        """
+        page -> has_more for every checkpointed page
+        """
+        pages = {}
+        if not self.checkpoint_dir.exists():
+            return pages
+        for path in self.checkpoint_dir.iterdir():
+            match = _PAGE_FILE.match(path.name)
+            if match:
+                with open(path, encoding='utf-8') as f:
+                    pages[int(match.group(1))] = json.load(f).get("has_more", True)
+        return pages
+
+    def _commit_page(self, journal: NDJSONWriter, page: int, result: PageResult):
+        """
+        Append the page's records to the journal, then checkpoint their byte range.
+        A crash between the two leaves an unreferenced block that is never read.
+        """
+        offset, length, count = journal.append(result.records)
+        self._write_json(self._page_file(page), {
+            "page": page,
+            "url": self.page_url(page),
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "has_more": result.has_more,
+            "offset": offset,
+            "length": length,
+            "count": count,
+        })
+
+    @staticmethod
+    def _write_json(path: Path, payload: Dict[str, Any]):
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # Fetching
+
+    def fetch_page(self, page: int) -> PageResult:
+        """
+        Fetch and parse one page, retrying transient failures with exponential backoff
+        """
+        url = self.page_url(page)
+        last_error = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                delay = min(self.backoff_max_s, self.backoff_base_s * 2 ** (attempt - 1))
+                retry_after = getattr(last_error, "retry_after", None)
+                time.sleep(retry_after if retry_after is not None else delay * random.uniform(0.5, 1.0))
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException as e:
+                last_error = e
+                logger.warning("Page %s attempt %s failed: %s", page, attempt + 1, e)
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                last_error = PageFetchError(f"HTTP {response.status_code}")
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    last_error.retry_after = min(self.backoff_max_s, float(retry_after))
+                logger.warning("Page %s attempt %s: HTTP %s", page, attempt + 1, response.status_code)
+                continue
+            if response.status_code != 200:
+                raise PageFetchError(f"HTTP {response.status_code} for {url}")
+
+            try:
+                return self.parser.parse(response.text, response.headers.get("Content-Type", ""))
+            except ValueError as e:
+                raise PageFetchError(f"Could not parse page {page}: {e}") from e
+
+        raise PageFetchError(f"Page {page} failed after {self.max_attempts} attempts: {last_error}")
+
+    def run(self, restart: bool = False) -> SyncReport:
+        """
+        Fetch every page not yet checkpointed, a bounded number at a time, until the end of
+        the listing (first page without records) or max_pages. Failed pages are recorded
+        and retried by the next run; after a complete run the next one fetches every page.
+        """
+        started = time.perf_counter()
+        state = self._prepare_checkpoints(restart)
+        report = SyncReport()
+        done = self.checkpointed_pages()
+        report.pages_resumed = len(done)
+
+        ends = [page for page, has_more in done.items() if not has_more]
+        end = min(ends) if ends else self.last_allowed_page
+        failed: Dict[int, str] = {}
+        next_page = self.start_page
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="registry-fetch") as pool, \
+                NDJSONWriter(self._journal_file()) as journal:
+            pending = {}
+            while True:
+                while len(pending) < self.max_workers and next_page <= end:
+                    if next_page not in done:
+                        pending[pool.submit(self.fetch_page, next_page)] = next_page
+                    next_page += 1
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    page = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except PageFetchError as e:
+                        failed[page] = str(e)
+                        logger.warning("Giving up on page %s: %s", page, e)
+                        continue
+                    # Pages are committed in arrival order; iter_records restores page order
+                    self._commit_page(journal, page, result)
+                    report.pages_fetched += 1
+                    done[page] = result.has_more
+                    if not result.has_more and page < end:
+                        end = page
+                        logger.info("Listing ends before page %s", page)
+
+        report.failed_pages = {page: error for page, error in sorted(failed.items()) if page <= end}
+        report.last_page = end
+        report.records = sum(1 for _ in self.iter_records(end))
+        report.elapsed_s = time.perf_counter() - started
+
+        state["failed_pages"] = {str(page): error for page, error in report.failed_pages.items()}
+        state["last_page"] = report.last_page
+        state["complete"] = report.complete
+        state["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self._write_json(self._state_file(), state)
+        return report
+
+    def iter_records(self, last_page: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Records from the checkpointed pages in page order, one page in memory at a time
+        """
+        last_page = last_page if last_page is not None else self.last_allowed_page
+        pages = sorted(
+            int(match.group(1)) for match in map(_PAGE_FILE.match, os.listdir(self.checkpoint_dir)) if match
+        )
+        journal = self._journal_file()
+        for page in pages:
+            if page > last_page:
+                break
+            with open(self._page_file(page), encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("count"):
+                yield from iter_ndjson(journal, checkpoint["offset"], checkpoint["length"])
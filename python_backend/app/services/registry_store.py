@@ -0,0 +1,527 @@
+"""
+Database-backed advisor registry.
+The registry can live in PostgreSQL (asyncpg pool, B-tree index on registration
+numbers, pg_trgm GIN index on normalized names) or in SQLite for local testing
+(explicit trigram table), so several API nodes share one registry instead of
+each loading the JSON. DatabaseRegistry is the synchronous facade used by
+SEBIAdvisorService: it runs the async store on a private event loop thread and
+trips a circuit breaker on errors so callers can fall back to the in-process
+index.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..utils.adaptive_limiter import CircuitBreaker
+from ..utils.fuzzy_index import length_bounds, trigrams
+from ..utils.registry_tables import (
+    NAME_FIELDS,
+    REGISTRATION_FIELDS,
+    build_registration_index,
+    normalize_name,
+    normalize_registration,
+)
+
+logger = logging.getLogger(__name__)
+
+# Registration rows: kind 0 is a canonical number. Loads no longer write kind 1
+# (formatting variants); lookups ignore any such rows left by older loads.
+CANONICAL = 0
+
+NameCandidate = Tuple[int, int, str]  # (record position, field index, normalized name)
+
+
+class RegistryStoreError(Exception):
+    """Raised when the registry database cannot answer a query"""
+
+
+def registry_rows(records: Sequence[Dict[str, Any]]):
+    """
+    Rows for the registry tables: (position, record JSON), (canonical registration, kind, position)
+    and (position, field, normalized name)
+    """
+    advisors = [(position, json.dumps(record, ensure_ascii=False)) for position, record in enumerate(records)]
+    index = build_registration_index(records, REGISTRATION_FIELDS)
+    registrations = [(registration, CANONICAL, position) for registration, position in index.items()]
+    names = []
+    for position, record in enumerate(records):
+        for field_position, field in enumerate(NAME_FIELDS):
+            value = record.get(field)
+            if isinstance(value, str) and normalize_name(value):
+                names.append((position, field_position, normalize_name(value)))
+    return advisors, registrations, names
+
+
+class RegistryStore(ABC):
+    """
+    Async storage backend interface; a backend missing any method fails when it is created
+    """
+
+    @abstractmethod
+    async def connect(self):
+        ...
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+    @abstractmethod
+    async def load(self, records: Sequence[Dict[str, Any]], source: str = ""):
+        """
+        Replace the stored registry with records in one transaction
+        """
+
+    @abstractmethod
+    async def find_registration(self, canonical: str) -> Optional[Dict[str, Any]]:
+        """
+        Record with exactly this canonical registration number
+        """
+
+    @abstractmethod
+    async def name_candidates(self, normalized: str, limit: Optional[int]) -> List[NameCandidate]:
+        ...
+
+    @abstractmethod
+    async def fetch_records(self, positions: List[int]) -> Dict[int, Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_meta(self) -> Dict[str, str]:
+        ...
+
+
+class PostgresRegistryStore(RegistryStore):
+    """
+    PostgreSQL backend. asyncpg prepares each statement once per pooled connection
+    and reuses it from its statement cache.
+    """
+
+    SCHEMA = """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE TABLE IF NOT EXISTS sebi_advisors (
+            position INTEGER PRIMARY KEY,
+            record JSONB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sebi_advisor_registrations (
+            registration TEXT NOT NULL,
+            kind SMALLINT NOT NULL,
+            position INTEGER,
+            PRIMARY KEY (registration, kind)
+        );
+        CREATE TABLE IF NOT EXISTS sebi_advisor_names (
+            position INTEGER NOT NULL,
+            field SMALLINT NOT NULL,
+            normalized TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sebi_advisor_names_trgm
+            ON sebi_advisor_names USING gin (normalized gin_trgm_ops);
+        CREATE TABLE IF NOT EXISTS sebi_registry_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    FIND_REGISTRATION = """
+        SELECT a.record::text FROM sebi_advisor_registrations r
+        JOIN sebi_advisors a ON a.position = r.position
+        WHERE r.registration = $1 AND r.kind = 0 AND r.position IS NOT NULL
+    """
+    NAME_CANDIDATES = """
+        SELECT position, field, normalized FROM sebi_advisor_names
+        WHERE normalized % $1
+        ORDER BY similarity(normalized, $1) DESC
+        LIMIT $2
+    """
+    # Without a limit: every name sharing a trigram, not only those above pg_trgm.similarity_threshold
+    ALL_NAME_CANDIDATES = """
+        SELECT position, field, normalized FROM sebi_advisor_names
+        WHERE similarity(normalized, $1) > 0
+    """
+    FETCH_RECORDS = "SELECT position, record::text FROM sebi_advisors WHERE position = ANY($1::int[])"
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10, similarity_threshold: float = 0.3):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+        self._pool = None
+
+    async def connect(self):
+        try:
+            import asyncpg
+        except ImportError as e:
+            raise RegistryStoreError("asyncpg is required for the PostgreSQL registry backend") from e
+        self._pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            statement_cache_size=100,
+            # Candidate cut-off for the % operator (served by the GIN trigram index)
+            server_settings={"pg_trgm.similarity_threshold": str(self.similarity_threshold)},
+        )
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def ensure_schema(self):
+        async with self._pool.acquire() as conn:
+            await conn.execute(self.SCHEMA)
+
+    async def load(self, records: Sequence[Dict[str, Any]], source: str = ""):
+        advisors, registrations, names = registry_rows(records)
+        await self.ensure_schema()
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "TRUNCATE sebi_advisors, sebi_advisor_registrations, sebi_advisor_names"
+                )
+                await conn.copy_records_to_table("sebi_advisors", records=advisors, columns=["position", "record"])
+                await conn.copy_records_to_table(
+                    "sebi_advisor_registrations", records=registrations, columns=["registration", "kind", "position"]
+                )
+                await conn.copy_records_to_table(
+                    "sebi_advisor_names", records=names, columns=["position", "field", "normalized"]
+                )
+                await conn.executemany(
+                    "INSERT INTO sebi_registry_meta (key, value) VALUES ($1, $2) "
+                    "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
+                    _meta_rows(len(records), source),
+                )
+            await conn.execute("ANALYZE sebi_advisors, sebi_advisor_registrations, sebi_advisor_names")
+
+    async def find_registration(self, canonical: str) -> Optional[Dict[str, Any]]:
+        async with self._pool.acquire() as conn:
+            record = await conn.fetchval(self.FIND_REGISTRATION, canonical)
+        return json.loads(record) if record is not None else None
+
+    async def name_candidates(self, normalized: str, limit: Optional[int]) -> List[NameCandidate]:
+        async with self._pool.acquire() as conn:
+            if limit is None:
+                rows = await conn.fetch(self.ALL_NAME_CANDIDATES, normalized)
+            else:
+                rows = await conn.fetch(self.NAME_CANDIDATES, normalized, limit)
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    async def fetch_records(self, positions: List[int]) -> Dict[int, Dict[str, Any]]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(self.FETCH_RECORDS, positions)
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    async def get_meta(self) -> Dict[str, str]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("SELECT key, value FROM sebi_registry_meta")
+        return {row[0]: row[1] for row in rows}
+
+
+class SQLiteRegistryStore(RegistryStore):
+    """
+    SQLite backend for local testing. A fixed set of connections is handed out
+    through an asyncio queue and queries run in worker threads; sqlite3 keeps
+    each connection's prepared statements in its statement cache.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sebi_advisors (
+            position INTEGER PRIMARY KEY,
+            record TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sebi_advisor_registrations (
+            registration TEXT NOT NULL,
+            kind INTEGER NOT NULL,
+            position INTEGER,
+            PRIMARY KEY (registration, kind)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS sebi_advisor_names (
+            id INTEGER PRIMARY KEY,
+            position INTEGER NOT NULL,
+            field INTEGER NOT NULL,
+            normalized TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sebi_advisor_name_trigrams (
+            gram TEXT NOT NULL,
+            name_id INTEGER NOT NULL,
+            PRIMARY KEY (gram, name_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS sebi_registry_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    FIND_REGISTRATION = """
+        SELECT a.record FROM sebi_advisor_registrations r
+        JOIN sebi_advisors a ON a.position = r.position
+        WHERE r.registration = ? AND r.kind = 0 AND r.position IS NOT NULL
+    """
+    NAME_CANDIDATES = """
+        SELECT n.position, n.field, n.normalized FROM (
+            SELECT name_id, COUNT(*) AS shared FROM sebi_advisor_name_trigrams
+            WHERE gram IN (SELECT value FROM json_each(?))
+            GROUP BY name_id ORDER BY shared DESC LIMIT ?
+        ) t JOIN sebi_advisor_names n ON n.id = t.name_id
+    """
+    FETCH_RECORDS = "SELECT position, record FROM sebi_advisors WHERE position IN (SELECT value FROM json_each(?))"
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self.pool_size = pool_size
+        self._connections: Optional[asyncio.Queue] = None
+        self._all: List[sqlite3.Connection] = []
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    async def connect(self):
+        self._all = [await asyncio.to_thread(self._open) for _ in range(self.pool_size)]
+        self._connections = asyncio.Queue()
+        for conn in self._all:
+            self._connections.put_nowait(conn)
+        await self._run(lambda conn: conn.executescript(self.SCHEMA))
+
+    async def close(self):
+        for conn in self._all:
+            conn.close()
+        self._all = []
+
+    async def _run(self, fn):
+        conn = await self._connections.get()
+        try:
+            return await asyncio.to_thread(fn, conn)
+        finally:
+            self._connections.put_nowait(conn)
+
+    async def load(self, records: Sequence[Dict[str, Any]], source: str = ""):
+        advisors, registrations, names = registry_rows(records)
+
+        def replace(conn: sqlite3.Connection):
+            with conn:
+                for table in ("sebi_advisors", "sebi_advisor_registrations", "sebi_advisor_names",
+                              "sebi_advisor_name_trigrams"):
+                    conn.execute(f"DELETE FROM {table}")
+                conn.executemany("INSERT INTO sebi_advisors (position, record) VALUES (?, ?)", advisors)
+                conn.executemany(
+                    "INSERT INTO sebi_advisor_registrations (registration, kind, position) VALUES (?, ?, ?)",
+                    registrations,
+                )
+                conn.executemany(
+                    "INSERT INTO sebi_advisor_names (id, position, field, normalized) VALUES (?, ?, ?, ?)",
+                    [(name_id, *row) for name_id, row in enumerate(names)],
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO sebi_advisor_name_trigrams (gram, name_id) VALUES (?, ?)",
+                    ((gram, name_id) for name_id, (_, _, normalized) in enumerate(names)
+                     for gram in trigrams(normalized)),
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sebi_registry_meta (key, value) VALUES (?, ?)",
+                    _meta_rows(len(records), source),
+                )
+            conn.execute("ANALYZE")
+
+        await self._run(replace)
+
+    async def find_registration(self, canonical: str) -> Optional[Dict[str, Any]]:
+        row = await self._run(lambda conn: conn.execute(self.FIND_REGISTRATION, (canonical,)).fetchone())
+        return json.loads(row[0]) if row is not None else None
+
+    async def name_candidates(self, normalized: str, limit: Optional[int]) -> List[NameCandidate]:
+        grams = json.dumps(sorted(trigrams(normalized)))
+        # LIMIT -1 is no limit
+        limit = limit if limit is not None else -1
+        return await self._run(lambda conn: conn.execute(self.NAME_CANDIDATES, (grams, limit)).fetchall())
+
+    async def fetch_records(self, positions: List[int]) -> Dict[int, Dict[str, Any]]:
+        rows = await self._run(lambda conn: conn.execute(self.FETCH_RECORDS, (json.dumps(positions),)).fetchall())
+        return {position: json.loads(record) for position, record in rows}
+
+    async def get_meta(self) -> Dict[str, str]:
+        rows = await self._run(lambda conn: conn.execute("SELECT key, value FROM sebi_registry_meta").fetchall())
+        return dict(rows)
+
+
+def _meta_rows(record_count: int, source: str) -> List[Tuple[str, str]]:
+    return [
+        ("record_count", str(record_count)),
+        ("loaded_at", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())),
+        ("source", source),
+    ]
+
+
+def create_store(url: str) -> RegistryStore:
+    """
+    postgresql://... or postgres://... -> PostgreSQL, sqlite:///path -> SQLite
+    """
+    if url.startswith(("postgresql://", "postgres://")):
+        return PostgresRegistryStore(
+            url,
+            max_size=int(os.getenv("SEBI_REGISTRY_DB_POOL_SIZE", "10")),
+            similarity_threshold=float(os.getenv("SEBI_REGISTRY_DB_TRGM_THRESHOLD", "0.3")),
+        )
+    if url.startswith("sqlite:///"):
+        return SQLiteRegistryStore(url[len("sqlite:///"):], pool_size=int(os.getenv("SEBI_REGISTRY_DB_POOL_SIZE", "4")))
+    raise ValueError(f"Unsupported registry database URL: {url}")
+
+
+class DatabaseRegistry:
+    """
+    Synchronous registry lookups against a RegistryStore, with the same result
+    shapes as the in-process RegistrySnapshot
+    """
+
+    def __init__(self, store: RegistryStore, timeout_s: float = 2.0, max_candidates: int = 128,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        self.store = store
+        self.timeout_s = timeout_s
+        self.max_candidates = max_candidates
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(failure_threshold=3, reset_timeout_s=30)
+        self._start_loop()
+        self._record_count: Optional[int] = None
+        self._record_count_at = 0.0
+        self._stats = {"queries": 0, "errors": 0, "rejected": 0}
+
+    def _start_loop(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="registry-db", daemon=True)
+        self._thread.start()
+        self._connect_lock = asyncio.Lock()
+        self._connected = False
+
+    def reset_after_fork(self):
+        """
+        Give a forked worker its own event-loop thread (threads do not survive fork).
+        Connections inherited from the parent are abandoned, never shared, and the
+        store reconnects on the next query.
+        """
+        self._start_loop()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'DatabaseRegistry':
+        return cls(create_store(url), **kwargs)
+
+    def available(self) -> bool:
+        return not self.circuit_breaker.is_open()
+
+    async def _ensure_connected(self):
+        async with self._connect_lock:
+            if not self._connected:
+                await self.store.connect()
+                self._connected = True
+
+    async def _call(self, method: str, *args):
+        await self._ensure_connected()
+        return await getattr(self.store, method)(*args)
+
+    def _run(self, method: str, *args, timeout: Optional[float] = None):
+        if self._loop.is_closed():
+            raise RegistryStoreError("Registry database is closed")
+        try:
+            self.circuit_breaker.before_call()
+        except Exception as e:
+            self._stats["rejected"] += 1
+            raise RegistryStoreError(str(e)) from e
+        self._stats["queries"] += 1
+        future = None
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._call(method, *args), self._loop)
+            result = future.result(timeout if timeout is not None else self.timeout_s)
+        except Exception as e:
+            if future is not None:
+                future.cancel()
+            self._stats["errors"] += 1
+            self.circuit_breaker.record_failure()
+            raise RegistryStoreError(f"Registry database {method} failed: {e!r}") from e
+        self.circuit_breaker.record_success()
+        return result
+
+    def load(self, records: Sequence[Dict[str, Any]], source: str = "", timeout: float = 600.0):
+        self._run("load", records, source, timeout=timeout)
+        self._record_count = None
+
+    def record_count(self) -> int:
+        # The count only changes when the registry is reloaded; re-read it once a minute
+        if self._record_count is None or time.monotonic() - self._record_count_at > 60:
+            meta = self._run("get_meta")
+            self._record_count = int(meta.get("record_count", 0))
+            self._record_count_at = time.monotonic()
+        return self._record_count
+
+    def find_by_registration(self, registration_number: str) -> Optional[Dict[str, Any]]:
+        canonical = normalize_registration(registration_number)
+        if not canonical:
+            return None
+        return self._run("find_registration", canonical)
+
+    def find_by_name(self, advisor_name: str, threshold: float, limit: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        Trigram candidates from the database, scored with the same difflib ratio as the in-process index
+        """
+        normalized = normalize_name(advisor_name)
+        if not normalized:
+            return []
+        # Without a limit every candidate is scored, not only the most promising ones
+        candidates = self._run("name_candidates", normalized, self.max_candidates if limit is not None else None)
+
+        low, high = length_bounds(len(normalized), threshold)
+        # Same argument order as TrigramIndex.search: query first, candidate second
+        matcher = SequenceMatcher(None)
+        matcher.set_seq1(normalized)
+        best: Dict[int, Tuple[int, float]] = {}
+        for position, field_position, candidate in candidates:
+            if not low <= len(candidate) <= high:
+                continue
+            matcher.set_seq2(candidate)
+            if matcher.quick_ratio() < threshold:
+                continue
+            similarity = matcher.ratio()
+            if similarity < threshold:
+                continue
+            current = best.get(position)
+            if current is None or field_position < current[0]:
+                best[position] = (field_position, similarity)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        if not ranked:
+            return []
+        records = self._run("fetch_records", [position for position, _ in ranked])
+        matches = []
+        for position, (field_position, similarity) in ranked:
+            if position not in records:
+                continue
+            match = records[position]
+            match['similarity_score'] = similarity
+            match['matched_field'] = NAME_FIELDS[field_position]
+            matches.append(match)
+        return matches
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        if self._connected:
+            asyncio.run_coroutine_threadsafe(self.store.close(), self._loop).result(self.timeout_s)
+            self._connected = False
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.store).__name__,
+            "connected": self._connected,
+            "record_count": self._record_count,
+            "circuit_breaker": self.circuit_breaker.get_metrics(),
+            **self._stats,
+        }
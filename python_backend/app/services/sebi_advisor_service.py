@@ -1,42 +1,340 @@
 import json
+import logging
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import heapq
 from difflib import SequenceMatcher
+from .registry_store import DatabaseRegistry, RegistryStoreError
+from ..utils.registry_format import RegistryFormatError, open_registry
+from ..utils.registry_tables import (
+    NAME_FIELDS,
+    REGISTRATION_FIELDS,
+    NameTables,
+    PreparedQuery,
+    build_registration_index,
+    lookup_registration,
+    normalize_name,
+)
+
+logger = logging.getLogger(__name__)
+
+class RegistrySnapshot:
+    """
+    One version of the advisor registry: the records plus every index built from them.
+    Snapshots are never modified; a reload builds a new one and swaps the service's reference,
+    so a query that took a snapshot keeps using it until it finishes.
+    """
+    
+    def __init__(
+        self,
+        advisor_data,
+        registration_index,
+        name_tables: NameTables,
+        version: int = 0,
+        storage: str = "none",
+        source: Optional[Path] = None,
+        fingerprint: Tuple = (),
+        build_seconds: float = 0.0,
+        compiled=None,
+    ):
+        self.advisor_data = advisor_data
+        # canonical registration number -> record index
+        self.registration_index = registration_index
+        # Precomputed normalized names, tokens, phonetic keys and trigram index for every name field
+        self.name_tables = name_tables
+        self.version = version
+        self.storage = storage
+        self.source = source
+        self.fingerprint = fingerprint
+        self.build_seconds = build_seconds
+        self.compiled = compiled
+        self.loaded_at = time.time()
+    
+    @classmethod
+    def empty(cls, version: int = 0, fingerprint: Tuple = ()) -> 'RegistrySnapshot':
+        return cls([], {}, NameTables(NAME_FIELDS), version=version, fingerprint=fingerprint)
+    
+    def record_count(self) -> int:
+        return len(self.advisor_data)
+    
+    def find_by_registration(self, registration_number: str) -> Optional[Dict]:
+        position = lookup_registration(registration_number, self.registration_index)
+        return self.advisor_data[position] if position is not None else None
+    
+    def find_by_name(self, advisor_name: str, threshold: float, limit: Optional[int]) -> List[Dict]:
+        # Query-side work only: the registry side was normalized and indexed at load time.
+        # Without a limit every candidate is scored, not only the most promising ones.
+        ranked = self.name_tables.search(PreparedQuery(advisor_name), threshold, exhaustive=limit is None)
+        rank_key = lambda item: (-item[0], item[1])
+        if limit is not None:
+            ranked = heapq.nsmallest(limit, ranked, key=rank_key)
+        else:
+            ranked.sort(key=rank_key)
+        
+        matches = []
+        for similarity, position, field_position in ranked:
+            match = self.advisor_data[position].copy()
+            match['similarity_score'] = similarity
+            match['matched_field'] = NAME_FIELDS[field_position]
+            matches.append(match)
+        return matches
+    
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "storage": self.storage,
+            "source": str(self.source) if self.source else None,
+            "total_advisors": len(self.advisor_data),
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.loaded_at)),
+            "build_seconds": round(self.build_seconds, 3),
+            "compiled_registry": self.compiled.get_stats() if self.compiled is not None else None,
+        }
 
 class SEBIAdvisorService:
-    def __init__(self):
-        self.advisor_data = []
-        self.data_file = Path(__file__).parent.parent / "data" / "sebi_advisors.json"
-        self.load_advisor_data()
+    def __init__(
+        self,
+        data_file: Optional[Path] = None,
+        registry_file: Optional[Path] = None,
+        database: Optional[DatabaseRegistry] = None,
+    ):
+        self.data_file = Path(data_file) if data_file else Path(__file__).parent.parent / "data" / "sebi_advisors.json"
+        # Compiled by scripts/build_registry.py; memory-mapped instead of parsing the JSON
+        if registry_file is None:
+            registry_file = os.getenv("SEBI_REGISTRY_FILE") if data_file is None else None
+        self.registry_file = Path(registry_file) if registry_file else self.data_file.with_suffix(".reg")
+        self.watch_interval = float(os.getenv("SEBI_REGISTRY_POLL_S", "30"))
+        self._snapshot = RegistrySnapshot.empty()
+        # Serializes reloads only; readers never take it
+        self._reload_lock = threading.Lock()
+        self._failed_fingerprint: Optional[Tuple] = None
+        self._reload_listeners: List[Callable[[RegistrySnapshot], None]] = []
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        self._reload_stats = {"reloads": 0, "failed_reloads": 0, "last_error": None, "last_checked_at": None}
+        # Shared registry database (SEBI_REGISTRY_DATABASE_URL); the in-process snapshot is then
+        # only loaded the first time the database is unavailable
+        if database is None and data_file is None and os.getenv("SEBI_REGISTRY_DATABASE_URL"):
+            database = DatabaseRegistry.from_url(
+                os.environ["SEBI_REGISTRY_DATABASE_URL"],
+                timeout_s=float(os.getenv("SEBI_REGISTRY_DB_TIMEOUT_S", "2")),
+            )
+        self.database = database
+        self._local_loaded = False
+        self._fallbacks = 0
+        if self.database is None:
+            self.load_advisor_data()
+    
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        return self._snapshot
+    
+    @property
+    def advisor_data(self):
+        return self._snapshot.advisor_data
     
     def load_advisor_data(self):
         """
-        Load advisor data from JSON file
+        Load advisor data, preferring the compiled registry file when it is up to date
         """
+        fingerprint = self._source_fingerprint()
         try:
-            if self.data_file.exists():
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.advisor_data = json.load(f)
-                print(f"Loaded {len(self.advisor_data)} advisor records")
-            else:
-                print(f"Advisor data file not found: {self.data_file}")
-                print("Run fetch_sebi_advisors.py first to download advisor data")
+            snapshot = self._build_snapshot(self._snapshot.version + 1, fingerprint)
         except Exception as e:
-            print(f"Error loading advisor data: {e}")
-            self.advisor_data = []
+            logger.error(f"Error loading advisor data: {e}")
+            snapshot = RegistrySnapshot.empty(self._snapshot.version + 1, fingerprint)
+        self._snapshot = snapshot
+        self._local_loaded = True
+    
+    def _local_snapshot(self) -> RegistrySnapshot:
+        """
+        The in-process registry, loaded on first use when the database is the primary store
+        """
+        if not self._local_loaded:
+            with self._reload_lock:
+                if not self._local_loaded:
+                    logger.info("Loading in-process advisor registry as database fallback")
+                    self.load_advisor_data()
+        return self._snapshot
+    
+    def _query(self, snapshot: Optional[RegistrySnapshot], lookup: Callable[[Any], Any]):
+        """
+        Run lookup(source) against the registry database, or against the in-process
+        snapshot when one is given or the database is unavailable
+        """
+        if snapshot is None and self.database is not None and self.database.available():
+            try:
+                return lookup(self.database)
+            except RegistryStoreError as e:
+                self._fallbacks += 1
+                logger.warning(f"Registry database unavailable, using in-process registry: {e}")
+        return lookup(snapshot if snapshot is not None else self._local_snapshot())
+    
+    def _source_fingerprint(self) -> Tuple:
+        """
+        (path, mtime, size) of the registry inputs; a change means a new snapshot is available
+        """
+        fingerprint = []
+        for path in (self.data_file, self.registry_file):
+            try:
+                stat = path.stat()
+                fingerprint.append((str(path), stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprint.append((str(path), None, None))
+        return tuple(fingerprint)
+    
+    def _build_snapshot(self, version: int, fingerprint: Tuple) -> RegistrySnapshot:
+        """
+        Load the registry and build its indexes without touching the active snapshot
+        """
+        started = time.perf_counter()
+        compiled = self._open_compiled_registry()
+        if compiled is not None:
+            logger.info(f"Mapped {len(compiled.records)} advisor records from {self.registry_file}")
+            return RegistrySnapshot(
+                compiled.records,
+                compiled.registration_index,
+                compiled.name_tables,
+                version=version,
+                storage="mmap",
+                source=self.registry_file,
+                fingerprint=fingerprint,
+                build_seconds=time.perf_counter() - started,
+                compiled=compiled,
+            )
+        
+        if not self.data_file.exists():
+            logger.warning(f"Advisor data file not found: {self.data_file} "
+                           f"(run fetch_sebi_advisors.py first to download advisor data)")
+            return RegistrySnapshot.empty(version, fingerprint)
+        
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            advisor_data = json.load(f)
+        if not isinstance(advisor_data, list):
+            raise ValueError(f"Expected a list of advisor records in {self.data_file}")
+        logger.info(f"Loaded {len(advisor_data)} advisor records")
+        registration_index = build_registration_index(advisor_data, REGISTRATION_FIELDS)
+        return RegistrySnapshot(
+            advisor_data,
+            registration_index,
+            NameTables.build(advisor_data, NAME_FIELDS),
+            version=version,
+            storage="json",
+            source=self.data_file,
+            fingerprint=fingerprint,
+            build_seconds=time.perf_counter() - started,
+        )
+    
+    def _open_compiled_registry(self):
+        """
+        Memory-map the compiled registry. Skipped (None, JSON is used) when the file is
+        missing, unreadable, built for other fields, or older than the JSON file.
+        """
+        if not self.registry_file.exists():
+            return None
+        try:
+            compiled = open_registry(self.registry_file)
+        except RegistryFormatError as e:
+            logger.warning(f"Ignoring compiled registry: {e}")
+            return None
+        
+        meta = compiled.meta
+        if meta.get("name_fields") != NAME_FIELDS or meta.get("registration_fields") != REGISTRATION_FIELDS:
+            logger.warning(f"Ignoring compiled registry built for different fields: {self.registry_file}")
+            return None
+        if self.data_file.exists() and not compiled.matches_source(self.data_file):
+            logger.warning(f"Compiled registry is out of date, run scripts/build_registry.py: {self.registry_file}")
+            return None
+        return compiled
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Build a new snapshot if the registry files changed (or force) and swap it in.
+        Returns True when a new snapshot became active. On failure the current
+        snapshot stays active and the error is reported in get_reload_status().
+        """
+        if not self._local_loaded and not force:
+            # Registry served from the database; nothing in process to refresh
+            return False
+        with self._reload_lock:
+            fingerprint = self._source_fingerprint()
+            self._reload_stats["last_checked_at"] = time.time()
+            if not force and fingerprint in (self._snapshot.fingerprint, self._failed_fingerprint):
+                return False
+            try:
+                snapshot = self._build_snapshot(self._snapshot.version + 1, fingerprint)
+            except Exception as e:
+                # Not retried until the files change again (e.g. a writer finishes the file)
+                self._failed_fingerprint = fingerprint
+                self._reload_stats["failed_reloads"] += 1
+                self._reload_stats["last_error"] = str(e)
+                logger.error(f"Registry reload failed, keeping snapshot v{self._snapshot.version}: {e}")
+                return False
+            # A single reference assignment: queries see either the old or the new snapshot
+            self._snapshot = snapshot
+            self._local_loaded = True
+            self._reload_stats["reloads"] += 1
+            self._reload_stats["last_error"] = None
+        logger.info(f"Registry snapshot v{snapshot.version} active ({len(snapshot.advisor_data)} records)")
+        for listener in list(self._reload_listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Registry reload listener failed: {e}")
+        return True
+    
+    def add_reload_listener(self, listener: Callable[[RegistrySnapshot], None]):
+        """
+        Call listener(snapshot) after every swap, e.g. to drop results derived from the old registry
+        """
+        self._reload_listeners.append(listener)
+    
+    def remove_reload_listener(self, listener: Callable[[RegistrySnapshot], None]):
+        if listener in self._reload_listeners:
+            self._reload_listeners.remove(listener)
+    
+    def start_watching(self, interval_s: Optional[float] = None):
+        """
+        Poll the registry files in a background thread and hot-swap new snapshots
+        """
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        if interval_s is not None:
+            self.watch_interval = interval_s
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(target=self._watch_loop, name="sebi-registry-watcher", daemon=True)
+        self._watch_thread.start()
+    
+    def stop_watching(self):
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+    
+    def _watch_loop(self):
+        while not self._watch_stop.wait(self.watch_interval):
+            self.reload()
+    
+    def get_reload_status(self) -> Dict[str, Any]:
+        last_checked = self._reload_stats["last_checked_at"]
+        return {
+            "snapshot": self._snapshot.get_info(),
+            "watching": self._watch_thread is not None and self._watch_thread.is_alive(),
+            "poll_interval_s": self.watch_interval,
+            "reloads": self._reload_stats["reloads"],
+            "failed_reloads": self._reload_stats["failed_reloads"],
+            "last_error": self._reload_stats["last_error"],
+            "last_checked_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(last_checked)) if last_checked else None,
+            "database": self.database.get_stats() if self.database is not None else None,
+        }
     
     def normalize_name(self, name: str) -> str:
         """
         Normalize name for comparison
         """
-        if not name:
-            return ""
-        # Remove extra spaces, convert to lowercase, remove special characters
-        normalized = re.sub(r'[^\w\s]', '', name.lower().strip())
-        normalized = ' '.join(normalized.split())
-        return normalized
+        return normalize_name(name)
     
     def calculate_similarity(self, str1: str, str2: str) -> float:
         """
@@ -44,61 +342,42 @@ class SEBIAdvisorService:
         """
         return SequenceMatcher(None, str1, str2).ratio()
     
-    def search_advisor_by_name(self, advisor_name: str, threshold: float = 0.8) -> List[Dict]:
+    def search_advisor_by_name(
+        self,
+        advisor_name: str,
+        threshold: float = 0.8,
+        limit: Optional[int] = None,
+        snapshot: Optional[RegistrySnapshot] = None,
+    ) -> List[Dict]:
         """
-        Search for advisor by name with fuzzy matching
+        Search for advisor by name with fuzzy matching.
+        Candidates come from the precomputed name tables; only the best `limit` matches are
+        copied and returned, highest similarity first. With limit=None the candidate caps,
+        postings budget and block-size filter are all lifted and every match is returned.
         """
-        if not advisor_name or not self.advisor_data:
+        if not advisor_name:
             return []
-        
-        normalized_search = self.normalize_name(advisor_name)
-        matches = []
-        
-        for advisor in self.advisor_data:
-            # Check various name fields that might exist in SEBI data
-            name_fields = ['name', 'advisorName', 'entityName', 'companyName', 'firmName']
-            
-            for field in name_fields:
-                if field in advisor and advisor[field]:
-                    normalized_advisor_name = self.normalize_name(advisor[field])
-                    similarity = self.calculate_similarity(normalized_search, normalized_advisor_name)
-                    
-                    if similarity >= threshold:
-                        match = advisor.copy()
-                        match['similarity_score'] = similarity
-                        match['matched_field'] = field
-                        matches.append(match)
-                        break
-        
-        # Sort by similarity score (highest first)
-        matches.sort(key=lambda x: x.get('similarity_score', 0), reverse=True)
-        return matches
+        return self._query(snapshot, lambda source: source.find_by_name(advisor_name, threshold, limit))
     
-    def search_advisor_by_registration(self, registration_number: str) -> Optional[Dict]:
+    def search_advisor_by_registration(
+        self, registration_number: str, snapshot: Optional[RegistrySnapshot] = None
+    ) -> Optional[Dict]:
         """
-        Search for advisor by registration number (exact match)
+        Search for advisor by registration number (exact match on the canonical form:
+        separators, whitespace and case ignored)
         """
-        if not registration_number or not self.advisor_data:
+        if not registration_number:
             return None
-        
-        # Clean the registration number
-        clean_reg = registration_number.strip().upper()
-        
-        for advisor in self.advisor_data:
-            # Check various registration fields
-            reg_fields = ['registrationNumber', 'regNo', 'licenseId', 'sebiRegNo']
-            
-            for field in reg_fields:
-                if field in advisor and advisor[field]:
-                    if advisor[field].strip().upper() == clean_reg:
-                        return advisor
-        
-        return None
+        return self._query(snapshot, lambda source: source.find_by_registration(registration_number))
     
-    def verify_advisor(self, advisor_info: Dict[str, Any]) -> Dict[str, Any]:
+    def verify_advisor(self, advisor_info: Dict[str, Any], snapshot: Optional[RegistrySnapshot] = None) -> Dict[str, Any]:
         """
         Verify advisor against SEBI database
         """
+        # Every lookup below uses the same source (one snapshot, even if a reload swaps in a new one meanwhile)
+        return self._query(snapshot, lambda source: self._verify(advisor_info, source))
+    
+    def _verify(self, advisor_info: Dict[str, Any], source) -> Dict[str, Any]:
         result = {
             "status": "not_found",
             "isRegistered": False,
@@ -110,7 +389,7 @@ class SEBIAdvisorService:
             "details": None
         }
         
-        if not self.advisor_data:
+        if not source.record_count():
             result["status"] = "error"
             result["warnings"].append("SEBI advisor database not available")
             result["recommendations"].append("Manual verification required")
@@ -119,7 +398,7 @@ class SEBIAdvisorService:
         # Try to find by registration number first (most reliable)
         registration_number = advisor_info.get('registrationNumber') or advisor_info.get('licenseId')
         if registration_number:
-            exact_match = self.search_advisor_by_registration(registration_number)
+            exact_match = source.find_by_registration(registration_number)
             if exact_match:
                 # Check advisor status and verification
                 status = exact_match.get('status', '').lower()
@@ -155,8 +434,8 @@ class SEBIAdvisorService:
         # Try to find by name
         advisor_name = advisor_info.get('name') or advisor_info.get('advisorName')
         if advisor_name:
-            name_matches = self.search_advisor_by_name(advisor_name, threshold=0.7)
-            result["matches"] = name_matches[:5]  # Top 5 matches
+            name_matches = source.find_by_name(advisor_name, threshold=0.7, limit=5)
+            result["matches"] = name_matches  # Top 5 matches
             
             if name_matches:
                 best_match = name_matches[0]
@@ -210,12 +489,55 @@ class SEBIAdvisorService:
         
         return result
     
+    def verify_advisors(self, advisor_infos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Verify many advisors in one pass against a single registry snapshot (results in input order)
+        """
+        snapshot = self._snapshot if self.database is None else None
+        return [self.verify_advisor(advisor_info, snapshot) for advisor_info in advisor_infos]
+    
+    def reset_after_fork(self):
+        """
+        Re-create the per-process state in a forked worker; the snapshot itself stays
+        shared with the parent copy-on-write
+        """
+        self._reload_lock = threading.Lock()
+        self._watch_thread = None
+        self._watch_stop = threading.Event()
+        if self.database is not None:
+            self.database.reset_after_fork()
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the advisor database
         """
+        snapshot = self._snapshot
         return {
-            "total_advisors": len(self.advisor_data),
+            "total_advisors": len(snapshot.advisor_data),
+            "indexed_registration_numbers": len(snapshot.registration_index),
+            "name_index": snapshot.name_tables.get_stats(),
             "data_file_exists": self.data_file.exists(),
-            "data_file_path": str(self.data_file)
+            "data_file_path": str(self.data_file),
+            "storage": snapshot.storage,
+            "snapshot_version": snapshot.version,
+            "compiled_registry": snapshot.compiled.get_stats() if snapshot.compiled is not None else None,
+            "database": self.database.get_stats() if self.database is not None else None,
+            "database_fallbacks": self._fallbacks,
         }
+
+
+_shared_service: Optional[SEBIAdvisorService] = None
+_shared_service_lock = threading.Lock()
+
+
+def get_sebi_advisor_service() -> SEBIAdvisorService:
+    """
+    The shared registry instance, loaded on first use (not at import, so importing
+    this module never reads the registry files)
+    """
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = SEBIAdvisorService()
+    return _shared_service
@@ -0,0 +1,379 @@
+"""
+HTTP response cache for SEBI website pages.
+Pages such as intermediaries.html change rarely, so responses are kept in an
+in-memory tier backed by an on-disk tier and revalidated with conditional
+requests (ETag / Last-Modified) once they go stale. Only the pre-extracted
+lowercase page text and anchors are stored, never the raw HTML, so callers
+do not have to parse a page they have already seen. The disk tier is swept
+every few writes: entries expired for longer than the retention period are
+removed, then the soonest-expiring ones until it is within its entry and
+size limits.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import requests
+
+from ..utils.html_extraction import ExtractedContent, get_extractor, tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / ".cache" / "sebi_http"
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str  # lowercase page text
+    links: List[Dict[str, str]] = field(default_factory=list)  # [{'href': ..., 'text': ...}]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+    expires_at: float = 0.0
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) < self.expires_at
+
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    @property
+    def tokens(self) -> FrozenSet[str]:
+        # Derived lazily and kept off the dataclass fields so it is never written to disk
+        tokens = self.__dict__.get('_tokens')
+        if tokens is None:
+            tokens = self.__dict__['_tokens'] = tokenize(self.text)
+        return tokens
+
+
+def parse_cache_control(header: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Parse a Cache-Control header into a directive -> value mapping
+    """
+    directives: Dict[str, Optional[str]] = {}
+    if not header:
+        return directives
+    for part in header.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '=' in part:
+            key, value = part.split('=', 1)
+            directives[key.strip().lower()] = value.strip().strip('"')
+        else:
+            directives[part.lower()] = None
+    return directives
+
+
+class SEBIHttpCache:
+    """
+    Two-tier (memory + disk) HTTP cache honoring Cache-Control with
+    conditional revalidation.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_memory_entries: int = 256,
+        default_ttl: float = 3600.0,
+        extractor: Optional[Callable[[str], ExtractedContent]] = None,
+        max_disk_entries: Optional[int] = None,
+        max_disk_bytes: Optional[int] = None,
+        disk_retention_s: Optional[float] = None,
+        sweep_every: int = 100,
+    ):
+        self.cache_dir = Path(cache_dir or os.getenv("SEBI_HTTP_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        self.max_memory_entries = max_memory_entries
+        self.default_ttl = default_ttl
+        self.max_disk_entries = max_disk_entries or int(os.getenv("SEBI_HTTP_CACHE_MAX_DISK_ENTRIES", "5000"))
+        self.max_disk_bytes = max_disk_bytes or int(os.getenv("SEBI_HTTP_CACHE_MAX_DISK_MB", "256")) * 1024 * 1024
+        # Expired entries stay on disk this long for revalidation and stale_if_error
+        self.disk_retention_s = (
+            disk_retention_s if disk_retention_s is not None
+            else float(os.getenv("SEBI_HTTP_CACHE_DISK_RETENTION_S", "86400"))
+        )
+        self.sweep_every = sweep_every
+        self._writes_since_sweep = sweep_every  # sweep on the first write
+        self.extractor = extractor or get_extractor()
+        self._memory: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "stores": 0,
+            "uncacheable": 0,
+            "errors": 0,
+            "stale_served": 0,
+            "disk_evictions": 0,
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"HTTP cache disk tier disabled, cannot create {self.cache_dir}: {e}")
+            self.cache_dir = None
+
+    def fetch(
+        self,
+        session: requests.Session,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = 10,
+        stale_if_error: bool = False,
+    ) -> Optional[CachedPage]:
+        """
+        Return the cached page for url, fetching or revalidating it if needed.
+        Returns None when the server does not answer with 200. With stale_if_error,
+        a stale entry is returned instead of raising when the request fails.
+        """
+        key_url = requests.Request('GET', url, params=params).prepare().url
+        key = hashlib.sha256(key_url.encode('utf-8')).hexdigest()
+        self._count("requests")
+
+        entry, tier = self._lookup(key)
+        if entry and entry.is_fresh():
+            self._count(tier)
+            return entry
+
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except Exception:
+            self._count("errors")
+            if entry and stale_if_error:
+                self._count("stale_served")
+                return entry
+            raise
+
+        if response.status_code == 304 and entry:
+            cacheable, expires_at = self._freshness(response.headers)
+            entry.fetched_at = time.time()
+            entry.expires_at = expires_at
+            entry.etag = response.headers.get('ETag', entry.etag)
+            entry.last_modified = response.headers.get('Last-Modified', entry.last_modified)
+            self._count("revalidated")
+            if cacheable:
+                self._store(key, entry)
+            return entry
+
+        self._count("misses")
+        if response.status_code != 200:
+            return None
+
+        text, links = self.extractor(response.text)
+        cacheable, expires_at = self._freshness(response.headers)
+        page = CachedPage(
+            url=key_url,
+            text=text,
+            links=links,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            fetched_at=time.time(),
+            expires_at=expires_at,
+        )
+        if cacheable:
+            self._store(key, page)
+        else:
+            self._count("uncacheable")
+        return page
+
+    def _freshness(self, headers) -> Tuple[bool, float]:
+        """
+        Work out whether a response may be stored and until when it is fresh
+        """
+        now = time.time()
+        directives = parse_cache_control(headers.get('Cache-Control'))
+        if 'no-store' in directives:
+            return False, 0.0
+        if 'no-cache' in directives:
+            return True, 0.0
+
+        max_age = directives.get('s-maxage') or directives.get('max-age')
+        if max_age is not None:
+            try:
+                age = float(headers.get('Age') or 0)
+                return True, now + max(0.0, float(max_age) - age)
+            except ValueError:
+                pass
+
+        expires = headers.get('Expires')
+        if expires:
+            try:
+                return True, parsedate_to_datetime(expires).timestamp()
+            except (TypeError, ValueError):
+                return True, 0.0
+
+        # Heuristic freshness: 10% of the time since last modification
+        last_modified = headers.get('Last-Modified')
+        if last_modified:
+            try:
+                modified_age = now - parsedate_to_datetime(last_modified).timestamp()
+                return True, now + min(self.default_ttl, max(0.0, modified_age * 0.1))
+            except (TypeError, ValueError):
+                pass
+
+        return True, now + self.default_ttl
+
+    def _lookup(self, key: str) -> Tuple[Optional[CachedPage], str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                self._memory.move_to_end(key)
+                return entry, "memory_hits"
+
+        entry = self._read_disk(key)
+        if entry:
+            self._remember(key, entry)
+        return entry, "disk_hits"
+
+    def _store(self, key: str, page: CachedPage):
+        self._remember(key, page)
+        self._write_disk(key, page)
+        self._count("stores")
+
+    def _remember(self, key: str, page: CachedPage):
+        with self._lock:
+            self._memory[key] = page
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[CachedPage]:
+        if not self.cache_dir:
+            return None
+        path = self.cache_dir / f"{key}.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return CachedPage(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable HTTP cache entry {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, page: CachedPage):
+        if not self.cache_dir:
+            return
+        path = self.cache_dir / f"{key}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(asdict(page), f, ensure_ascii=False, separators=(',', ':'))
+            # The file's mtime records when the entry expires, so sweeps need not open it
+            expires_at = max(page.expires_at, page.fetched_at)
+            os.utime(tmp_path, (expires_at, expires_at))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write HTTP cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            self._writes_since_sweep += 1
+            due = self._writes_since_sweep >= self.sweep_every
+            if due:
+                self._writes_since_sweep = 0
+        if due:
+            self.sweep_disk()
+
+    def sweep_disk(self, now: Optional[float] = None) -> int:
+        """
+        Remove disk entries expired for longer than disk_retention_s, then the
+        soonest-expiring ones until the tier is within max_disk_entries and
+        max_disk_bytes. Returns the number of files removed.
+        """
+        if not self.cache_dir:
+            return 0
+        now = now if now is not None else time.time()
+        entries = []  # (expires_at, size, path)
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith(".json"):
+                        continue
+                    try:
+                        stat = dir_entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        except OSError as e:
+            logger.warning(f"Failed to sweep HTTP cache directory {self.cache_dir}: {e}")
+            return 0
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        for expires_at, size, path in entries:
+            remaining = len(entries) - removed
+            if (expires_at >= now - self.disk_retention_s
+                    and remaining <= self.max_disk_entries and total_bytes <= self.max_disk_bytes):
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to remove HTTP cache entry {path}: {e}")
+                continue
+            removed += 1
+            total_bytes -= size
+
+        if removed:
+            with self._lock:
+                self._stats["disk_evictions"] += removed
+        return removed
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def clear(self):
+        """
+        Drop every entry from both tiers
+        """
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir:
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get cache statistics including hit ratios
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            memory_entries = len(self._memory)
+        requests_total = stats["requests"] or 1
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        return {
+            **stats,
+            "memory_entries": memory_entries,
+            "hit_ratio": hits / requests_total,
+            # Revalidated responses cost a round trip but no transfer or parsing
+            "effective_hit_ratio": (hits + stats["revalidated"]) / requests_total,
+            "disk_tier": str(self.cache_dir) if self.cache_dir else None,
+        }
+
+
+# Shared cache used by every SEBILiveVerificationService instance
+sebi_http_cache = SEBIHttpCache()
@@ -5,18 +5,97 @@ instead of maintaining a local database.
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import re
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FuturesTimeout, wait
 from typing import Dict, Any, Optional
 import time
 from urllib.parse import urljoin, quote
 import logging
+from .sebi_advisor_service import SEBIAdvisorService, get_sebi_advisor_service
+from .sebi_http_cache import CachedPage, SEBIHttpCache, sebi_http_cache
+from ..utils.adaptive_limiter import AdaptiveConcurrencyLimiter, CircuitBreaker, CircuitOpenError
+from ..utils.deadline import Deadline, DeadlineExceeded
+from ..utils.html_extraction import name_matches_tokens
+from ..utils.request_profiling import bind, stage
 
 logger = logging.getLogger(__name__)
 
+# All outbound traffic goes to the same upstream, so every service instance shares these
+sebi_upstream_limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=int(os.getenv("SEBI_INITIAL_CONCURRENCY", "4")),
+    max_limit=int(os.getenv("SEBI_MAX_CONCURRENCY", "32")),
+    latency_target_s=float(os.getenv("SEBI_LATENCY_TARGET_S", "2.0")),
+)
+sebi_circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("SEBI_CIRCUIT_FAILURES", "5")),
+    reset_timeout_s=float(os.getenv("SEBI_CIRCUIT_RESET_S", "30")),
+)
+
+class _GuardedSession:
+    """
+    Session wrapper routing every outbound request through the AIMD limiter and circuit breaker
+    """
+    def __init__(self, session: requests.Session, limiter: AdaptiveConcurrencyLimiter,
+                 breaker: CircuitBreaker, max_queue_wait: float, min_failure_timeout: Optional[float] = None):
+        self.session = session
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_queue_wait = max_queue_wait
+        # A request granted at least this long (default: the limiter's latency target) that
+        # still times out means a slow upstream; shorter slices are the tail of our own deadline
+        self.min_failure_timeout = (limiter.latency_target_s if min_failure_timeout is None
+                                    else min_failure_timeout)
+    
+    def get(self, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        started_at = self.limiter.acquire(min(self.max_queue_wait, timeout or self.max_queue_wait))
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.limiter.release(started_at, None)
+            raise
+        
+        # None: the call says nothing about the upstream's health
+        upstream_failed: Optional[bool] = None
+        throttled = False
+        try:
+            response = self.session.get(url, timeout=timeout, **kwargs)
+            upstream_failed = response.status_code >= 500
+            throttled = response.status_code == 429
+            return response
+        except requests.Timeout:
+            # Judged by the timeout actually granted: the deadline usually caps it below the
+            # configured request timeout, and a throttling upstream still answers too slowly
+            if timeout is None or timeout >= self.min_failure_timeout:
+                upstream_failed = True
+            raise
+        except requests.ConnectionError:
+            upstream_failed = True
+            raise
+        finally:
+            if upstream_failed is None:
+                self.limiter.release(started_at, None)
+                self.breaker.record_inconclusive()
+            else:
+                # Throttling slows the limiter down but is not an outage
+                self.limiter.release(started_at, not upstream_failed and not throttled)
+                if upstream_failed:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
 class SEBILiveVerificationService:
-    def __init__(self):
-        self.base_url = "https://www.sebi.gov.in"
+    def __init__(
+        self,
+        http_cache: Optional[SEBIHttpCache] = None,
+        registry: Optional[SEBIAdvisorService] = None,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = os.getenv("SEBI_BASE_URL", "https://www.sebi.gov.in").rstrip("/")
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -26,14 +105,41 @@ class SEBILiveVerificationService:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
+        # One keep-alive pool sized for the HTTP executor below (requests defaults to 10 connections)
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self.http_cache = http_cache or sebi_http_cache
+        # Local registry index used when the SEBI website is unavailable
+        self.registry = registry or get_sebi_advisor_service()
+        self.limiter = limiter or sebi_upstream_limiter
+        self.circuit_breaker = circuit_breaker or sebi_circuit_breaker
+        
+        # Latency budget for one verification and per-request limits inside it
+        self.verification_budget = float(os.getenv("SEBI_VERIFY_BUDGET_S", "8"))
+        self.request_timeout = float(os.getenv("SEBI_REQUEST_TIMEOUT_S", "10"))
+        self.guarded_session = _GuardedSession(
+            self.session, self.limiter, self.circuit_breaker,
+            max_queue_wait=float(os.getenv("SEBI_MAX_QUEUE_WAIT_S", "2")),
+            min_failure_timeout=float(os.getenv("SEBI_MIN_FAILURE_TIMEOUT_S", "0")) or None,
+        )
+        # Send a duplicate (hedged) request when the first has not answered after this delay
+        self.hedge_delay = float(os.getenv("SEBI_HEDGE_DELAY_S", "1.5"))
         
-    def verify_advisor_on_sebi_website(self, advisor_info: Dict[str, Any]) -> Dict[str, Any]:
+        # Strategies and HTTP requests use separate pools so hedges never queue behind strategies
+        self._strategy_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sebi-strategy")
+        self._request_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="sebi-http")
+        self._hedge_stats = {"hedges_sent": 0, "hedges_won": 0, "deadline_exceeded": 0}
+        self._hedge_stats_lock = threading.Lock()
+        
+    def verify_advisor_on_sebi_website(self, advisor_info: Dict[str, Any], budget_s: Optional[float] = None) -> Dict[str, Any]:
         """
-        Verify advisor by searching SEBI's official website
+        Verify advisor by searching SEBI's official website within a latency budget.
+        The local fraud-pattern check runs first; the network strategies then run
+        concurrently and the best partial result is returned when the budget runs out.
         """
-        advisor_name = advisor_info.get('name', '').strip()
-        registration_number = advisor_info.get('registrationNumber', '').strip()
-        company_name = advisor_info.get('companyName', '').strip()
+        deadline = Deadline(budget_s if budget_s is not None else self.verification_budget)
+        advisor_name = (advisor_info.get('name') or '').strip()
+        registration_number = (advisor_info.get('registrationNumber') or '').strip()
+        company_name = (advisor_info.get('companyName') or '').strip()
         
         # Initialize result
         result = {
@@ -48,22 +154,14 @@ class SEBILiveVerificationService:
             "verification_method": "live_sebi_search"
         }
         
-        # Strategy 1: Try to find intermediaries page and search there
-        search_results = self._search_intermediaries_page(advisor_name, registration_number, company_name)
-        result["searchAttempts"].append(search_results)
-        
-        if search_results.get("found"):
-            return self._process_found_advisor(search_results, result)
-        
-        # Strategy 2: Try general SEBI site search
-        site_search_results = self._search_sebi_site(advisor_name, registration_number)
-        result["searchAttempts"].append(site_search_results)
-        
-        if site_search_results.get("found"):
-            return self._process_found_advisor(site_search_results, result)
-        
-        # Strategy 3: Check for known fraud patterns
-        fraud_check = self._check_fraud_patterns(advisor_info)
+        # Cheap local check first: known fraud patterns need no network round trip
+        with stage("sebi.fraud_patterns"):
+            fraud_check = self.check_fraud_patterns(advisor_info)
+        result["searchAttempts"].append({
+            "method": "fraud_pattern_check",
+            "found": False,
+            "suspicious": fraud_check.get("is_suspicious", False)
+        })
         if fraud_check.get("is_suspicious"):
             result["status"] = "suspicious"
             result["riskLevel"] = "high"
@@ -71,6 +169,38 @@ class SEBILiveVerificationService:
             result["recommendations"].extend(fraud_check.get("recommendations", []))
             return result
         
+        # Network strategies run concurrently: intermediaries crawl and site search
+        strategies = {
+            "intermediaries_page_search": self._submit_strategy(
+                "sebi.intermediaries_page_search", self._search_intermediaries_page,
+                advisor_name, registration_number, company_name, deadline
+            ),
+            "site_search": self._submit_strategy(
+                "sebi.site_search", self._search_sebi_site, advisor_name, registration_number, deadline
+            ),
+        }
+        with stage("sebi.strategies"):
+            attempts = self._collect_strategy_results(strategies, deadline)
+        result["searchAttempts"].extend(attempts)
+        
+        found = next((attempt for attempt in attempts if attempt.get("found")), None)
+        if found:
+            return self._process_found_advisor(found, result)
+        
+        if any(attempt.get("partial") for attempt in attempts):
+            result["partial"] = True
+            result["warnings"].append(
+                f"SEBI website search incomplete: latency budget of {deadline.budget_s:.1f}s exceeded"
+            )
+        
+        # Upstream unavailable (circuit open or every strategy failed): fail over to the local index
+        if self.circuit_breaker.state != CircuitBreaker.CLOSED or all(attempt.get("error") for attempt in attempts):
+            result["upstreamUnavailable"] = True
+            with stage("sebi.local_registry"):
+                fallback = self._verify_against_local_registry(advisor_info, result)
+            if fallback is not None:
+                return fallback
+        
         # If nothing found, return not found result
         result["warnings"].append("Advisor not found on SEBI official website")
         result["recommendations"].extend([
@@ -82,7 +212,126 @@ class SEBILiveVerificationService:
         
         return result
     
-    def _search_intermediaries_page(self, name: str, reg_number: str, company: str) -> Dict[str, Any]:
+    def _submit_strategy(self, stage_name: str, strategy, *args):
+        """
+        Run a strategy on the strategy pool, as a stage of the current request's profile
+        """
+        def run():
+            with stage(stage_name):
+                return strategy(*args)
+        return self._strategy_executor.submit(bind(run))
+    
+    def _collect_strategy_results(self, strategies: Dict[str, Any], deadline: Deadline) -> list:
+        """
+        Wait for strategy futures until one finds the advisor, all finish or the deadline expires.
+        Strategies still running at the deadline are reported as partial attempts.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = set(strategies.values())
+        
+        while pending and not deadline.expired():
+            done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+            for method, future in strategies.items():
+                if future in done:
+                    try:
+                        results[method] = future.result()
+                    except Exception as e:
+                        results[method] = {"method": method, "found": False, "error": str(e), "details": None}
+            if any(attempt.get("found") for attempt in results.values()):
+                break
+        
+        attempts = []
+        for method, future in strategies.items():
+            if method in results:
+                attempts.append(results[method])
+                continue
+            future.cancel()
+            if not any(attempt.get("found") for attempt in results.values()):
+                self._count("deadline_exceeded")
+            attempts.append({
+                "method": method,
+                "found": False,
+                "error": "deadline_exceeded" if deadline.expired() else "not_completed",
+                "partial": True,
+                "details": None
+            })
+        return attempts
+    
+    def _verify_against_local_registry(self, advisor_info: Dict[str, Any], result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Verify against the local registry index. Returns None when the registry has no answer.
+        """
+        registry_result = self.registry.verify_advisor(advisor_info)
+        found = registry_result.get("status") not in ("not_found", "error", "low_confidence")
+        result["searchAttempts"].append({
+            "method": "local_registry_index",
+            "found": found,
+            "error": None if registry_result.get("status") != "error" else "registry_unavailable"
+        })
+        result["warnings"].append("SEBI website unavailable, checked the local registry snapshot instead")
+        if not found:
+            return None
+        
+        registry_result["searchAttempts"] = result["searchAttempts"]
+        registry_result["warnings"] = result["warnings"] + registry_result.get("warnings", [])
+        registry_result["verification_method"] = "local_registry_fallback"
+        if result.get("partial"):
+            registry_result["partial"] = True
+        registry_result["upstreamUnavailable"] = True
+        return registry_result
+    
+    def _count(self, name: str):
+        # Strategy and request threads update these concurrently
+        with self._hedge_stats_lock:
+            self._hedge_stats[name] += 1
+    
+    def _fetch(self, url: str, deadline: Deadline, params: Optional[Dict[str, Any]] = None) -> Optional[CachedPage]:
+        """
+        Fetch a page through the HTTP cache, bounded by the deadline.
+        If the first request is slow, a hedged duplicate is sent and whichever answers first wins.
+        Stale cached pages are served when the upstream fails or the circuit is open.
+        """
+        with stage("sebi.fetch", url=url, params=params):
+            return self._fetch_hedged(url, deadline, params)
+
+    def _fetch_hedged(self, url: str, deadline: Deadline, params: Optional[Dict[str, Any]]) -> Optional[CachedPage]:
+        primary = self._request_executor.submit(
+            self.http_cache.fetch, self.guarded_session, url, params, deadline.timeout(self.request_timeout), True
+        )
+        try:
+            return primary.result(timeout=min(self.hedge_delay, deadline.timeout()))
+        except FuturesTimeout:
+            pass
+        
+        # Hedging adds load, so only hedge while the upstream has spare capacity
+        if not self.limiter.has_capacity():
+            try:
+                return primary.result(timeout=deadline.timeout())
+            except FuturesTimeout:
+                raise DeadlineExceeded(f"No response from {url} within the latency budget") from None
+        
+        hedge = self._request_executor.submit(
+            self.http_cache.fetch, self.guarded_session, url, params, deadline.timeout(self.request_timeout), True
+        )
+        self._count("hedges_sent")
+        
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=deadline.timeout(), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedges_won")
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        raise DeadlineExceeded(f"No response from {url} within the latency budget")
+    
+    def _search_intermediaries_page(self, name: str, reg_number: str, company: str, deadline: Deadline) -> Dict[str, Any]:
         """
         Search the intermediaries page for advisor information
         """
@@ -96,28 +345,35 @@ class SEBILiveVerificationService:
         try:
             # Try the intermediaries page
             intermediaries_url = f"{self.base_url}/intermediaries.html"
-            response = self.session.get(intermediaries_url, timeout=10)
+            page = self._fetch(intermediaries_url, deadline)
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
+            if page:
                 # Look for research analyst links
-                ra_links = self._find_research_analyst_links(soup)
+                ra_links = self._find_research_analyst_links(page.links)
                 
-                for link in ra_links:
-                    advisor_found = self._search_advisor_page(link, name, reg_number, company)
+                for pages_checked, link in enumerate(ra_links):
+                    if deadline.expired():
+                        search_result["partial"] = True
+                        search_result["error"] = "deadline_exceeded"
+                        search_result["pages_checked"] = pages_checked
+                        return search_result
+                    advisor_found = self._search_advisor_page(link, name, reg_number, company, deadline)
                     if advisor_found.get("found"):
                         search_result["found"] = True
                         search_result["details"] = advisor_found
                         return search_result
                         
+        except DeadlineExceeded as e:
+            search_result["partial"] = True
+            search_result["error"] = "deadline_exceeded"
+            logger.warning(f"Intermediaries page search stopped: {e}")
         except Exception as e:
             search_result["error"] = str(e)
             logger.error(f"Error searching intermediaries page: {e}")
         
         return search_result
     
-    def _search_sebi_site(self, name: str, reg_number: str) -> Dict[str, Any]:
+    def _search_sebi_site(self, name: str, reg_number: str, deadline: Deadline) -> Dict[str, Any]:
         """
         Perform a general site search on SEBI website
         """
@@ -141,13 +397,11 @@ class SEBILiveVerificationService:
                 search_url = f"{self.base_url}/search.html"
                 search_params = {'q': query}
                 
-                response = self.session.get(search_url, params=search_params, timeout=10)
+                page = self._fetch(search_url, deadline, params=search_params)
                 
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
+                if page:
                     # Look for registration-related content
-                    if self._check_page_for_advisor_info(soup, name, reg_number):
+                    if self._check_page_for_advisor_info(page, name, reg_number):
                         search_result["found"] = True
                         search_result["details"] = {
                             "search_query": query,
@@ -155,85 +409,92 @@ class SEBILiveVerificationService:
                         }
                         return search_result
                         
+        except DeadlineExceeded as e:
+            search_result["partial"] = True
+            search_result["error"] = "deadline_exceeded"
+            logger.warning(f"Site search stopped: {e}")
         except Exception as e:
             search_result["error"] = str(e)
             logger.error(f"Error in site search: {e}")
         
         return search_result
     
-    def _find_research_analyst_links(self, soup: BeautifulSoup) -> list:
+    def _find_research_analyst_links(self, links: list) -> list:
         """
-        Find links related to research analysts on the page
+        Find links related to research analysts among the anchors of a page
         """
         ra_links = []
         
-        for link in soup.find_all('a', href=True):
+        for link in links:
             href = link['href']
-            text = link.get_text().lower()
+            text = link['text'].lower()
             
             # Look for research analyst related links
             if any(keyword in text for keyword in ['research analyst', 'intermediary', 'advisor']):
                 full_url = href if href.startswith('http') else urljoin(self.base_url, href)
                 ra_links.append({
                     'url': full_url,
-                    'text': link.get_text().strip()
+                    'text': link['text']
                 })
         
         return ra_links
     
-    def _search_advisor_page(self, link_info: Dict, name: str, reg_number: str, company: str) -> Dict[str, Any]:
+    def _search_advisor_page(self, link_info: Dict, name: str, reg_number: str, company: str, deadline: Deadline) -> Dict[str, Any]:
         """
         Search a specific page for advisor information
         """
         try:
-            response = self.session.get(link_info['url'], timeout=10)
+            page = self._fetch(link_info['url'], deadline)
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                if self._check_page_for_advisor_info(soup, name, reg_number):
+            if page:
+                if self._check_page_for_advisor_info(page, name, reg_number):
                     return {
                         "found": True,
                         "page_url": link_info['url'],
                         "page_title": link_info['text']
                     }
                     
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error searching advisor page {link_info['url']}: {e}")
         
         return {"found": False}
     
-    def _check_page_for_advisor_info(self, soup: BeautifulSoup, name: str, reg_number: str) -> bool:
+    def _check_page_for_advisor_info(self, page: CachedPage, name: str, reg_number: str) -> bool:
         """
-        Check if a page contains the advisor information we're looking for
+        Check if a page contains the advisor information we're looking for.
+        Uses the pre-extracted lowercase text and token set from the HTTP cache.
         """
-        page_text = soup.get_text().lower()
-        
         # Check for registration number
-        if reg_number and reg_number.lower() in page_text:
+        if reg_number and reg_number.lower() in page.text:
             return True
         
-        # Check for name (with some flexibility)
-        if name:
-            name_parts = name.lower().split()
-            if len(name_parts) >= 2:
-                # Check if at least 2 parts of the name are present
-                found_parts = sum(1 for part in name_parts if part in page_text)
-                if found_parts >= 2:
-                    return True
+        # Check for name (with some flexibility): at least 2 parts of the name must be page tokens
+        if name and name_matches_tokens(name, page.tokens):
+            return True
         
         return False
     
-    def _check_fraud_patterns(self, advisor_info: Dict[str, Any]) -> Dict[str, Any]:
+    def check_fraud_patterns(self, advisor_info: Dict[str, Any]) -> Dict[str, Any]:
         """
         Check for known fraud patterns in advisor information
         """
         fraud_indicators = []
         
-        name = advisor_info.get('name', '').lower()
-        company = advisor_info.get('companyName', '').lower()
-        email = advisor_info.get('contactInfo', {}).get('email', '').lower()
-        phone = advisor_info.get('contactInfo', {}).get('phone', '')
+        name = (advisor_info.get('name') or '').lower()
+        company = (advisor_info.get('companyName') or '').lower()
+        contact_info = advisor_info.get('contactInfo') or {}
+        if isinstance(contact_info, str):
+            # The API forwards contact info as a JSON string or free text
+            try:
+                contact_info = json.loads(contact_info)
+            except ValueError:
+                contact_info = {"email": contact_info}
+        if not isinstance(contact_info, dict):
+            contact_info = {}
+        email = str(contact_info.get('email') or '').lower()
+        phone = str(contact_info.get('phone') or '')
         
         # Check for suspicious patterns
         if any(word in name for word in ['fake', 'scam', 'fraud', 'cheat']):
@@ -304,6 +565,30 @@ class SEBILiveVerificationService:
             "last_updated": "Real-time",
             "reliability": "High - directly from SEBI website"
         }
-
-# Initialize the live verification service
-sebi_live_service = SEBILiveVerificationService()
+    
+    def close(self):
+        """
+        Release the HTTP connection pool and the strategy/request threads
+        """
+        self._strategy_executor.shutdown(wait=False, cancel_futures=True)
+        self._request_executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get runtime metrics for outbound SEBI traffic
+        """
+        with self._hedge_stats_lock:
+            hedge_stats = dict(self._hedge_stats)
+        return {
+            "http_cache": self.http_cache.get_metrics(),
+            "upstream": {
+                "limiter": self.limiter.get_metrics(),
+                "circuit_breaker": self.circuit_breaker.get_metrics()
+            },
+            "orchestration": {
+                "verification_budget_s": self.verification_budget,
+                "hedge_delay_s": self.hedge_delay,
+                **hedge_stats
+            }
+        }
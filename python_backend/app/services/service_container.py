@@ -0,0 +1,185 @@
+"""
+Application service container.
+One instance per application, created and warmed up by the FastAPI lifespan
+and reached from the routers through the get_* dependencies below. It owns
+the pooled clients - one Groq client over a single httpx connection pool and
+one SEBI requests.Session - and the services built on them, so every router
+shares the same pools, the registry and the document processor. close()
+stops the background work and releases the pools on shutdown.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import groq
+import httpx
+from fastapi import Request
+
+from .analysis_jobs import AnalysisJobQueue, JobStore
+from .batch_analysis import BatchAnalysisService
+from .batch_verification import BatchVerificationService
+from .groq_service import GroqService
+from .sebi_advisor_service import SEBIAdvisorService, get_sebi_advisor_service
+from .sebi_live_verification import SEBILiveVerificationService
+from .verification_cache import verification_cache
+from ..utils.text_processing import document_processor as default_document_processor
+
+logger = logging.getLogger(__name__)
+
+GROQ_BASE_URL = "https://api.groq.com/v1"
+
+
+def create_llm_client():
+    """
+    Groq client over one pooled httpx client (GROQ_MAX_CONNECTIONS connections, kept alive)
+    """
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY environment variable is not set")
+    max_connections = int(os.getenv("GROQ_MAX_CONNECTIONS", "32"))
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(float(os.getenv("GROQ_TIMEOUT_S", "60")), connect=5.0),
+    )
+    # GROQ_BASE_URL points the client at another endpoint, e.g. the load-test stub
+    return groq.Groq(api_key=api_key, base_url=os.getenv("GROQ_BASE_URL", GROQ_BASE_URL), http_client=http_client)
+
+
+def _job_queue(handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> AnalysisJobQueue:
+    store_path = os.getenv("OFFER_JOB_STORE")
+    return AnalysisJobQueue(
+        handler,
+        workers=int(os.getenv("OFFER_JOB_WORKERS", "4")),
+        max_pending=int(os.getenv("OFFER_JOB_MAX_PENDING", "1000")),
+        ttl_s=float(os.getenv("OFFER_JOB_TTL_S", "3600")),
+        # Uploads must outlive a restart when jobs do, so keep them next to the store
+        spool_dir=Path(os.getenv("OFFER_JOB_SPOOL_DIR")
+                       or (Path(store_path).parent / "offer-job-uploads"
+                           if store_path else Path(tempfile.gettempdir()) / "sebi-analysis-jobs")),
+        store=JobStore(Path(store_path)) if store_path else None,
+    )
+
+
+class ServiceContainer:
+    def __init__(
+        self,
+        job_handler: Optional[Callable[['ServiceContainer', Dict[str, Any]], Awaitable[Dict[str, Any]]]] = None,
+        registry: Optional[SEBIAdvisorService] = None,
+        document_processor=None,
+        llm_client=None,
+        watch_registry: Optional[bool] = None,
+    ):
+        """
+        job_handler(services, payload) runs a queued offer analysis. Anything not passed
+        in is created by start(); a passed-in llm_client is not closed by close().
+        """
+        self.job_handler = job_handler
+        self.registry = registry or get_sebi_advisor_service()
+        self.document_processor = document_processor or default_document_processor
+        self.llm_client = llm_client
+        self._owns_llm_client = llm_client is None
+        self.watch_registry = (os.getenv("SEBI_REGISTRY_WATCH", "1") != "0"
+                               if watch_registry is None else watch_registry)
+        self.verification_cache = verification_cache
+        self.sebi_service: Optional[SEBILiveVerificationService] = None
+        self.groq_service: Optional[GroqService] = None
+        self.batch_analysis: Optional[BatchAnalysisService] = None
+        self.batch_verification: Optional[BatchVerificationService] = None
+        self.analysis_jobs: Optional[AnalysisJobQueue] = None
+        self.started = False
+        self._warm_up_s: Optional[float] = None
+
+    async def start(self, warm_up: bool = True):
+        if self.started:
+            return
+        if self.llm_client is None:
+            self.llm_client = create_llm_client()
+        self.sebi_service = SEBILiveVerificationService(registry=self.registry)
+        self.groq_service = GroqService(client=self.llm_client, sebi_service=self.sebi_service,
+                                        cache=self.verification_cache)
+        self.batch_analysis = BatchAnalysisService(self.groq_service, self.document_processor)
+        self.batch_verification = BatchVerificationService(self.groq_service, self.registry)
+        if self.job_handler is not None:
+            self.analysis_jobs = _job_queue(functools.partial(self.job_handler, self))
+
+        # Cached verifications were computed against the previous registry snapshot
+        self.registry.add_reload_listener(self._on_registry_reload)
+        if warm_up:
+            await asyncio.to_thread(self.warm_up)
+        if self.watch_registry:
+            self.registry.start_watching()
+        if self.analysis_jobs is not None:
+            await self.analysis_jobs.start()
+        self.started = True
+        logger.info("Services started")
+
+    def _on_registry_reload(self, snapshot):
+        self.verification_cache.purge()
+
+    def warm_up(self):
+        """
+        Build the lazily initialized parts before the first request pays for them:
+        spaCy's first pipeline call, the langdetect profiles and the registry index
+        """
+        started = time.perf_counter()
+        self.document_processor.process_texts(["Guaranteed 12% monthly returns, contact our SEBI registered advisor."])
+        if self.registry.database is None:
+            self.registry.search_advisor_by_name("warm up")
+        self._warm_up_s = time.perf_counter() - started
+        logger.info(f"Services warmed up in {self._warm_up_s:.2f}s")
+
+    async def close(self):
+        """
+        Stop the background work, then release the connection pools and thread pools
+        """
+        if self.analysis_jobs is not None:
+            await self.analysis_jobs.stop()
+        self.registry.remove_reload_listener(self._on_registry_reload)
+        self.registry.stop_watching()
+        if self.registry.database is not None:
+            await asyncio.to_thread(self.registry.database.close)
+        if self.sebi_service is not None:
+            self.sebi_service.close()
+        if self.llm_client is not None and self._owns_llm_client:
+            self.llm_client.close()
+        self.started = False
+        logger.info("Services stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "warm_up_s": round(self._warm_up_s, 3) if self._warm_up_s is not None else None,
+            "llm_client": type(self.llm_client).__name__ if self.llm_client is not None else None,
+            "registry": self.registry.snapshot.get_info(),
+            "analysis_jobs": self.analysis_jobs is not None,
+        }
+
+
+def get_services(request: Request) -> ServiceContainer:
+    return request.app.state.services
+
+
+def get_groq_service(request: Request) -> GroqService:
+    return request.app.state.services.groq_service
+
+
+def get_registry(request: Request) -> SEBIAdvisorService:
+    return request.app.state.services.registry
+
+
+def get_batch_analysis(request: Request) -> BatchAnalysisService:
+    return request.app.state.services.batch_analysis
+
+
+def get_batch_verification(request: Request) -> BatchVerificationService:
+    return request.app.state.services.batch_verification
+
+
+def get_analysis_jobs(request: Request) -> AnalysisJobQueue:
+    return request.app.state.services.analysis_jobs
@@ -0,0 +1,241 @@
+"""
+Advisor verification result cache.
+Results are keyed by normalized advisor name, registration number and company.
+Positive results (advisor found) are kept for a long TTL, "not found" results
+for a shorter negative TTL, and entries past their TTL are still served for a
+stale window while a background refresh recomputes them. Degraded results
+(partial, upstream unavailable, AI analysis failed) are never cached.
+"""
+
+import asyncio
+import copy
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+POSITIVE_STATUSES = {"found_on_sebi", "verified"}
+
+
+def _normalize_text(value: Any) -> str:
+    if not value or not isinstance(value, str):
+        return ""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', value.lower()).split())
+
+
+def _normalize_registration(value: Any) -> str:
+    if not value or not isinstance(value, str):
+        return ""
+    return re.sub(r'[^A-Z0-9]', '', value.upper())
+
+
+@dataclass
+class _CacheEntry:
+    value: Dict[str, Any]
+    fresh_until: float
+    stale_until: float
+    refreshing: bool = False
+
+
+class VerificationCache:
+    """
+    TTL cache with negative caching and stale-while-revalidate for advisor verification results
+    """
+
+    def __init__(
+        self,
+        positive_ttl: float = 24 * 3600,
+        negative_ttl: float = 15 * 60,
+        stale_ttl: float = 3600,
+        max_entries: int = 50000,
+    ):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._refresh_tasks: set = set()
+        self._lock = threading.Lock()
+        self._stats = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "purged": 0,
+            "degraded_skipped": 0,
+        }
+
+    @staticmethod
+    def make_key(advisor_data: Dict[str, Any]) -> CacheKey:
+        """
+        Build the cache key from normalized name, registration number and company
+        """
+        registration = advisor_data.get('registrationNumber') or advisor_data.get('licenseId')
+        return (
+            _normalize_text(advisor_data.get('name')),
+            _normalize_registration(registration),
+            _normalize_text(advisor_data.get('companyName')),
+        )
+
+    def is_positive(self, result: Dict[str, Any]) -> bool:
+        return result.get("status") in POSITIVE_STATUSES
+
+    @staticmethod
+    def is_degraded(result: Dict[str, Any]) -> bool:
+        """
+        Whether the result was produced without a complete check: the latency budget ran out,
+        the SEBI website was unavailable (circuit open or every strategy failed) or the AI analysis failed
+        """
+        return bool(result.get("partial") or result.get("upstreamUnavailable") or result.get("ai_analysis_error"))
+
+    def get(self, key: CacheKey) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Look up a result. Returns (result copy, state) with state one of fresh/stale/miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry.stale_until:
+                if entry is not None:
+                    del self._entries[key]
+                self._stats["misses"] += 1
+                return None, "miss"
+            self._entries.move_to_end(key)
+            state = "fresh" if now < entry.fresh_until else "stale"
+            self._stats[f"{state}_hits"] += 1
+            return copy.deepcopy(entry.value), state
+
+    def set(self, key: CacheKey, result: Dict[str, Any]) -> bool:
+        """
+        Store a result with the positive or negative TTL depending on its status.
+        Returns False when the result is degraded and was not stored.
+        """
+        if self.is_degraded(result):
+            # Do not pin transient failures; the next request checks again
+            self._stats["degraded_skipped"] += 1
+            return False
+        ttl = self.positive_ttl if self.is_positive(result) else self.negative_ttl
+        now = time.time()
+        entry = _CacheEntry(
+            value=copy.deepcopy(result),
+            fresh_until=now + ttl,
+            stale_until=now + ttl + self.stale_ttl,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    async def get_or_compute(
+        self,
+        key: CacheKey,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Return a cached result, refreshing stale entries in the background.
+        Concurrent misses for the same key share a single computation.
+        """
+        cached, state = self.get(key)
+        if state == "fresh":
+            return cached
+        if state == "stale":
+            self._schedule_refresh(key, compute)
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            return copy.deepcopy(await asyncio.shield(inflight))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+            self.set(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _schedule_refresh(self, key: CacheKey, compute: Callable[[], Awaitable[Dict[str, Any]]]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refreshing:
+                return
+            entry.refreshing = True
+            self._stats["refreshes"] += 1
+
+        async def refresh():
+            try:
+                if self.set(key, await compute()):
+                    return
+            except Exception as e:
+                self._stats["refresh_errors"] += 1
+                logger.warning(f"Background refresh of advisor verification failed: {e}")
+            # Keep serving the stale entry and let a later request try again
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def purge(self, name: Optional[str] = None, registration_number: Optional[str] = None) -> int:
+        """
+        Drop cached results. Without arguments the whole cache is cleared,
+        otherwise only entries matching the given name and/or registration number.
+        """
+        with self._lock:
+            if not name and not registration_number:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                name_key = _normalize_text(name)
+                reg_key = _normalize_registration(registration_number)
+                doomed = [
+                    key for key in self._entries
+                    if (not name_key or key[0] == name_key) and (not reg_key or key[1] == reg_key)
+                ]
+                for key in doomed:
+                    del self._entries[key]
+                removed = len(doomed)
+            self._stats["purged"] += removed
+        return removed
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["fresh_hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["fresh_hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+# Shared cache used by every GroqService instance
+verification_cache = VerificationCache()
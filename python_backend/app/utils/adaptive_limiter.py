@@ -0,0 +1,223 @@
+"""
+Adaptive outbound concurrency control.
+AdaptiveConcurrencyLimiter grows its limit additively while upstream latency is
+healthy and cuts it multiplicatively on errors or latency spikes (AIMD).
+CircuitBreaker stops traffic to an upstream that keeps failing so callers can
+fail over to cached or local data instead of waiting on timeouts.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class LimiterTimeout(Exception):
+    """Raised when no concurrency permit became available in time"""
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is rejecting calls to the upstream"""
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Thread-safe AIMD concurrency limiter
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_target_s: float = 2.0,
+        spike_factor: float = 2.0,
+        backoff_ratio: float = 0.7,
+        decrease_interval_s: float = 1.0,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_s = latency_target_s
+        self.spike_factor = spike_factor
+        self.backoff_ratio = backoff_ratio
+        self.decrease_interval_s = decrease_interval_s
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiting = 0
+        self._baseline_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._stats = {
+            "acquired": 0,
+            "rejected": 0,
+            "successes": 0,
+            "failures": 0,
+            "latency_spikes": 0,
+            "increases": 0,
+            "decreases": 0,
+        }
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def acquire(self, timeout: float) -> float:
+        """
+        Wait up to timeout seconds for a permit. Returns the start timestamp to pass to release().
+        """
+        end = time.monotonic() + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self._in_flight >= self.limit:
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["rejected"] += 1
+                        raise LimiterTimeout(
+                            f"No outbound permit within {timeout:.2f}s (limit {self.limit}, in flight {self._in_flight})"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+            self._stats["acquired"] += 1
+        return time.monotonic()
+
+    def has_capacity(self) -> bool:
+        with self._cond:
+            return self._in_flight < self.limit
+
+    def release(self, started_at: float, success: Optional[bool]):
+        """
+        Return a permit and adapt the limit from the observed outcome and latency.
+        success=None returns the permit without adapting (the call was never made).
+        """
+        latency = time.monotonic() - started_at
+        with self._cond:
+            self._in_flight -= 1
+            if success is None:
+                self._cond.notify_all()
+                return
+            spike_threshold = self.latency_target_s
+            if self._baseline_latency is not None:
+                spike_threshold = max(spike_threshold, self._baseline_latency * self.spike_factor)
+
+            if not success:
+                self._stats["failures"] += 1
+                self._decrease()
+            elif latency > spike_threshold:
+                self._stats["successes"] += 1
+                self._stats["latency_spikes"] += 1
+                self._decrease()
+            else:
+                self._stats["successes"] += 1
+                # Additive increase: roughly +1 per limit's worth of healthy responses
+                if self._in_flight + 1 >= self.limit * 0.5 and self._limit < self.max_limit:
+                    self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+                    self._stats["increases"] += 1
+                self._baseline_latency = (
+                    latency if self._baseline_latency is None
+                    else 0.9 * self._baseline_latency + 0.1 * latency
+                )
+            self._cond.notify_all()
+
+    def _decrease(self):
+        # One multiplicative cut per interval so a burst of failures does not collapse the limit
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_interval_s:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+        self._stats["decreases"] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "baseline_latency_s": self._baseline_latency,
+                **self._stats,
+            }
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed/open/half-open circuit breaker
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError if the call must not be attempted
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.OPEN or (
+                self._state == self.HALF_OPEN and self._half_open_calls >= self.half_open_max_calls
+            ):
+                self._stats["rejected"] += 1
+                raise CircuitOpenError("Upstream circuit is open")
+            if self._state == self.HALF_OPEN:
+                self._half_open_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._state = self.CLOSED
+            self._half_open_calls = 0
+
+    def record_inconclusive(self):
+        """
+        The call ended without saying anything about the upstream (e.g. cut short by the
+        caller's own deadline): no failure is counted, and a half-open trial slot is freed
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._stats["opened"] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_calls = 0
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                **self._stats,
+            }
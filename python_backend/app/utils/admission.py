@@ -0,0 +1,243 @@
+"""
+Admission control for the expensive endpoints.
+Each endpoint class (document analysis, batch imports, advisor verification)
+has its own concurrency limit and a bounded FIFO wait queue. A request that
+finds the queue full, or that waits longer than the class's queue timeout, is
+answered 429 with a Retry-After estimated from the class's recent service
+times, so an overload of one class sheds its own excess instead of slowing
+down every endpoint. Requests outside every class (/health, admin, job
+status) are never queued.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from . import fast_json
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted; retry_after is in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue (one event loop, no locking needed)
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout_s: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Smoothed seconds a request holds a permit, for Retry-After
+        self._service_time_s: Optional[float] = None
+        self._stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0,
+                       "max_wait_s": 0.0, "total_wait_s": 0.0}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """
+        Seconds until the current backlog should have drained, between 1 and 60
+        """
+        service_time = self._service_time_s or 1.0
+        backlog = (len(self._waiters) + 1) / max(self.max_concurrency, 1)
+        return max(1, min(60, math.ceil(service_time * backlog)))
+
+    async def acquire(self) -> float:
+        """
+        Take a permit, waiting in line for up to queue_timeout_s. Returns the admission
+        timestamp to pass to release(); raises AdmissionRejected.
+        """
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            return self._admit(0.0)
+        if len(self._waiters) >= self.max_queue:
+            self._stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(f"Too many {self.name} requests in progress", self.retry_after())
+
+        self._stats["queued"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._waiters.remove(waiter)
+                waiter.cancel()
+                self._stats["rejected_timeout"] += 1
+                raise AdmissionRejected(f"Timed out waiting for {self.name} capacity", self.retry_after())
+            # The permit was handed over just as the wait timed out; keep it
+        except asyncio.CancelledError:
+            # Client went away while queued: give a permit it was already handed to the next waiter
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            elif waiter.done() and not waiter.cancelled():
+                self._in_flight -= 1
+                self._wake_next()
+            raise
+        return self._admit(time.monotonic() - queued_at, handed_over=True)
+
+    def _admit(self, waited_s: float, handed_over: bool = False) -> float:
+        # A handed-over permit was already counted by release()
+        if not handed_over:
+            self._in_flight += 1
+        self._stats["admitted"] += 1
+        self._stats["total_wait_s"] += waited_s
+        self._stats["max_wait_s"] = max(self._stats["max_wait_s"], waited_s)
+        return time.monotonic()
+
+    def release(self, admitted_at: float):
+        held = time.monotonic() - admitted_at
+        self._service_time_s = held if self._service_time_s is None else 0.8 * self._service_time_s + 0.2 * held
+        self._in_flight -= 1
+        self._wake_next()
+
+    def _wake_next(self):
+        # Hand the permit straight to the longest waiter so newcomers cannot overtake the queue
+        while self._waiters and self._in_flight < self.max_concurrency:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        admitted = self._stats["admitted"]
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout_s,
+            "in_flight": self._in_flight,
+            "queued_now": len(self._waiters),
+            "service_time_s": round(self._service_time_s, 3) if self._service_time_s is not None else None,
+            **{name: value for name, value in self._stats.items() if name not in ("max_wait_s", "total_wait_s")},
+            "max_wait_s": round(self._stats["max_wait_s"], 3),
+            "avg_wait_s": round(self._stats["total_wait_s"] / admitted, 3) if admitted else 0.0,
+        }
+
+
+@dataclass
+class EndpointClass:
+    name: str
+    # (method, path) pairs; a path ending in "/" matches everything below it
+    routes: Tuple[Tuple[str, str], ...]
+    limiter: AdmissionLimiter
+
+    def matches(self, method: str, path: str) -> bool:
+        for route_method, route_path in self.routes:
+            if route_method != method:
+                continue
+            if path == route_path or (route_path.endswith("/") and path.startswith(route_path)):
+                return True
+        return False
+
+
+# name -> (routes, concurrency, queue length, queue timeout); each overridable with
+# ADMISSION_<NAME>_CONCURRENCY / _QUEUE / _TIMEOUT_S
+DEFAULT_CLASSES = {
+    # PDF/DOCX parsing, spaCy and one LLM call per request
+    "document_analysis": (
+        (("POST", "/api/v1/offers/analyze"),),
+        max(2, os.cpu_count() or 2), 16, 10.0,
+    ),
+    # Whole imports; each already fans out internally
+    "batch": (
+        (("POST", "/api/v1/offers/analyze/batch"), ("POST", "/api/v1/advisors/verify-batch")),
+        2, 4, 5.0,
+    ),
+    # Live SEBI lookups plus an LLM call for unverified advisors
+    "verification": (
+        (("POST", "/api/v1/advisors/verify"), ("POST", "/api/v1/advisors/verify-extracted")),
+        32, 128, 5.0,
+    ),
+}
+
+
+class AdmissionController:
+    def __init__(self, classes: Iterable[EndpointClass], enabled: bool = True):
+        self.classes: List[EndpointClass] = list(classes)
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls) -> 'AdmissionController':
+        classes = []
+        for name, (routes, concurrency, queue, timeout_s) in DEFAULT_CLASSES.items():
+            prefix = f"ADMISSION_{name.upper()}_"
+            classes.append(EndpointClass(name, routes, AdmissionLimiter(
+                name,
+                max_concurrency=int(os.getenv(prefix + "CONCURRENCY", str(concurrency))),
+                max_queue=int(os.getenv(prefix + "QUEUE", str(queue))),
+                queue_timeout_s=float(os.getenv(prefix + "TIMEOUT_S", str(timeout_s))),
+            )))
+        return cls(classes, enabled=os.getenv("ADMISSION_CONTROL", "1") != "0")
+
+    def classify(self, method: str, path: str) -> Optional[EndpointClass]:
+        for endpoint_class in self.classes:
+            if endpoint_class.matches(method, path):
+                return endpoint_class
+        return None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "classes": {endpoint_class.name: endpoint_class.limiter.get_metrics() for endpoint_class in self.classes},
+        }
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware holding a permit of the request's endpoint class for the whole
+    response (streamed bodies included), or answering 429 when none is available
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.controller.enabled:
+            return await self.app(scope, receive, send)
+        endpoint_class = self.controller.classify(scope["method"], scope["path"])
+        if endpoint_class is None:
+            return await self.app(scope, receive, send)
+
+        limiter = endpoint_class.limiter
+        try:
+            admitted_at = await limiter.acquire()
+        except AdmissionRejected as e:
+            return await self._reject(send, str(e), e.retry_after)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(admitted_at)
+
+    async def _reject(self, send, message: str, retry_after: int):
+        body = fast_json.dumps({"detail": message})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
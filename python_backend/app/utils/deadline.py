@@ -0,0 +1,41 @@
+"""
+Per-request latency budgets.
+A Deadline is created once per request and passed down to every step so that
+each network call only gets the time that is actually left.
+"""
+
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request has used up its latency budget"""
+
+
+class Deadline:
+    def __init__(self, budget_s: float):
+        self.budget_s = budget_s
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_s
+
+    def remaining(self) -> float:
+        """
+        Seconds left before the deadline (never negative)
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """
+        Timeout to use for the next blocking call: the remaining budget, capped.
+        Raises DeadlineExceeded when nothing is left.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Latency budget of {self.budget_s:.1f}s exhausted")
+        return min(cap, remaining) if cap is not None else remaining
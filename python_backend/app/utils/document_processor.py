@@ -10,18 +10,22 @@ import json
 import logging
 from pathlib import Path
 import shutil
+import threading
 from .processor_config import ProcessorConfig
-
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+from .memory_tracking import document_memory, memory_stage
+from .request_profiling import stage
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _ensure_punkt():
+    """Download the NLTK sentence tokenizer data if it is missing"""
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt')
+
 def initialize_nlp():
     """Initialize spaCy with error handling and progress"""
     try:
@@ -37,8 +41,21 @@ def initialize_nlp():
             logger.error(f"Failed to download spaCy model: {str(e)}")
             raise RuntimeError("Failed to initialize NLP model. Please run 'python -m spacy download en_core_web_sm' manually.")
 
-# Initialize spaCy
-nlp = initialize_nlp()
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """
+    The spaCy pipeline, loaded (with the NLTK data) on first use so that text
+    extraction works without importing the model
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                _ensure_punkt()
+                _nlp = initialize_nlp()
+    return _nlp
 
 class DocumentProcessor:
     def __init__(self, config: ProcessorConfig | None = None):
@@ -59,13 +76,6 @@ class DocumentProcessor:
         Extract text from PDF files using PyPDF2 only
         """
         try:
-            # Check file size before processing
-            file_size = os.path.getsize(file_path)
-            max_size = 50 * 1024 * 1024  # 50MB limit
-            if file_size > max_size:
-                logger.error(f"PDF file too large ({file_size / 1024 / 1024:.1f}MB). Maximum size is 50MB")
-                return ""
-
             # PDF text extraction
             text = ""
             with open(file_path, 'rb') as file:
@@ -182,6 +192,14 @@ class DocumentProcessor:
                 logger.warning(f"Unsupported file extension: {ext}")
                 return ""
 
+            # Check file size before processing
+            file_size = os.path.getsize(file_path)
+            max_size = self.config.max_size_bytes(ext)
+            if file_size > max_size:
+                logger.error(f"{ext} file too large ({file_size / 1024 / 1024:.1f}MB). "
+                             f"Maximum size is {max_size // (1024 * 1024)}MB")
+                return ""
+
             if ext == '.pdf':
                 return self.extract_text_from_pdf(file_path)
             elif ext == '.docx':
@@ -198,41 +216,82 @@ class DocumentProcessor:
         """
         Process a document and extract structured information
         """
-        text = self.extract_text(file_path)
-        if not text:
-            return {
-                "success": False,
-                "error": "No text could be extracted from the document"
-            }
+        ext = Path(file_path).suffix.lower()
+        with document_memory.track("process_document", label=Path(file_path).name) as memory:
+            if memory is not None:
+                memory.input_bytes = os.path.getsize(file_path)
+            with stage("document.extract_text", extension=ext), memory_stage(f"extract_text_from_{ext.lstrip('.')}"):
+                text = self.extract_text(file_path)
+            if not text:
+                return {
+                    "success": False,
+                    "error": "No text could be extracted from the document"
+                }
+            return self.process_texts([text])[0]
 
+    def process_texts(self, texts: List[str], batch_size: int = 32) -> List[Dict[str, Any]]:
+        """
+        Extract structured information from already extracted texts (e.g. social posts),
+        running spaCy over all of them with nlp.pipe. Results are in input order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        languages = {}
+        for index, text in enumerate(texts):
+            if not text or not text.strip():
+                results[index] = {
+                    "success": False,
+                    "error": "No text could be extracted from the document"
+                }
+                continue
+            try:
+                # Detect language
+                with stage("document.detect_language"), memory_stage("detect_language"):
+                    languages[index] = detect(text)
+                if languages[index] != 'en':
+                    logger.warning(f"Document language detected as {languages[index]}, not English")
+            except Exception as e:
+                logger.error(f"Error processing document: {str(e)}")
+                results[index] = {"success": False, "error": str(e)}
+
+        pending = list(languages)
+        nlp = get_nlp()
         try:
-            # Detect language
-            lang = detect(text)
-            if lang != 'en':
-                logger.warning(f"Document language detected as {lang}, not English")
-
             # Process with spaCy
-            doc = nlp(text)
-
-            # Extract key information
-            extracted_info = {
-                "success": True,
-                "language": lang,
-                "text": text,
-                "sentences": sent_tokenize(text),
-                "entities": self._extract_entities(doc),
-                "investment_details": self._extract_investment_details(doc),
-                "contact_info": self._extract_contact_info(doc),
-                "key_phrases": self._extract_key_phrases(doc)
-            }
-
-            return extracted_info
+            with stage("document.spacy_pipe", texts=len(pending)), memory_stage("spacy_doc"):
+                docs = list(nlp.pipe((texts[index] for index in pending), batch_size=batch_size))
         except Exception as e:
-            logger.error(f"Error processing document: {str(e)}")
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            # One bad text must not fail the whole batch; retry them individually
+            logger.error(f"Batched spaCy processing failed, processing one by one: {str(e)}")
+            docs = [None] * len(pending)
+
+        for index, doc in zip(pending, docs):
+            text = texts[index]
+            try:
+                if doc is None:
+                    with stage("document.spacy"), memory_stage("spacy_doc"):
+                        doc = nlp(text)
+                # Extract key information
+                with stage("document.extract_features", chars=len(text)):
+                    with memory_stage("nltk_sentences"):
+                        sentences = sent_tokenize(text)
+                    with memory_stage("extract_features"):
+                        results[index] = {
+                            "success": True,
+                            "language": languages[index],
+                            "text": text,
+                            "sentences": sentences,
+                            "entities": self._extract_entities(doc),
+                            "investment_details": self._extract_investment_details(doc),
+                            "contact_info": self._extract_contact_info(doc),
+                            "key_phrases": self._extract_key_phrases(doc)
+                        }
+            except Exception as e:
+                logger.error(f"Error processing document: {str(e)}")
+                results[index] = {
+                    "success": False,
+                    "error": str(e)
+                }
+        return results
 
     def _extract_entities(self, doc) -> Dict[str, List[str]]:
         """
@@ -0,0 +1,53 @@
+"""
+JSON encoding for API responses and internal payloads.
+Uses orjson when it is installed and the standard library otherwise; both
+produce compact output (no indentation, no spaces after separators, UTF-8
+instead of \\u escapes).
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Compact UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers beyond 64 bits; the standard library handles them
+            pass
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_str(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    return dumps(obj, default).decode('utf-8')
+
+
+def loads(data: Any) -> Any:
+    """
+    Parse JSON from str or bytes (raises ValueError, like json.loads)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps(); the app's default response class
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,157 @@
+"""
+Candidate-pruning fuzzy string index.
+Distinct normalized strings are indexed by character trigrams. A query only
+touches the rarest trigram posting lists (bounded by a postings budget), keeps
+the strings sharing the most trigrams, drops those whose length makes the
+threshold unreachable and only then runs difflib scoring on what is left.
+"""
+
+from array import array
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence, Set, Tuple
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Character trigrams of a normalized string, padded so short strings still produce grams
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def length_bounds(length: int, threshold: float) -> Tuple[float, float]:
+    """
+    Candidate lengths for which SequenceMatcher.ratio() can still reach threshold.
+    ratio = 2M / (la + lb) <= 2 * min(la, lb) / (la + lb)
+    """
+    if threshold <= 0:
+        return 0.0, float('inf')
+    return length * threshold / (2 - threshold), length * (2 - threshold) / threshold
+
+
+class TrigramIndex:
+    """
+    Trigram inverted index over distinct strings with budgeted candidate generation
+    """
+
+    def __init__(self, max_postings: int = 20000, max_candidates: int = 128, min_lists: int = 2):
+        self.max_postings = max_postings
+        self.max_candidates = max_candidates
+        self.min_lists = min_lists
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+
+    @classmethod
+    def from_parts(
+        cls,
+        strings: Sequence[str],
+        string_ids: Mapping[str, int],
+        postings: Mapping[str, Sequence[int]],
+        **kwargs,
+    ) -> 'TrigramIndex':
+        """
+        Wrap prebuilt (e.g. memory-mapped) tables; the result is read-only
+        """
+        index = cls(**kwargs)
+        index.strings = strings
+        index._string_ids = string_ids
+        index._postings = postings
+        return index
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def add(self, text: str) -> int:
+        """
+        Index a normalized string and return its id (identical strings share one id)
+        """
+        string_id = self._string_ids.get(text)
+        if string_id is not None:
+            return string_id
+        string_id = len(self.strings)
+        self.strings.append(text)
+        self._string_ids[text] = string_id
+        for gram in trigrams(text):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array('I')
+            postings.append(string_id)
+        return string_id
+
+    def add_all(self, texts: Iterable[str]) -> List[int]:
+        return [self.add(text) for text in texts]
+
+    def iter_postings(self) -> Iterator[Tuple[str, Sequence[int]]]:
+        """
+        (trigram, string ids) pairs in trigram order
+        """
+        for gram in sorted(self._postings):
+            yield gram, self._postings[gram]
+
+    def candidates(self, query: str, exhaustive: bool = False) -> List[int]:
+        """
+        Ids of the strings sharing the most rare trigrams with the query: the best
+        max_candidates of them within the postings budget, or with exhaustive every
+        string sharing any trigram (no budget, for callers that want all matches)
+        """
+        posting_lists = sorted(
+            (postings for postings in map(self._postings.get, trigrams(query)) if postings is not None),
+            key=len,
+        )
+        counts: Counter = Counter()
+        budget_used = 0
+        for position, postings in enumerate(posting_lists):
+            if not exhaustive and position >= self.min_lists and budget_used + len(postings) > self.max_postings:
+                break
+            counts.update(postings)
+            budget_used += len(postings)
+
+        candidate_ids = [string_id for string_id, _ in counts.most_common(None if exhaustive else self.max_candidates)]
+        exact = self._string_ids.get(query)
+        if exact is not None and exact not in counts:
+            candidate_ids.append(exact)
+        return candidate_ids
+
+    def search(
+        self, query: str, threshold: float, extra_candidates: Iterable[int] = (), exhaustive: bool = False
+    ) -> List[Tuple[float, int]]:
+        """
+        Return (similarity, string id) for candidates whose difflib ratio against
+        the query is at least threshold. extra_candidates (e.g. from blocking keys)
+        are scored as well. Without exhaustive only the max_candidates strings
+        sharing the most trigrams are scored. Order is unspecified.
+        """
+        if not query or not self.strings:
+            return []
+
+        low, high = length_bounds(len(query), threshold)
+        # ratio() is asymmetric: the query stays seq1 (SequenceMatcher(None, query, candidate)),
+        # as in the original linear scan, so scores and threshold bands are unchanged
+        matcher = SequenceMatcher(None)
+        matcher.set_seq1(query)
+        results = []
+        candidate_ids = self.candidates(query, exhaustive)
+        if extra_candidates:
+            seen = set(candidate_ids)
+            candidate_ids.extend(string_id for string_id in extra_candidates if string_id not in seen)
+        for string_id in candidate_ids:
+            candidate = self.strings[string_id]
+            if not low <= len(candidate) <= high:
+                continue
+            matcher.set_seq2(candidate)
+            # quick_ratio() is a cheap upper bound on ratio()
+            if matcher.quick_ratio() < threshold:
+                continue
+            similarity = matcher.ratio()
+            if similarity >= threshold:
+                results.append((similarity, string_id))
+        return results
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "distinct_strings": len(self.strings),
+            "trigrams": len(self._postings),
+            "postings": sum(len(postings) for postings in self._postings.values()),
+        }
@@ -0,0 +1,198 @@
+"""
+Pluggable HTML text/anchor extraction backends for SEBI verification pages.
+Each backend makes a single pass over the document and returns only what the
+verification service needs: the lowercase page text and the page anchors, with
+whitespace runs in both collapsed to single spaces so every backend yields the
+same strings.
+"""
+
+import logging
+import os
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ExtractedContent = Tuple[str, List[Dict[str, str]]]
+
+_TOKEN_RE = re.compile(r'\w+')
+_SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+
+
+def collapse_whitespace(text: str) -> str:
+    """
+    Collapse runs of whitespace (including non-breaking spaces) into single spaces
+    """
+    return ' '.join(text.split())
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """
+    Split lowercase text into its set of word tokens
+    """
+    return frozenset(_TOKEN_RE.findall(text))
+
+
+def name_matches_tokens(name: str, tokens: FrozenSet[str], min_parts: int = 2) -> bool:
+    """
+    Check whether at least min_parts tokens of a multi-part name occur in a page token set
+    """
+    name_parts = _TOKEN_RE.findall(name.lower())
+    if len(name_parts) < min_parts:
+        return False
+    return sum(1 for part in name_parts if part in tokens) >= min_parts
+
+
+class _TextAndAnchorParser(HTMLParser):
+    """
+    Streaming parser collecting visible text and anchors without building a tree
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text_parts: List[str] = []
+        self.links: List[Dict[str, str]] = []
+        self._skip_depth = 0
+        self._href: Optional[str] = None
+        self._anchor_parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == 'a':
+            self._close_anchor()
+            for key, value in attrs:
+                if key == 'href' and value is not None:
+                    self._href = value
+                    break
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+        elif tag == 'a':
+            self._close_anchor()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.text_parts.append(data)
+        if self._href is not None:
+            self._anchor_parts.append(data)
+
+    def close(self):
+        super().close()
+        self._close_anchor()
+
+    def _close_anchor(self):
+        if self._href is not None:
+            self.links.append({'href': self._href, 'text': collapse_whitespace(''.join(self._anchor_parts))})
+        self._href = None
+        self._anchor_parts = []
+
+
+def extract_with_stdlib(html: str) -> ExtractedContent:
+    """
+    Extract text and anchors using the standard library tokenizer (always available)
+    """
+    parser = _TextAndAnchorParser()
+    parser.feed(html)
+    parser.close()
+    return collapse_whitespace(' '.join(parser.text_parts)).lower(), parser.links
+
+
+def extract_with_selectolax(html: str) -> ExtractedContent:
+    """
+    Extract text and anchors using selectolax (lexbor, C implementation)
+    """
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(list(_SKIPPED_TAGS))
+    links = [
+        {'href': node.attributes.get('href') or '', 'text': collapse_whitespace(node.text(separator=' '))}
+        for node in tree.css('a[href]')
+    ]
+    # The whole document, like the stdlib parser: the <title> is page text too
+    root = tree.root
+    text = root.text(separator=' ') if root is not None else ''
+    return collapse_whitespace(text).lower(), links
+
+
+def extract_with_lxml(html: str) -> ExtractedContent:
+    """
+    Extract text and anchors using lxml's C parser
+    """
+    import lxml.html
+
+    if not html.strip():
+        return '', []
+    root = lxml.html.fromstring(html)
+    for node in root.iter(*_SKIPPED_TAGS):
+        node.drop_tree()
+    links = [
+        {'href': node.get('href'), 'text': collapse_whitespace(node.text_content())}
+        for node in root.iter('a') if node.get('href') is not None
+    ]
+    return collapse_whitespace(' '.join(root.itertext())).lower(), links
+
+
+def extract_with_beautifulsoup(html: str) -> ExtractedContent:
+    """
+    Extract text and anchors using BeautifulSoup with html.parser (legacy behaviour)
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    links = [
+        {'href': link['href'], 'text': collapse_whitespace(link.get_text())}
+        for link in soup.find_all('a', href=True)
+    ]
+    return collapse_whitespace(soup.get_text(' ')).lower(), links
+
+
+BACKENDS: Dict[str, Tuple[str, Callable[[str], ExtractedContent]]] = {
+    # name -> (module required, extractor)
+    'selectolax': ('selectolax', extract_with_selectolax),
+    'lxml': ('lxml', extract_with_lxml),
+    'stdlib': ('html.parser', extract_with_stdlib),
+    'beautifulsoup': ('bs4', extract_with_beautifulsoup),
+}
+
+# Preference order when the backend is "auto"
+_AUTO_ORDER = ['selectolax', 'lxml', 'stdlib']
+
+
+def _is_available(module_name: str) -> bool:
+    try:
+        __import__(module_name)
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends() -> List[str]:
+    """
+    List the extraction backends usable in this environment
+    """
+    return [name for name, (module_name, _) in BACKENDS.items() if _is_available(module_name)]
+
+
+def get_extractor(name: Optional[str] = None) -> Callable[[str], ExtractedContent]:
+    """
+    Resolve an extraction backend by name. Defaults to SEBI_HTML_BACKEND or "auto",
+    which picks the fastest installed backend.
+    """
+    name = (name or os.getenv("SEBI_HTML_BACKEND") or "auto").lower()
+    if name == "auto":
+        for candidate in _AUTO_ORDER:
+            if _is_available(BACKENDS[candidate][0]):
+                return BACKENDS[candidate][1]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML extraction backend: {name}")
+    module_name, extractor = BACKENDS[name]
+    if not _is_available(module_name):
+        logger.warning(f"HTML backend '{name}' is not installed, falling back to stdlib")
+        return extract_with_stdlib
+    return extractor
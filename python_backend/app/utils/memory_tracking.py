@@ -0,0 +1,222 @@
+"""
+Peak-memory tracking for document processing.
+A tracked process_document() or combine_text_data() call runs under
+tracemalloc and records, for every memory_stage() block inside it (text
+extraction, the spaCy Doc, NLTK sentences, feature extraction, combining),
+the peak allocation above the stage's starting point and what the stage
+still holds when it ends. Reports are logged and aggregated per stage,
+including peak MB per MB of input, for the admin /document-memory endpoint.
+
+tracemalloc slows allocation-heavy code down considerably, so tracking is
+off by default and otherwise applies to a DOCUMENT_MEMORY_SAMPLE_RATE share
+of documents, one at a time. tracemalloc is process-wide: allocations made
+by other requests while a document is tracked count towards its stages.
+"""
+
+import contextvars
+import logging
+import os
+import random
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+_current_report: contextvars.ContextVar[Optional['MemoryReport']] = contextvars.ContextVar(
+    "memory_report", default=None
+)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _MemoryStage:
+    __slots__ = ("report", "name")
+
+    def __init__(self, report: 'MemoryReport', name: str):
+        self.report = report
+        self.name = name
+
+    def __enter__(self):
+        self.report.open_stage()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.report.close_stage(self.name)
+        return False
+
+
+def memory_stage(name: str):
+    """
+    Measure a block as a stage of the tracked document; a no-op when none is tracked
+    """
+    report = _current_report.get()
+    if report is None:
+        return _NULL_STAGE
+    return _MemoryStage(report, name)
+
+
+class MemoryReport:
+    def __init__(self, kind: str, label: Optional[str] = None):
+        self.kind = kind
+        self.label = label
+        self.input_bytes = 0
+        self.peak_bytes = 0
+        self.stages: Dict[str, Dict[str, int]] = {}
+        # [starting traced size, highest traced size seen] of every open stage, outermost first
+        self._open: List[List[int]] = []
+
+    def _fold_peak(self) -> int:
+        # Stages share tracemalloc's single peak counter: credit it to every open
+        # stage before a nested stage resets it
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._open:
+            if peak > frame[1]:
+                frame[1] = peak
+        return current
+
+    def open_stage(self):
+        self._fold_peak()
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        self._open.append([current, current])
+
+    def close_stage(self, name: Optional[str]) -> int:
+        current = self._fold_peak()
+        base, peak = self._open.pop()
+        if name is not None:
+            entry = self.stages.setdefault(name, {"count": 0, "peak_bytes": 0, "retained_bytes": 0})
+            entry["count"] += 1
+            entry["peak_bytes"] = max(entry["peak_bytes"], peak - base)
+            entry["retained_bytes"] += current - base
+        return peak - base
+
+    def to_dict(self) -> Dict[str, Any]:
+        input_mb = self.input_bytes / MB
+
+        def per_input_mb(size: int) -> Optional[float]:
+            return round(size / MB / input_mb, 2) if input_mb else None
+
+        return {
+            "kind": self.kind,
+            "label": self.label,
+            "input_mb": round(input_mb, 3),
+            "peak_mb": round(self.peak_bytes / MB, 3),
+            "peak_per_input_mb": per_input_mb(self.peak_bytes),
+            "stages": {
+                name: {
+                    "count": entry["count"],
+                    "peak_mb": round(entry["peak_bytes"] / MB, 3),
+                    "retained_mb": round(entry["retained_bytes"] / MB, 3),
+                    "peak_per_input_mb": per_input_mb(entry["peak_bytes"]),
+                }
+                for name, entry in self.stages.items()
+            },
+        }
+
+
+class MemoryTracker:
+    def __init__(self, sample_rate: float = 0.0, keep_recent: int = 20):
+        """
+        sample_rate: share of documents tracked (0 = off, 1 = every document)
+        """
+        self.sample_rate = sample_rate
+        # One tracked document at a time; documents arriving meanwhile run untracked
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=keep_recent)
+        self._counters = {"tracked": 0, "skipped_busy": 0}
+
+    @classmethod
+    def from_env(cls) -> 'MemoryTracker':
+        return cls(sample_rate=float(os.getenv("DOCUMENT_MEMORY_SAMPLE_RATE", "0")))
+
+    @contextmanager
+    def track(self, kind: str, label: Optional[str] = None) -> Iterator[Optional[MemoryReport]]:
+        """
+        Track the block's memory stages. Yields the report (set its input_bytes) or None
+        when this call is not tracked.
+        """
+        if (
+            self.sample_rate <= 0
+            or (self.sample_rate < 1 and random.random() >= self.sample_rate)
+            or _current_report.get() is not None
+        ):
+            yield None
+            return
+        if not self._lock.acquire(blocking=False):
+            self._counters["skipped_busy"] += 1
+            yield None
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        report = MemoryReport(kind, label)
+        token = _current_report.set(report)
+        report.open_stage()
+        try:
+            yield report
+        finally:
+            report.peak_bytes = report.close_stage(None)
+            _current_report.reset(token)
+            if started_tracing:
+                tracemalloc.stop()
+            self._lock.release()
+            self._record(report)
+
+    def _record(self, report: MemoryReport):
+        summary = report.to_dict()
+        with self._stats_lock:
+            self._counters["tracked"] += 1
+            self._recent.append(summary)
+            for name, stage in [("total", summary), *summary["stages"].items()]:
+                stats = self._stages.setdefault(f"{report.kind}.{name}", {
+                    "count": 0, "max_peak_mb": 0.0, "total_peak_mb": 0.0, "max_peak_per_input_mb": None
+                })
+                stats["count"] += 1
+                stats["max_peak_mb"] = max(stats["max_peak_mb"], stage["peak_mb"])
+                stats["total_peak_mb"] += stage["peak_mb"]
+                if stage["peak_per_input_mb"] is not None:
+                    stats["max_peak_per_input_mb"] = max(stats["max_peak_per_input_mb"] or 0.0,
+                                                         stage["peak_per_input_mb"])
+        stages = ", ".join(f"{name} {stage['peak_mb']:.1f}MB" for name, stage in summary["stages"].items())
+        logger.info(f"Memory of {report.kind} {report.label or ''} ({summary['input_mb']:.2f}MB input): "
+                    f"peak {summary['peak_mb']:.1f}MB; {stages}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "sample_rate": self.sample_rate,
+                **self._counters,
+                "stages": {
+                    name: {
+                        "count": stats["count"],
+                        "max_peak_mb": round(stats["max_peak_mb"], 3),
+                        "avg_peak_mb": round(stats["total_peak_mb"] / stats["count"], 3),
+                        "max_peak_per_input_mb": stats["max_peak_per_input_mb"],
+                    }
+                    for name, stats in self._stages.items()
+                },
+                "recent": list(self._recent),
+            }
+
+
+# Shared by the document processor and combine_text_data
+document_memory = MemoryTracker.from_env()
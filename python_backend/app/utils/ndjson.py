@@ -0,0 +1,82 @@
+"""
+Newline-delimited JSON helpers.
+NDJSONWriter appends records to a file and reports the byte range of every
+batch it writes, so a batch can be read back later without scanning the file.
+iter_ndjson streams records back one line at a time and skips lines torn by
+a crash.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class NDJSONWriter:
+    """
+    Append-only NDJSON writer
+    """
+
+    def __init__(self, path: Union[str, Path], fsync: bool = False):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._file = open(self.path, 'ab')
+        # A crash can leave a torn last line; start the next batch on a fresh line
+        if self._file.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+
+    def append(self, records: Iterable[Any]) -> Tuple[int, int, int]:
+        """
+        Append records and flush. Returns (offset, length, count) of the written batch.
+        """
+        offset = self._file.tell()
+        count = 0
+        for record in records:
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            self._file.write(b"\n")
+            count += 1
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        return offset, self._file.tell() - offset, count
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self) -> 'NDJSONWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_ndjson(path: Union[str, Path], offset: int = 0, length: Optional[int] = None) -> Iterator[Any]:
+    """
+    Records from an NDJSON file, optionally only the byte range [offset, offset + length)
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        remaining = length
+        for line in f:
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                remaining -= len(line)
+            if not line.endswith(b"\n"):
+                break  # torn write at the end of the file
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A torn write that a later append closed with a newline
+                logger.warning("Skipping corrupt line in %s", path)
@@ -0,0 +1,419 @@
+"""
+Preforking production server.
+The master process imports the application once, which loads the spaCy model
+and the advisor registry with its indexes, runs the preload hook, moves
+everything it allocated out of the garbage collector's reach (gc.freeze, so
+collections in the workers do not write to the shared pages) and then forks
+the workers. The workers share those pages copy-on-write and each runs a
+uvicorn server on the inherited listening socket.
+
+A worker is recycled gracefully after max_requests requests (with jitter, so
+the workers do not all restart together) or once its RSS passes max_rss_mb,
+and the master forks a fresh one from the preloaded state. SIGHUP replaces
+every worker; SIGTERM/SIGINT stop the server. Every process writes a memory
+report (RSS, PSS, shared and private memory) to the state directory, which
+GET /api/v1/admin/workers serves.
+"""
+
+import gc
+import json
+import logging
+import os
+import random
+import resource
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Set in the environment of the master (and so of every worker) while the prefork server runs
+STATE_DIR_ENV = "PREFORK_STATE_DIR"
+
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "private",
+    "Private_Dirty": "private",
+}
+
+
+def read_process_memory(pid: Optional[int] = None) -> Dict[str, Optional[float]]:
+    """
+    Memory of a process in MB. PSS splits each shared page between the processes
+    mapping it, so the PSS of all workers adds up to their real footprint while
+    their RSS counts the copy-on-write pages once per worker.
+    """
+    proc = Path("/proc") / (str(pid) if pid is not None else "self")
+    try:
+        totals = dict.fromkeys(("rss", "pss", "shared", "private"), 0)
+        with open(proc / "smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in _SMAPS_FIELDS:
+                    totals[_SMAPS_FIELDS[name]] += int(value.split()[0])
+        return {name: round(kb / 1024, 1) for name, kb in totals.items()}
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(proc / "statm") as f:
+            _, resident, shared = (int(value) for value in f.read().split()[:3])
+        page_mb = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        return {"rss": round(resident * page_mb, 1), "pss": None,
+                "shared": round(shared * page_mb, 1), "private": round((resident - shared) * page_mb, 1)}
+    except (OSError, ValueError):
+        pass
+    if pid is not None:
+        return {"rss": None, "pss": None, "shared": None, "private": None}
+    # No /proc (macOS): peak RSS only, reported in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"rss": round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+            "pss": None, "shared": None, "private": None}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_report(state_dir: Path, name: str, report: Dict[str, Any]):
+    # Written to a temporary file and renamed, so readers never see a partial report
+    fd, tmp = tempfile.mkstemp(dir=state_dir, prefix=f".{name}.")
+    with os.fdopen(fd, "w") as f:
+        json.dump(report, f)
+    os.replace(tmp, state_dir / f"{name}.json")
+
+
+def read_reports(state_dir: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    The latest memory report of the master and of every live worker, or None
+    when the prefork server is not running
+    """
+    state_dir = state_dir or (Path(os.environ[STATE_DIR_ENV]) if os.getenv(STATE_DIR_ENV) else None)
+    if state_dir is None or not state_dir.is_dir():
+        return None
+    master, workers = None, []
+    for path in sorted(state_dir.glob("*.json")):
+        try:
+            report = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if not _pid_alive(report["pid"]):
+            continue
+        if path.stem == "master":
+            master = report
+        else:
+            workers.append(report)
+    workers.sort(key=lambda report: (report["worker"], report["started_at"]))
+    pss = [report["memory_mb"]["pss"] for report in workers + ([master] if master else [])]
+    return {
+        "master": master,
+        "workers": workers,
+        "totals": {
+            "workers": len(workers),
+            "requests": sum(report["requests"] for report in workers),
+            "rss_mb": round(sum(report["memory_mb"]["rss"] or 0 for report in workers), 1),
+            # Real footprint of the whole server, shared pages counted once
+            "pss_mb": round(sum(pss), 1) if pss and None not in pss else None,
+        },
+    }
+
+
+@dataclass
+class _Worker:
+    slot: int
+    pid: int
+    started_at: float
+    retiring: bool = False
+
+
+class PreforkServer:
+    def __init__(
+        self,
+        app: str,
+        host: str = "0.0.0.0",
+        port: int = 5000,
+        workers: int = 2,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        max_rss_mb: float = 0,
+        graceful_timeout_s: float = 30.0,
+        report_interval_s: float = 5.0,
+        state_dir: Optional[Path] = None,
+        preload: Optional[Callable[[], None]] = None,
+        post_fork: Optional[Callable[[], None]] = None,
+        log_level: str = "info",
+    ):
+        """
+        app is an import string ("main:app"). max_requests and max_rss_mb of 0 disable
+        that recycling trigger; preload runs once in the master after the import and
+        post_fork in every worker right after it is forked.
+        """
+        self.app_path = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.max_rss_mb = max_rss_mb
+        self.graceful_timeout_s = graceful_timeout_s
+        self.report_interval_s = report_interval_s
+        self.state_dir = Path(state_dir) if state_dir else Path(tempfile.mkdtemp(prefix="sebi-prefork-"))
+        self.preload = preload
+        self.post_fork = post_fork
+        self.log_level = log_level
+        self.app = None
+        self._socket: Optional[socket.socket] = None
+        self._workers: Dict[int, _Worker] = {}
+        self._stopping = False
+        self._reload_requested = False
+        self._spawn_delay = 0.0
+        self._stats = {"spawned": 0, "recycled": 0, "crashed": 0}
+
+    # --- master ---
+
+    def run(self):
+        from uvicorn.importer import import_from_string
+
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        os.environ[STATE_DIR_ENV] = str(self.state_dir)
+        self._socket = self._bind()
+
+        started = time.perf_counter()
+        self.app = import_from_string(self.app_path)
+        if self.preload is not None:
+            self.preload()
+        # Everything allocated so far is shared with the workers; keep the collector off it
+        gc.collect()
+        gc.freeze()
+        preloaded_rss = read_process_memory()["rss"]
+        logger.info("Preloaded %s in %.1fs (%s MB RSS); forking %d workers on %s:%d",
+                    self.app_path, time.perf_counter() - started, preloaded_rss,
+                    self.workers, self.host, self.port)
+        if self.max_rss_mb and preloaded_rss is not None and self.max_rss_mb <= preloaded_rss:
+            logger.warning("max_rss_mb (%s) is below the preloaded RSS; workers will recycle after every request",
+                           self.max_rss_mb)
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        try:
+            for slot in range(self.workers):
+                self._spawn(slot)
+            next_report = 0.0
+            while not self._stopping:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._replace_all()
+                self._reap()
+                if time.monotonic() >= next_report:
+                    self._write_master_report()
+                    next_report = time.monotonic() + self.report_interval_s
+                time.sleep(0.2)
+        finally:
+            self._shutdown()
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker(slot)
+            except BaseException:
+                logger.exception("Worker %d failed", slot)
+                code = 1
+            finally:
+                # Never return into the master's loop or run its exit handlers
+                os._exit(code)
+        self._workers[pid] = _Worker(slot, pid, time.time())
+        self._stats["spawned"] += 1
+        logger.info("Started worker %d (pid %d)", slot, pid)
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self._workers.pop(pid, None)
+            self._remove_report(pid)
+            if worker is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code == 0:
+                self._stats["recycled"] += 1
+                logger.info("Worker %d (pid %d) exited after %.0fs", worker.slot, pid, time.time() - worker.started_at)
+            else:
+                self._stats["crashed"] += 1
+                logger.warning("Worker %d (pid %d) died with exit code %d", worker.slot, pid, code)
+                # Back off when workers die right away (bad deploy) instead of fork-looping
+                if time.time() - worker.started_at < 5:
+                    self._spawn_delay = min(max(self._spawn_delay * 2, 0.5), 30.0)
+                    time.sleep(self._spawn_delay)
+                else:
+                    self._spawn_delay = 0.0
+            if self._stopping or any(other.slot == worker.slot for other in self._workers.values()):
+                continue
+            self._spawn(worker.slot)
+
+    def _replace_all(self):
+        """
+        Fork a replacement for every worker first, then retire the old ones gracefully
+        """
+        old = [worker for worker in self._workers.values() if not worker.retiring]
+        logger.info("Replacing %d workers", len(old))
+        for worker in old:
+            worker.retiring = True
+            self._spawn(worker.slot)
+        for worker in old:
+            self._signal(worker.pid, signal.SIGTERM)
+
+    def _signal(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _shutdown(self):
+        logger.info("Stopping %d workers", len(self._workers))
+        for pid in list(self._workers):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout_s
+        while self._workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self._workers):
+            logger.warning("Worker pid %d did not stop in time; killing it", pid)
+            self._signal(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            self._remove_report(pid)
+        self._workers.clear()
+        self._remove_report("master")
+        if self._socket is not None:
+            self._socket.close()
+
+    def _write_master_report(self):
+        write_report(self.state_dir, "master", {
+            "worker": None,
+            "pid": os.getpid(),
+            "started_at": None,
+            "requests": 0,
+            "memory_mb": read_process_memory(),
+            "workers": self.workers,
+            **self._stats,
+        })
+
+    def _remove_report(self, name):
+        try:
+            os.unlink(self.state_dir / f"{name}.json")
+        except FileNotFoundError:
+            pass
+
+    # --- worker ---
+
+    def _run_worker(self, slot: int):
+        import uvicorn
+
+        # uvicorn installs its own SIGTERM/SIGINT handlers; SIGHUP is the master's alone
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        # Forked children inherit the parent's random state
+        random.seed()
+        if self.post_fork is not None:
+            self.post_fork()
+
+        max_requests = None
+        if self.max_requests > 0:
+            max_requests = self.max_requests + random.randint(0, max(self.max_requests_jitter, 0))
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            limit_max_requests=max_requests,
+            timeout_graceful_shutdown=int(self.graceful_timeout_s),
+            log_level=self.log_level,
+        )
+        server = uvicorn.Server(config)
+        monitor = _WorkerMonitor(self, slot, server, max_requests)
+        monitor.start()
+        try:
+            server.run(sockets=[self._socket])
+        finally:
+            monitor.stop()
+
+
+class _WorkerMonitor(threading.Thread):
+    """
+    Writes the worker's report and asks uvicorn to exit once the RSS limit is passed
+    """
+
+    def __init__(self, owner: PreforkServer, slot: int, server, max_requests: Optional[int]):
+        super().__init__(name="prefork-monitor", daemon=True)
+        self.owner = owner
+        self.slot = slot
+        self.server = server
+        self.max_requests = max_requests
+        self.started_at = time.time()
+        self.recycle_reason: Optional[str] = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while True:
+            memory = read_process_memory()
+            rss = memory["rss"]
+            requests = self.server.server_state.total_requests
+            # A fresh fork is never recycled: it starts at the master's RSS and has not grown yet
+            if (self.owner.max_rss_mb and rss is not None and rss > self.owner.max_rss_mb
+                    and requests > 0 and self.recycle_reason is None):
+                self.recycle_reason = f"rss {rss}MB > {self.owner.max_rss_mb}MB"
+                logger.warning("Worker %d (pid %d) recycling: %s", self.slot, os.getpid(), self.recycle_reason)
+                self.server.should_exit = True
+            if self.max_requests is not None and requests >= self.max_requests and self.recycle_reason is None:
+                self.recycle_reason = f"served {requests} requests"
+            write_report(self.owner.state_dir, str(os.getpid()), {
+                "worker": self.slot,
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "requests": requests,
+                "max_requests": self.max_requests,
+                "max_rss_mb": self.owner.max_rss_mb or None,
+                "recycling": self.recycle_reason,
+                "memory_mb": memory,
+            })
+            if self._stop_event.wait(self.owner.report_interval_s):
+                return
+
+    def stop(self):
+        self._stop_event.set()
+
@@ -18,6 +18,7 @@ class ProcessorConfig:
     
     # Memory management
     chunk_size: int = 10  # pages per chunk
+    upload_chunk_bytes: int = 1024 * 1024  # uploads are read and spooled in chunks of this size
     
     # Language settings
     allowed_languages: set[str] | None = None  # None means all languages allowed
@@ -26,6 +27,17 @@ class ProcessorConfig:
         if self.allowed_languages is None:
             self.allowed_languages = {'en'}  # Default to English only
     
+    def max_size_bytes(self, extension: str) -> int:
+        """
+        Size limit for a file type ('.pdf', '.docx' or '.txt')
+        """
+        limits_mb = {
+            '.pdf': self.max_pdf_size_mb,
+            '.docx': self.max_docx_size_mb,
+            '.txt': self.max_txt_size_mb,
+        }
+        return limits_mb[extension] * 1024 * 1024
+    
     def to_dict(self) -> Dict[str, Any]:
         return {
             'max_pdf_size_mb': self.max_pdf_size_mb,
@@ -36,6 +48,7 @@ class ProcessorConfig:
             'ocr_dpi': self.ocr_dpi,
             'ocr_timeout': self.ocr_timeout,
             'chunk_size': self.chunk_size,
+            'upload_chunk_bytes': self.upload_chunk_bytes,
             'allowed_languages': list(self.allowed_languages) if self.allowed_languages else []
         }
 
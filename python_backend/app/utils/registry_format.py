@@ -0,0 +1,442 @@
+"""
+Compiled, memory-mapped advisor registry.
+write_registry() compiles the advisor JSON into one binary file holding the
+records column by column plus every lookup table SEBIAdvisorService needs
+(registration hash index, name tables, trigram postings). open_registry()
+maps that file read-only and wraps the sections in zero-copy views, so
+startup does no parsing or index building and all worker processes share the
+same pages through the OS page cache.
+
+Layout (native byte order, checked on open):
+    header    magic b"SEBIREG1", u32 version, u32 section count, u32 byte-order mark, u32 reserved
+    sections  count x (16-byte name, u64 offset, u64 length)
+    payload   sections, each 8-byte aligned
+
+Section kinds:
+    u32 / u8  plain arrays
+    strtab    u32 count, (count + 1) u32 offsets, UTF-8 blob
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import abc
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .fuzzy_index import TrigramIndex
+from .registry_tables import (
+    NAME_FIELDS,
+    REGISTRATION_FIELDS,
+    NameTables,
+    build_registration_index,
+)
+
+MAGIC = b"SEBIREG1"
+# 2: registration numbers are indexed in canonical form only (no alias section)
+FORMAT_VERSION = 2
+BYTE_ORDER_MARK = 0x01020304
+NULL_ID = 0xFFFFFFFF
+
+_HEADER = struct.Struct("=8sIIII")
+_SECTION = struct.Struct("=16sQQ")
+_ALIGNMENT = 8
+
+
+class RegistryFormatError(Exception):
+    """Raised when a compiled registry file is missing, corrupt or incompatible"""
+
+
+class MappedStrings(abc.Sequence):
+    """
+    Read-only list of strings stored as a strtab section; decoded on access
+    """
+
+    def __init__(self, section: memoryview):
+        count = section[:4].cast('I')[0]
+        offsets_end = 4 + 4 * (count + 1)
+        self._offsets = section[4:offsets_end].cast('I')
+        self._blob = section[offsets_end:]
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("string index out of range")
+        return str(self._blob[self._offsets[position]:self._offsets[position + 1]], 'utf-8')
+
+
+class SortedStringLookup:
+    """
+    Read-only str -> int mapping over sorted keys, resolved by binary search.
+
+    keys are visited in `order` (identity when the keys were written sorted);
+    a key's value is values[i] when values are given, else the key's own id.
+    NULL_ID values read as missing.
+    """
+
+    def __init__(self, keys: MappedStrings, order: Optional[Sequence[int]] = None, values: Optional[Sequence[int]] = None):
+        self._keys = keys
+        self._order = order
+        self._values = values
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _key_at(self, position: int) -> str:
+        return self._keys[self._order[position] if self._order is not None else position]
+
+    def _find(self, key: str) -> Optional[int]:
+        low, high = 0, len(self._keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._keys) and self._key_at(low) == key:
+            return low
+        return None
+
+    def _value_at(self, position: int) -> int:
+        if self._values is not None:
+            return self._values[position]
+        return self._order[position] if self._order is not None else position
+
+    def get(self, key: str, default=None):
+        if not isinstance(key, str):
+            return default
+        position = self._find(key)
+        if position is None:
+            return default
+        value = self._value_at(position)
+        return default if value == NULL_ID else value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: str) -> int:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+class MappedPostings:
+    """
+    Read-only str -> id-list mapping stored CSR-style: keys are sorted, and
+    ids[offsets[k]:offsets[k + 1]] belong to key k
+    """
+
+    def __init__(self, keys: MappedStrings, offsets: memoryview, ids: memoryview):
+        self._keys = keys
+        self._lookup = SortedStringLookup(keys)
+        self._offsets = offsets
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._lookup
+
+    def __getitem__(self, key: str) -> memoryview:
+        position = self._lookup[key]
+        return self._ids[self._offsets[position]:self._offsets[position + 1]]
+
+    def get(self, key: str, default=None):
+        position = self._lookup.get(key)
+        if position is None:
+            return default
+        return self._ids[self._offsets[position]:self._offsets[position + 1]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def values(self) -> Iterator[memoryview]:
+        for position in range(len(self._keys)):
+            yield self._ids[self._offsets[position]:self._offsets[position + 1]]
+
+
+class MappedRecords(abc.Sequence):
+    """
+    Read-only sequence of advisor records stored column by column. Each access
+    materializes a fresh dict, so callers may modify what they get back.
+    """
+
+    def __init__(self, columns: List[Tuple[str, bool, memoryview]], values: MappedStrings, count: int):
+        self._columns = columns  # (name, is_json, value ids)
+        self._values = values
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("record index out of range")
+        record = {}
+        for name, is_json, value_ids in self._columns:
+            value_id = value_ids[position]
+            if value_id == NULL_ID:
+                continue
+            value = self._values[value_id]
+            record[name] = json.loads(value) if is_json else value
+        return record
+
+
+class CompiledRegistry:
+    """
+    An opened registry file: records, registration lookups and name tables
+    """
+
+    def __init__(self, path: Path, mapping: mmap.mmap, meta: Dict[str, Any], records: MappedRecords,
+                 registration_index: SortedStringLookup, name_tables: NameTables):
+        self.path = path
+        self.meta = meta
+        self.records = records
+        self.registration_index = registration_index
+        self.name_tables = name_tables
+        self._mapping = mapping
+
+    def matches_source(self, source: Path) -> bool:
+        """
+        True when the file was compiled from the current contents of source (size and mtime)
+        """
+        recorded = self.meta.get("source") or {}
+        try:
+            stat = source.stat()
+        except OSError:
+            return False
+        return recorded.get("size") == stat.st_size and recorded.get("mtime_ns") == stat.st_mtime_ns
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "file": str(self.path),
+            "file_bytes": len(self._mapping),
+            "format_version": self.meta.get("format_version"),
+            "built_at": self.meta.get("built_at"),
+        }
+
+
+# Writing
+
+class _SectionWriter:
+    def __init__(self):
+        self.sections: List[Tuple[str, bytes]] = []
+
+    def add(self, name: str, payload: Union[bytes, array]):
+        if len(name.encode('ascii')) > 16:
+            raise ValueError(f"Section name too long: {name}")
+        self.sections.append((name, payload.tobytes() if isinstance(payload, array) else payload))
+
+    def add_strings(self, name: str, strings: Sequence[str]):
+        offsets = array('I', [0])
+        blob = bytearray()
+        for text in strings:
+            blob += text.encode('utf-8')
+            offsets.append(len(blob))
+        if len(blob) >= NULL_ID:
+            raise ValueError(f"String table {name} exceeds 4 GiB")
+        self.add(name, array('I', [len(strings)]).tobytes() + offsets.tobytes() + bytes(blob))
+
+    def write(self, path: Path):
+        table_size = _HEADER.size + _SECTION.size * len(self.sections)
+        offset = _align(table_size)
+        entries = []
+        for name, payload in self.sections:
+            entries.append((name, offset, len(payload)))
+            offset = _align(offset + len(payload))
+
+        # Write next to the target and rename, so processes that already mapped
+        # the old file keep a consistent view of it
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(self.sections), BYTE_ORDER_MARK, 0))
+            for name, section_offset, length in entries:
+                f.write(_SECTION.pack(name.encode('ascii'), section_offset, length))
+            for (name, payload), (_, section_offset, _) in zip(self.sections, entries):
+                f.write(b"\0" * (section_offset - f.tell()))
+                f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _sorted_key_table(items: Dict[str, int]) -> Tuple[List[str], array]:
+    keys = sorted(items)
+    return keys, array('I', (items[key] for key in keys))
+
+
+def write_registry(records: List[Dict[str, Any]], path: Union[str, Path], source: Optional[Path] = None,
+                   name_fields: Sequence[str] = NAME_FIELDS,
+                   registration_fields: Sequence[str] = REGISTRATION_FIELDS) -> Dict[str, Any]:
+    """
+    Compile advisor records (and their lookup tables) into a registry file. Returns its meta block.
+    """
+    path = Path(path)
+    writer = _SectionWriter()
+
+    # Columns in first-seen order; a column is "str" when every present value is a string
+    columns: Dict[str, bool] = {}
+    for record in records:
+        for name, value in record.items():
+            is_json = not isinstance(value, str)
+            columns[name] = columns.get(name, False) or is_json
+
+    value_ids: Dict[str, int] = {}
+    values: List[str] = []
+    column_meta = []
+    for column_position, (name, is_json) in enumerate(columns.items()):
+        ids = array('I')
+        for record in records:
+            if name not in record:
+                ids.append(NULL_ID)
+                continue
+            value = record[name]
+            text = json.dumps(value, ensure_ascii=False) if is_json else value
+            value_id = value_ids.get(text)
+            if value_id is None:
+                value_id = value_ids[text] = len(values)
+                values.append(text)
+            ids.append(value_id)
+        writer.add(f"col.{column_position}", ids)
+        column_meta.append({"name": name, "type": "json" if is_json else "str"})
+    writer.add_strings("values", values)
+
+    keys, positions = _sorted_key_table(build_registration_index(records, registration_fields))
+    writer.add_strings("reg.keys", keys)
+    writer.add("reg.records", positions)
+
+    tables = NameTables.build(records, name_fields)
+    strings = tables.index.strings
+    writer.add_strings("names", strings)
+    writer.add("names.order", array('I', sorted(range(len(strings)), key=strings.__getitem__)))
+    writer.add("entry.record", tables.entry_record)
+    writer.add("entry.field", tables.entry_field)
+    writer.add("entry.offsets", tables.string_entry_offsets)
+    writer.add_strings("tokens", tables.tokens)
+    writer.add_strings("tokens.phonetic", tables.token_phonetic)
+    writer.add("strtok.offsets", tables.string_token_offsets)
+    writer.add("strtok.ids", tables.string_token_ids)
+
+    for section, items in (
+        ("phonetic", sorted(tables.phonetic_blocks.items())),
+        ("gram", tables.index.iter_postings()),
+    ):
+        keys, offsets, ids = [], array('I', [0]), array('I')
+        for key, postings in items:
+            keys.append(key)
+            ids.extend(postings)
+            offsets.append(len(ids))
+        writer.add_strings(f"{section}.keys", keys)
+        writer.add(f"{section}.offsets", offsets)
+        writer.add(f"{section}.ids", ids)
+
+    meta: Dict[str, Any] = {
+        "format_version": FORMAT_VERSION,
+        "record_count": len(records),
+        "columns": column_meta,
+        "name_fields": list(name_fields),
+        "registration_fields": list(registration_fields),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "source": None,
+    }
+    if source is not None:
+        stat = Path(source).stat()
+        meta["source"] = {"path": str(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    writer.sections.insert(0, ("meta", json.dumps(meta).encode('utf-8')))
+    writer.write(path)
+    return meta
+
+
+# Reading
+
+def open_registry(path: Union[str, Path]) -> CompiledRegistry:
+    """
+    Memory-map a compiled registry read-only. Raises RegistryFormatError on
+    missing, truncated or incompatible files.
+    """
+    path = Path(path)
+    try:
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise RegistryFormatError(f"Cannot map {path}: {e}") from e
+
+    view = memoryview(mapping)
+    if len(view) < _HEADER.size:
+        raise RegistryFormatError(f"{path} is truncated")
+    magic, version, count, byte_order_mark, _ = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise RegistryFormatError(f"{path} is not a compiled registry")
+    if version != FORMAT_VERSION:
+        raise RegistryFormatError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+    if byte_order_mark != BYTE_ORDER_MARK:
+        raise RegistryFormatError(f"{path} was built on a machine with different byte order than {sys.byteorder}")
+
+    sections: Dict[str, memoryview] = {}
+    for position in range(count):
+        raw_name, offset, length = _SECTION.unpack_from(view, _HEADER.size + position * _SECTION.size)
+        if offset + length > len(view):
+            raise RegistryFormatError(f"{path} is truncated")
+        sections[raw_name.rstrip(b"\0").decode('ascii')] = view[offset:offset + length]
+
+    try:
+        return _wrap_sections(path, mapping, sections)
+    except (KeyError, ValueError, TypeError) as e:
+        raise RegistryFormatError(f"{path} is corrupt: {e}") from e
+
+
+def _wrap_sections(path: Path, mapping: mmap.mmap, sections: Dict[str, memoryview]) -> CompiledRegistry:
+    meta = json.loads(bytes(sections["meta"]))
+    u32 = lambda name: sections[name].cast('I')
+
+    values = MappedStrings(sections["values"])
+    columns = [
+        (column["name"], column["type"] == "json", u32(f"col.{position}"))
+        for position, column in enumerate(meta["columns"])
+    ]
+    records = MappedRecords(columns, values, meta["record_count"])
+
+    registration_index = SortedStringLookup(MappedStrings(sections["reg.keys"]), values=u32("reg.records"))
+
+    names = MappedStrings(sections["names"])
+    index = TrigramIndex.from_parts(
+        strings=names,
+        string_ids=SortedStringLookup(names, order=u32("names.order")),
+        postings=MappedPostings(MappedStrings(sections["gram.keys"]), u32("gram.offsets"), u32("gram.ids")),
+    )
+    name_tables = NameTables.from_parts(
+        meta["name_fields"],
+        index,
+        entry_record=u32("entry.record"),
+        entry_field=sections["entry.field"],
+        string_entry_offsets=u32("entry.offsets"),
+        tokens=MappedStrings(sections["tokens"]),
+        token_phonetic=MappedStrings(sections["tokens.phonetic"]),
+        string_token_offsets=u32("strtok.offsets"),
+        string_token_ids=u32("strtok.ids"),
+        phonetic_blocks=MappedPostings(
+            MappedStrings(sections["phonetic.keys"]), u32("phonetic.offsets"), u32("phonetic.ids")
+        ),
+    )
+    return CompiledRegistry(path, mapping, meta, records, registration_index, name_tables)
@@ -0,0 +1,260 @@
+"""
+Precomputed lookup tables for the advisor registry.
+Every name field of every record is normalized, tokenized and given phonetic
+blocking keys once at load time and stored in compact parallel arrays, and
+registration numbers are normalized into a hash index, so a search only does
+work proportional to the query.
+"""
+
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .fuzzy_index import TrigramIndex
+
+REGISTRATION_FIELDS = ['registrationNumber', 'regNo', 'licenseId', 'sebiRegNo']
+NAME_FIELDS = ['name', 'advisorName', 'entityName', 'companyName', 'firmName']
+
+_NON_WORD = re.compile(r'[^\w\s]')
+_REGISTRATION_SEPARATORS = re.compile(r'[^A-Z0-9]')
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize name for comparison: lowercase, no punctuation, single spaces
+    """
+    if not name:
+        return ""
+    return ' '.join(_NON_WORD.sub('', name.lower()).split())
+
+
+def normalize_registration(registration_number: str) -> str:
+    """
+    Canonical form of a registration number: uppercase with spaces, dashes and other separators removed
+    """
+    if not registration_number or not isinstance(registration_number, str):
+        return ""
+    return _REGISTRATION_SEPARATORS.sub('', registration_number.upper())
+
+
+def build_registration_index(records: Iterable[Dict], fields: Sequence[str] = REGISTRATION_FIELDS) -> Dict[str, int]:
+    """
+    Map canonical registration numbers to record positions. Only the canonical form is
+    indexed: a number with another prefix (INA/INH) or without one is a different number.
+    """
+    index: Dict[str, int] = {}
+    for position, record in enumerate(records):
+        for field in fields:
+            value = record.get(field)
+            if not value or not isinstance(value, str):
+                continue
+            canonical = normalize_registration(value)
+            if canonical:
+                # First record wins, as with a linear scan
+                index.setdefault(canonical, position)
+    return index
+
+
+def lookup_registration(registration_number: str, index: Mapping[str, int]) -> Optional[int]:
+    """
+    Resolve a registration number to a record position by exact canonical match
+    (separators, whitespace and case ignored)
+    """
+    canonical = normalize_registration(registration_number)
+    if not canonical:
+        return None
+    return index.get(canonical)
+
+
+def phonetic_key(token: str) -> str:
+    """
+    Soundex-style key so transliteration variants (Lakshmi/Laxmi, Shrma/Sharma) share a block
+    """
+    if not token:
+        return ""
+    first = token[0]
+    codes = [first]
+    previous = _SOUNDEX_CODES.get(first, '')
+    for char in token[1:]:
+        code = _SOUNDEX_CODES.get(char, '')
+        if code and code != previous:
+            codes.append(code)
+        if char not in 'hw':
+            previous = code
+    return ''.join(codes)[:4].ljust(4, '0')
+
+
+class PreparedQuery:
+    """
+    Query-side counterpart of the registry tables, computed once per search
+    """
+
+    __slots__ = ('normalized', 'tokens', 'phonetic_keys')
+
+    def __init__(self, name: str):
+        self.normalized = normalize_name(name)
+        self.tokens = self.normalized.split()
+        self.phonetic_keys = sorted({phonetic_key(token) for token in self.tokens})
+
+
+class NameTables:
+    """
+    Parallel arrays describing every (record, name field) entry of the registry.
+
+    strings are the distinct normalized names (owned by the trigram index);
+    entries are stored CSR-style per string: string_entry_offsets[s]..[s+1]
+    slices entry_record / entry_field. Tokens are interned and stored the same
+    way per string, and phonetic_blocks maps a phonetic key to string ids.
+    """
+
+    def __init__(self, field_names: Sequence[str], max_block_size: int = 2000, max_block_candidates: int = 64):
+        self.field_names = list(field_names)
+        self.max_block_size = max_block_size
+        self.max_block_candidates = max_block_candidates
+        self.index = TrigramIndex()
+        self.entry_record = array('I')
+        self.entry_field = array('B')
+        self.string_entry_offsets = array('I', [0])
+        self.tokens: List[str] = []
+        self.token_phonetic: List[str] = []
+        self.string_token_offsets = array('I', [0])
+        self.string_token_ids = array('I')
+        self.phonetic_blocks: Dict[str, array] = {}
+
+    @classmethod
+    def build(cls, records: Iterable[Dict], field_names: Sequence[str], **kwargs) -> 'NameTables':
+        """
+        Normalize, tokenize and index every name field of every record once
+        """
+        tables = cls(field_names, **kwargs)
+        token_ids: Dict[str, int] = {}
+        raw_entries: List[Tuple[int, int, int]] = []  # (string id, record, field)
+
+        for position, record in enumerate(records):
+            for field_position, field in enumerate(tables.field_names):
+                value = record.get(field)
+                if not value or not isinstance(value, str):
+                    continue
+                normalized = normalize_name(value)
+                if not normalized:
+                    continue
+                string_count = len(tables.index)
+                string_id = tables.index.add(normalized)
+                if string_id == string_count:
+                    tables._add_string_tokens(string_id, normalized, token_ids)
+                raw_entries.append((string_id, position, field_position))
+
+        # Group entries by string id (stable, so record order is preserved within a string)
+        raw_entries.sort(key=lambda entry: entry[0])
+        counts = [0] * len(tables.index)
+        for string_id, position, field_position in raw_entries:
+            tables.entry_record.append(position)
+            tables.entry_field.append(field_position)
+            counts[string_id] += 1
+        running = 0
+        for count in counts:
+            running += count
+            tables.string_entry_offsets.append(running)
+        return tables
+
+    @classmethod
+    def from_parts(cls, field_names: Sequence[str], index: TrigramIndex, **tables) -> 'NameTables':
+        """
+        Wrap prebuilt (e.g. memory-mapped) tables; keyword arguments name the
+        table attributes (entry_record, entry_field, string_entry_offsets, tokens,
+        token_phonetic, string_token_offsets, string_token_ids, phonetic_blocks)
+        """
+        name_tables = cls(field_names)
+        name_tables.index = index
+        for attribute, table in tables.items():
+            if not hasattr(name_tables, attribute):
+                raise TypeError(f"Unknown name table: {attribute}")
+            setattr(name_tables, attribute, table)
+        return name_tables
+
+    def _add_string_tokens(self, string_id: int, normalized: str, token_ids: Dict[str, int]):
+        keys = set()
+        for token in normalized.split():
+            token_id = token_ids.get(token)
+            if token_id is None:
+                token_id = token_ids[token] = len(self.tokens)
+                self.tokens.append(token)
+                self.token_phonetic.append(phonetic_key(token))
+            self.string_token_ids.append(token_id)
+            keys.add(self.token_phonetic[token_id])
+        self.string_token_offsets.append(len(self.string_token_ids))
+        for key in keys:
+            block = self.phonetic_blocks.get(key)
+            if block is None:
+                block = self.phonetic_blocks[key] = array('I')
+            block.append(string_id)
+
+    def string_tokens(self, string_id: int) -> List[str]:
+        start, end = self.string_token_offsets[string_id], self.string_token_offsets[string_id + 1]
+        return [self.tokens[token_id] for token_id in self.string_token_ids[start:end]]
+
+    def entries(self, string_id: int) -> Iterable[Tuple[int, int]]:
+        start, end = self.string_entry_offsets[string_id], self.string_entry_offsets[string_id + 1]
+        return zip(self.entry_record[start:end], self.entry_field[start:end])
+
+    def _block_candidates(self, query: PreparedQuery, exhaustive: bool = False) -> List[int]:
+        """
+        Strings sharing phonetic keys with the query tokens (selective blocks only):
+        the best max_block_candidates of them, or with exhaustive every one from
+        blocks of any size
+        """
+        blocks = [
+            self.phonetic_blocks[key] for key in query.phonetic_keys
+            if key in self.phonetic_blocks and (exhaustive or len(self.phonetic_blocks[key]) <= self.max_block_size)
+        ]
+        if not blocks:
+            return []
+        counts: Counter = Counter()
+        for block in blocks:
+            counts.update(block)
+        required = min(2, len(query.phonetic_keys))
+        return [
+            string_id for string_id, hits in counts.most_common(None if exhaustive else self.max_block_candidates)
+            if hits >= required
+        ]
+
+    def search(
+        self, name: Union[str, PreparedQuery], threshold: float, exhaustive: bool = False
+    ) -> List[Tuple[float, int, int]]:
+        """
+        Return (similarity, record index, field index) per matching record, using
+        the first name field (in field order) that reaches the threshold. Only the
+        most promising candidates are scored unless exhaustive is set.
+        """
+        query = name if isinstance(name, PreparedQuery) else PreparedQuery(name)
+        if not query.normalized:
+            return []
+
+        best: Dict[int, Tuple[int, float]] = {}
+        scored = self.index.search(
+            query.normalized, threshold, extra_candidates=self._block_candidates(query, exhaustive), exhaustive=exhaustive
+        )
+        for similarity, string_id in scored:
+            for position, field_position in self.entries(string_id):
+                current = best.get(position)
+                if current is None or field_position < current[0]:
+                    best[position] = (field_position, similarity)
+        return [(similarity, position, field_position) for position, (field_position, similarity) in best.items()]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            **self.index.get_stats(),
+            "entries": len(self.entry_record),
+            "tokens": len(self.tokens),
+            "phonetic_blocks": len(self.phonetic_blocks),
+        }
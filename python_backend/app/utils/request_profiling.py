@@ -0,0 +1,455 @@
+"""
+Opt-in per-request profiling for slow-request diagnosis.
+A request is profiled when it carries an X-Profile-Request header together
+with the admin token (header profiling is off while ADMIN_API_TOKEN is unset)
+or when it is picked by random sampling (REQUEST_PROFILING_SAMPLE_RATE). A profiled request gets:
+
+- a statistical profile: a sampler thread records the Python stack of every
+  thread working on the request (the event loop thread, and worker threads
+  while they are inside one of the request's stages) every few milliseconds;
+- stage timings from the stage() blocks in DocumentProcessor, GroqService and
+  SEBILiveVerificationService.
+
+Profiles are written as JSON to REQUEST_PROFILING_DIR, shared by all prefork
+workers, and served by the admin /profiles endpoints, also in the collapsed
+stack format read by flamegraph.pl and speedscope. When no profile is active
+a stage() block costs one context variable lookup.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-request"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+# Bounds on what one profile may hold
+MAX_STAGES = 2000
+MAX_STACK_DEPTH = 64
+
+_current_profile: contextvars.ContextVar[Optional['RequestProfile']] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profile", "name", "attrs", "started", "thread_id")
+
+    def __init__(self, profile: 'RequestProfile', name: str, attrs: Dict[str, Any]):
+        self.profile = profile
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.profile.attach(self.thread_id)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.add_stage(self.name, self.started, time.perf_counter(), self.attrs, exc_type)
+        self.profile.detach(self.thread_id)
+        return False
+
+
+def stage(name: str, **attrs):
+    """
+    Time a block as a stage of the current request's profile, e.g.
+    `with stage("sebi.fetch", url=url): ...`; a no-op when the request is not profiled
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return _NULL_STAGE
+    return _Stage(profile, name, attrs)
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    Carry the current profile into a function handed to a thread pool (executor.submit
+    does not copy context variables the way asyncio.to_thread does)
+    """
+    if _current_profile.get() is None:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, trigger: str, interval_s: float):
+        self.id = f"{time.strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(4)}"
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.interval_s = interval_s
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration_s: Optional[float] = None
+        self.status: Optional[int] = None
+        self.stages: List[Dict[str, Any]] = []
+        self.dropped_stages = 0
+        self.stacks: Counter = Counter()
+        self.sample_count = 0
+        # thread id -> number of open stages (the event loop thread is attached for the whole request)
+        self._threads: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, thread_id: int):
+        with self._lock:
+            self._threads[thread_id] = self._threads.get(thread_id, 0) + 1
+
+    def detach(self, thread_id: int):
+        with self._lock:
+            remaining = self._threads.get(thread_id, 0) - 1
+            if remaining > 0:
+                self._threads[thread_id] = remaining
+            else:
+                self._threads.pop(thread_id, None)
+
+    def threads(self) -> List[int]:
+        with self._lock:
+            return list(self._threads)
+
+    def add_stage(self, name: str, started: float, ended: float, attrs: Dict[str, Any], exc_type=None):
+        entry = {
+            "name": name,
+            "start_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round((ended - started) * 1000, 3),
+            "thread": threading.current_thread().name,
+        }
+        if attrs:
+            entry["attrs"] = {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                              for key, value in attrs.items()}
+        if exc_type is not None:
+            entry["error"] = exc_type.__name__
+        with self._lock:
+            if len(self.stages) < MAX_STAGES:
+                self.stages.append(entry)
+            else:
+                self.dropped_stages += 1
+
+    def add_sample(self, stack: str):
+        with self._lock:
+            self.stacks[stack] += 1
+            self.sample_count += 1
+
+    def finish(self, status: Optional[int]):
+        self.status = status
+        self.duration_s = time.perf_counter() - self.started
+
+    def stage_totals(self) -> Dict[str, Dict[str, float]]:
+        totals: Dict[str, Dict[str, float]] = {}
+        for entry in self.stages:
+            total = totals.setdefault(entry["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            total["count"] += 1
+            total["total_ms"] = round(total["total_ms"] + entry["duration_ms"], 3)
+            total["max_ms"] = max(total["max_ms"], entry["duration_ms"])
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["total_ms"]))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_s * 1000, 3) if self.duration_s is not None else None,
+            "pid": os.getpid(),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return {
+            **self.summary(),
+            "sample_interval_ms": round(self.interval_s * 1000, 3),
+            "sample_count": self.sample_count,
+            "stage_totals": self.stage_totals(),
+            "stages": self.stages,
+            "dropped_stages": self.dropped_stages,
+            # Collapsed stacks (root first, frames joined by ';') -> samples
+            "stacks": dict(stacks),
+        }
+
+
+class StackSampler:
+    """
+    One background thread sampling the attached threads of every active profile
+    """
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._profiles: List[RequestProfile] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._frame_names: Dict[Any, str] = {}
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: RequestProfile):
+        with self._lock:
+            if profile in self._profiles:
+                self._profiles.remove(profile)
+
+    @property
+    def active(self) -> int:
+        return len(self._profiles)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_s)
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    # Stop with the last profile; add() starts a new thread when needed
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in profiles:
+                for thread_id in profile.threads():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        profile.add_sample(self._collapse(frame))
+            del frames
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            name = self._frame_names.get(code)
+            if name is None:
+                name = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+                self._frame_names[code] = name
+            names.append(name)
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+def _short_path(filename: str) -> str:
+    # Keep the package-relative part of library and application paths
+    for marker in ("site-packages/", "dist-packages/", "python_backend/"):
+        index = filename.rfind(marker)
+        if index >= 0:
+            return filename[index + len(marker):]
+    return filename
+
+
+class ProfileStore:
+    """
+    Profiles as JSON files in one directory, keeping the newest `keep`
+    """
+
+    def __init__(self, directory: Path, keep: int = 50):
+        self.directory = directory
+        self.keep = keep
+
+    def save(self, profile: RequestProfile):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{profile.id}.json"
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(profile.to_dict()))
+            os.replace(tmp_path, path)
+            self._prune()
+        except OSError as e:
+            logger.error(f"Could not store request profile {profile.id}: {str(e)}")
+
+    def _paths(self) -> List[Path]:
+        try:
+            paths = [(path.stat().st_mtime_ns, path) for path in self.directory.glob("*.json")]
+        except OSError:
+            return []
+        return [path for _, path in sorted(paths, key=lambda item: (item[0], item[1].name), reverse=True)]
+
+    def _prune(self):
+        for path in self._paths()[self.keep:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        summaries = []
+        for path in self._paths():
+            profile = self._read(path)
+            if profile is not None:
+                summaries.append({key: profile.get(key) for key in (
+                    "id", "method", "path", "status", "trigger", "started_at", "duration_ms", "pid", "sample_count"
+                )})
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        return self._read(self.directory / f"{profile_id}.json")
+
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+
+def collapsed_stacks(profile: Dict[str, Any]) -> str:
+    """
+    A stored profile's samples as collapsed stacks, one "frame;frame;frame count" per line
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in profile.get("stacks", {}).items())
+
+
+class RequestProfiler:
+    def __init__(
+        self,
+        store: ProfileStore,
+        sample_rate: float = 0.0,
+        header_enabled: bool = True,
+        interval_s: float = 0.005,
+        max_active: int = 2,
+        min_duration_s: float = 0.0,
+        admin_token: Optional[str] = None,
+    ):
+        """
+        sample_rate: share of requests profiled without being asked to; min_duration_s:
+        sampled profiles of faster requests are discarded (header-triggered ones are kept)
+        """
+        self.store = store
+        self.sample_rate = sample_rate
+        self.header_enabled = header_enabled
+        self.max_active = max_active
+        self.min_duration_s = min_duration_s
+        self.admin_token = admin_token
+        self.sampler = StackSampler(interval_s)
+        self._stats = {"profiled": 0, "stored": 0, "skipped_busy": 0, "rejected_token": 0}
+
+    @classmethod
+    def from_env(cls) -> 'RequestProfiler':
+        directory = os.getenv("REQUEST_PROFILING_DIR") or str(Path(tempfile.gettempdir()) / "sebi-request-profiles")
+        return cls(
+            ProfileStore(Path(directory), keep=int(os.getenv("REQUEST_PROFILING_KEEP", "50"))),
+            sample_rate=float(os.getenv("REQUEST_PROFILING_SAMPLE_RATE", "0")),
+            header_enabled=os.getenv("REQUEST_PROFILING_HEADER", "1") != "0",
+            interval_s=float(os.getenv("REQUEST_PROFILING_INTERVAL_MS", "5")) / 1000,
+            max_active=int(os.getenv("REQUEST_PROFILING_MAX_ACTIVE", "2")),
+            min_duration_s=float(os.getenv("REQUEST_PROFILING_MIN_MS", "0")) / 1000,
+            admin_token=os.getenv("ADMIN_API_TOKEN"),
+        )
+
+    def trigger_for(self, scope) -> Optional[str]:
+        """
+        "header", "sampled" or None for a request that is not to be profiled
+        """
+        if self.header_enabled:
+            requested = False
+            token = None
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    requested = value not in (b"", b"0")
+                elif name == b"x-admin-token":
+                    token = value
+            if requested:
+                if not self.admin_token or token is None or not secrets.compare_digest(token, self.admin_token.encode()):
+                    self._stats["rejected_token"] += 1
+                    return None
+                return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def begin(self, scope, trigger: str) -> Optional[RequestProfile]:
+        if self.sampler.active >= self.max_active:
+            self._stats["skipped_busy"] += 1
+            return None
+        profile = RequestProfile(scope["method"], scope["path"], trigger, self.sampler.interval_s)
+        profile.attach(threading.get_ident())
+        self.sampler.add(profile)
+        self._stats["profiled"] += 1
+        return profile
+
+    def end(self, profile: RequestProfile, status: Optional[int]):
+        self.sampler.remove(profile)
+        profile.finish(status)
+        if profile.trigger == "sampled" and profile.duration_s < self.min_duration_s:
+            return
+        self.store.save(profile)
+        self._stats["stored"] += 1
+        top = ", ".join(f"{name} {total['total_ms']:.0f}ms" for name, total in list(profile.stage_totals().items())[:5])
+        logger.info(f"Profiled {profile.method} {profile.path} ({profile.trigger}) in "
+                    f"{profile.duration_s * 1000:.0f}ms, {profile.sample_count} samples, "
+                    f"profile {profile.id}: {top or 'no stages'}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "header_enabled": self.header_enabled,
+            "active": self.sampler.active,
+            "directory": str(self.store.directory),
+            **self._stats,
+        }
+
+
+class RequestProfilingMiddleware:
+    """
+    ASGI middleware profiling the requests picked by the profiler; adds an
+    X-Profile-Id response header naming the stored profile
+    """
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trigger = self.profiler.trigger_for(scope)
+        profile = self.profiler.begin(scope, trigger) if trigger else None
+        if profile is None:
+            return await self.app(scope, receive, send)
+
+        status = None
+
+        async def send_with_profile_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (PROFILE_ID_HEADER.lower().encode(), profile.id.encode())]}
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _current_profile.reset(token)
+            self.profiler.end(profile, status)
@@ -1,4 +1,5 @@
 from .document_processor import DocumentProcessor
+from .memory_tracking import document_memory, memory_stage
 from typing import Dict, List, Any
 
 document_processor = DocumentProcessor()
@@ -13,6 +14,13 @@ def combine_text_data(text_data: dict, file_results: List[Dict[str, Any]]) -> Di
     """
     Combine text data and processed file contents into a structured analysis input
     """
+    with document_memory.track("combine_text_data", label=f"{len(file_results)} documents") as memory:
+        if memory is not None:
+            memory.input_bytes = sum(len(result.get("text", "")) for result in file_results)
+        with memory_stage("combine_text_data"):
+            return _combine_text_data(text_data, file_results)
+
+def _combine_text_data(text_data: dict, file_results: List[Dict[str, Any]]) -> Dict[str, Any]:
     combined_data = {
         "text_input": {
             "links": text_data.get('links', ''),
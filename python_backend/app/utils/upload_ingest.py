@@ -0,0 +1,207 @@
+"""
+Streaming upload ingestion.
+Uploads are copied to disk in fixed-size chunks instead of being read into
+memory at once. The file type is taken from the magic bytes of the first
+chunk (the client's filename and content type are not trusted; a ZIP only
+counts as DOCX once word/document.xml is found in it), and the
+ProcessorConfig size limit for that type is enforced while copying, so an
+oversized or unsupported file is abandoned after at most one chunk past the
+limit. RequestSizeLimitMiddleware rejects oversized request bodies before
+the multipart parser spools them.
+"""
+
+import os
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi import UploadFile
+
+from .processor_config import ProcessorConfig
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+TEXT_BOMS = (b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")
+# The main part every Word document has; other OOXML/zip containers are not processed
+DOCX_MAIN_PART = "word/document.xml"
+# The first chunk is at least this long so the signatures (and the text heuristic) have enough to go on
+SNIFF_BYTES = 4096
+
+
+class UploadRejected(Exception):
+    """Raised when an upload is too large or not a supported document type"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class SpooledUpload:
+    filename: Optional[str]
+    path: str
+    file_type: str
+    size: int
+
+
+def sniff_file_type(head: bytes, filename: Optional[str] = None) -> Optional[str]:
+    """
+    '.pdf', '.docx' or '.txt' from the first bytes of a file, or None when unsupported.
+    '.docx' only means a ZIP that may be a Word document; is_word_document() confirms it.
+    """
+    if head.startswith(PDF_MAGIC):
+        return '.pdf'
+    if head.startswith(ZIP_MAGIC):
+        # Any OOXML/zip container starts like this; the central directory is checked once spooled
+        if b"word/" in head or b"[Content_Types].xml" in head or (filename or "").lower().endswith(".docx"):
+            return '.docx'
+        return None
+    if head.startswith(TEXT_BOMS):
+        return '.txt'
+    # Plain text: no NUL bytes and mostly printable
+    if b"\x00" in head:
+        return None
+    sample = head[:SNIFF_BYTES]
+    printable = sum(1 for byte in sample if byte >= 32 or byte in b"\t\n\r\f")
+    return '.txt' if sample and printable / len(sample) > 0.95 else None
+
+
+def is_word_document(path: str) -> bool:
+    """
+    True when the file is a readable ZIP containing word/document.xml
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return DOCX_MAIN_PART in archive.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+def format_size(num_bytes: int) -> str:
+    """
+    A size limit for error messages, in the largest of MB, KB and bytes it fills at least once
+    """
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes // (1024 * 1024)}MB"
+    if num_bytes >= 1024:
+        return f"{num_bytes // 1024}KB"
+    return f"{num_bytes} bytes"
+
+
+async def spool_upload(
+    upload: UploadFile,
+    config: ProcessorConfig,
+    directory: Optional[Path] = None,
+) -> SpooledUpload:
+    """
+    Copy an upload to a temporary file named after its sniffed type, chunk by chunk.
+    Raises UploadRejected (413/415) and removes the partial file when a limit is hit.
+    """
+    chunk_size = config.upload_chunk_bytes
+    head = await upload.read(max(chunk_size, SNIFF_BYTES))
+    file_type = sniff_file_type(head, upload.filename)
+    if file_type is None:
+        raise UploadRejected(f"Unsupported file type: {upload.filename}", 415)
+
+    max_size = config.max_size_bytes(file_type)
+    # The multipart parser already knows the size of the spooled part; reject without copying
+    if upload.size is not None and upload.size > max_size:
+        raise UploadRejected(_too_large(upload.filename, file_type, max_size), 413)
+
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=file_type, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadRejected(_too_large(upload.filename, file_type, max_size), 413)
+                out.write(chunk)
+                chunk = await upload.read(chunk_size)
+        if file_type == '.docx' and not is_word_document(path):
+            raise UploadRejected(f"Unsupported file type: {upload.filename} (not a Word document)", 415)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return SpooledUpload(upload.filename, path, file_type, size)
+
+
+def _too_large(filename: Optional[str], file_type: str, max_size: int) -> str:
+    return f"File too large: {filename} (maximum {format_size(max_size)} for {file_type} files)"
+
+
+def remove_spooled(uploads: Iterable[SpooledUpload]):
+    for upload in uploads:
+        try:
+            os.unlink(upload.path)
+        except FileNotFoundError:
+            pass
+
+
+class RequestSizeLimitMiddleware:
+    """
+    ASGI middleware answering 413 for request bodies over max_bytes on the given path
+    prefixes, from Content-Length up front or by counting a chunked body as it arrives
+    """
+
+    def __init__(self, app, max_bytes: int, path_prefixes: Iterable[str] = ("/",)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            return await self._reject(send)
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    too_large = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if too_large:
+                # The app turned the aborted body into its own error response; answer 413 instead
+                if message["type"] == "http.response.start" and not response_started:
+                    response_started = True
+                    await self._reject(send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if not response_started:
+                await self._reject(send)
+
+    async def _reject(self, send):
+        body = f'{{"detail":"Request body too large (maximum {format_size(self.max_bytes)})"}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class _BodyTooLarge(Exception):
+    pass
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark for HTML extraction backends used by SEBI live verification.
+
+Generates synthetic SEBI-like listing pages (navigation, scripts and a large
+intermediaries table) and reports per-page parse cost for every installed
+backend, plus the cost of the old substring name check versus token-set matching.
+
+Usage (from python_backend/):
+    python -m benchmarks.bench_html_parsing --rows 2000 --repeat 20
+"""
+
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.html_extraction import BACKENDS, available_backends, name_matches_tokens, tokenize
+
+FIRST_NAMES = ["Rajesh", "Priya", "Amit", "Sunita", "Vikram", "Anjali", "Suresh", "Kavita", "Arjun", "Meera"]
+LAST_NAMES = ["Kumar", "Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Nair", "Singh", "Mehta", "Joshi"]
+
+
+def build_page(rows: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    nav = ''.join(
+        f'<li><a href="/sebiweb/other/OtherAction.do?intmId={i}">Research Analyst list {i}</a></li>'
+        for i in range(60)
+    )
+    body_rows = ''.join(
+        f'<tr><td>{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}</td>'
+        f'<td>INH{rng.randint(0, 999999999):09d}</td>'
+        f'<td>{rng.choice(LAST_NAMES)} Advisory &amp; Research Pvt Ltd</td>'
+        f'<td><a href="mailto:contact{i}@example.in">contact{i}@example.in</a></td></tr>'
+        for i in range(rows)
+    )
+    script = '<script>' + 'var x = 1;' * 500 + '</script>'
+    return (
+        f'<html><head><title>Intermediaries</title>{script}<style>td{{color:red}}</style></head>'
+        f'<body><ul>{nav}</ul><table>{body_rows}</table></body></html>'
+    )
+
+
+def time_call(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def legacy_name_check(page_text: str, name: str) -> bool:
+    name_parts = name.lower().split()
+    return len(name_parts) >= 2 and sum(1 for part in name_parts if part in page_text) >= 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="table rows per synthetic page")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    html = build_page(args.rows)
+    print(f"Synthetic page: {len(html) / 1024:.0f} KiB, {args.rows} rows")
+    print(f"{'backend':<15}{'median ms':>12}{'min ms':>10}{'anchors':>10}")
+
+    text = None
+    for name in available_backends():
+        extractor = BACKENDS[name][1]
+        median, best = time_call(lambda: extractor(html), args.repeat)
+        text, links = extractor(html)
+        print(f"{name:<15}{median:>12.2f}{best:>10.2f}{len(links):>10}")
+
+    names = [f"{f} {l}" for f in FIRST_NAMES for l in LAST_NAMES] + ["Unknown Person Name"]
+    tokens = tokenize(text)
+    legacy, _ = time_call(lambda: [legacy_name_check(text, n) for n in names], args.repeat)
+    token_set, _ = time_call(lambda: [name_matches_tokens(n, tokens) for n in names], args.repeat)
+    tokenize_cost, _ = time_call(lambda: tokenize(text), args.repeat)
+    print(f"\nName matching for {len(names)} names against one page:")
+    print(f"  substring scans : {legacy:8.3f} ms")
+    print(f"  token-set lookup: {token_set:8.3f} ms (+ {tokenize_cost:.3f} ms one-off tokenization, cached per page)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Offline benchmark for advisor matching at registry scale.
+
+Generates synthetic Indian-name registries (benchmarks/synthetic_registry.py),
+loads each one through SEBIAdvisorService exactly as the API does, and runs
+noisy name and registration-number queries against it. Reports per registry
+size and storage mode:
+
+    build     index build / load time and resident memory
+    latency   p50 / p90 / p99 / max for name search, registration lookup and verify_advisor
+    recall    recall@1 and recall@k for name search, recall@1 for registration lookup
+
+A name hit counts when the queried record, or a record with the identical
+registry name, is in the top k. Every size runs in a fresh process so memory
+numbers do not leak between runs. No network access is needed.
+
+Usage (from python_backend/):
+    python -m benchmarks.bench_registry_matching
+    python -m benchmarks.bench_registry_matching --sizes 10000 100000 --queries 2000 --mode json mmap
+    python -m benchmarks.bench_registry_matching --json results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_registry import generate_queries, generate_registry
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # Not Linux: fall back to the peak, which is the best portable number
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "p50": round(pick(0.50), 3),
+        "p90": round(pick(0.90), 3),
+        "p99": round(pick(0.99), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return value, (time.perf_counter() - start) * 1000
+
+
+def run_size(size: int, mode: str, query_count: int, k: int, seed: int) -> Dict:
+    """
+    Build one registry and measure it; runs in its own process
+    """
+    from app.services.sebi_advisor_service import SEBIAdvisorService
+    from app.utils.registry_format import write_registry
+
+    records = generate_registry(size, seed)
+    queries = list(generate_queries(records, query_count, seed + 1))
+
+    with tempfile.TemporaryDirectory(prefix="sebi_bench_") as workdir:
+        data_file = Path(workdir) / "sebi_advisors.json"
+        registry_file = Path(workdir) / "sebi_advisors.reg"
+        with open(data_file, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        del records
+
+        result = {"size": size, "mode": mode}
+        if mode == "mmap":
+            # The compile step runs once per registry update, outside the API workers
+            with contextlib.redirect_stdout(io.StringIO()):
+                with open(data_file, encoding="utf-8") as f:
+                    compile_input = json.load(f)
+                _, compile_ms = timed(write_registry, compile_input, registry_file, source=data_file)
+                del compile_input
+            result["compile_s"] = round(compile_ms / 1000, 3)
+            result["file_mb"] = round(registry_file.stat().st_size / 2**20, 1)
+
+        rss_before = current_rss_mb()
+        with contextlib.redirect_stdout(io.StringIO()):
+            service, load_ms = timed(SEBIAdvisorService, data_file=data_file, registry_file=registry_file)
+        assert service.snapshot.storage == mode, f"expected {mode} storage, got {service.snapshot.storage}"
+        result["load_s"] = round(load_ms / 1000, 3)
+        result["rss_after_load_mb"] = round(current_rss_mb() - rss_before, 1)
+
+        records = service.advisor_data
+        truth_names = {position: records[position]["name"] for position, _, _ in queries}
+        truth_regs = {position: records[position]["registrationNumber"] for position, _, _ in queries}
+
+        name_ms, reg_ms, verify_ms = [], [], []
+        name_hits_1 = name_hits_k = reg_hits = 0
+        for position, name, registration in queries:
+            matches, elapsed = timed(service.search_advisor_by_name, name, 0.7, k)
+            name_ms.append(elapsed)
+            hits = [
+                rank for rank, match in enumerate(matches)
+                if match.get("name") == truth_names[position]
+            ]
+            name_hits_1 += bool(hits and hits[0] == 0)
+            name_hits_k += bool(hits)
+
+            match, elapsed = timed(service.search_advisor_by_registration, registration)
+            reg_ms.append(elapsed)
+            reg_hits += bool(match and match.get("registrationNumber") == truth_regs[position])
+
+            # Half the verifications carry a registration number, half are name-only
+            advisor = {"name": name, "registrationNumber": registration if position % 2 else None}
+            _, elapsed = timed(service.verify_advisor, advisor)
+            verify_ms.append(elapsed)
+
+        result.update({
+            "queries": len(queries),
+            "name_search_ms": percentiles(name_ms),
+            "registration_lookup_ms": percentiles(reg_ms),
+            "verify_advisor_ms": percentiles(verify_ms),
+            "name_recall@1": round(name_hits_1 / len(queries), 4),
+            f"name_recall@{k}": round(name_hits_k / len(queries), 4),
+            "registration_recall@1": round(reg_hits / len(queries), 4),
+            "rss_after_queries_mb": round(current_rss_mb() - rss_before, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "name_index": service.get_stats()["name_index"],
+        })
+        return result
+
+
+def print_report(results: List[Dict], k: int):
+    print(f"\n{'size':>9} {'mode':<5} {'build s':>8} {'load s':>7} {'rss MB':>7} "
+          f"{'name p50/p99 ms':>16} {'reg p50/p99 ms':>15} {'verify p50/p99':>15} "
+          f"{'name@1':>7} {f'name@{k}':>7} {'reg@1':>6}")
+    for r in results:
+        build = r.get("compile_s", r["load_s"])
+        print(
+            f"{r['size']:>9,} {r['mode']:<5} {build:>8.2f} {r['load_s']:>7.3f} {r['rss_after_queries_mb']:>7.0f} "
+            f"{r['name_search_ms']['p50']:>7.2f}/{r['name_search_ms']['p99']:<8.2f}"
+            f"{r['registration_lookup_ms']['p50']:>7.3f}/{r['registration_lookup_ms']['p99']:<7.3f}"
+            f"{r['verify_advisor_ms']['p50']:>7.2f}/{r['verify_advisor_ms']['p99']:<7.2f}"
+            f"{r['name_recall@1']:>7.3f} {r[f'name_recall@{k}']:>7.3f} {r['registration_recall@1']:>6.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="registry sizes to generate")
+    parser.add_argument("--mode", nargs="+", choices=["json", "mmap"], default=["json", "mmap"],
+                        help="json: parse the JSON and build indexes at load; mmap: compiled registry file")
+    parser.add_argument("--queries", type=int, default=1000, help="noisy queries per registry")
+    parser.add_argument("-k", type=int, default=5, help="k for name recall@k (verify_advisor keeps the top 5)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", type=Path, default=None, help="also write the full results to this file")
+    args = parser.parse_args()
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for size in args.sizes:
+        for mode in args.mode:
+            print(f"Running {size:,} records ({mode})...", flush=True)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results.append(pool.submit(run_size, size, mode, args.queries, args.k, args.seed).result())
+
+    print_report(results, args.k)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+        print(f"\nFull results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
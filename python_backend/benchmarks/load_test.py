@@ -0,0 +1,391 @@
+"""
+End-to-end load test of the API against stubbed upstreams.
+
+Starts the Groq and SEBI stand-ins (benchmarks/stub_upstreams.py) with the
+requested latency and error injection, starts the API in a subprocess pointed
+at them (or uses --target), then drives a mix of
+
+    analyze   POST /api/v1/offers/analyze with offer text and 0-2 attached
+              TXT, PDF or DOCX documents
+    verify    POST /api/v1/advisors/verify for advisors listed on the SEBI
+              stub, unknown advisors and names matching the fraud patterns
+
+either closed-loop (--concurrency clients sending back to back) or open-loop
+(--rate requests per second, Poisson arrivals, so queueing under overload shows
+up in the latencies). Requests in the first --warmup seconds are not counted.
+Reports throughput, latency percentiles, status codes and error rates per
+endpoint, plus the upstream stubs' counters.
+
+Usage (from python_backend/):
+    python -m benchmarks.load_test --duration 30 --concurrency 16
+    python -m benchmarks.load_test --rate 20 --mix analyze=1,verify=3 --groq-latency-ms 800 --groq-error-rate 0.05
+    python -m benchmarks.load_test --server-workers 4 --json results.json
+    python -m benchmarks.load_test --target http://localhost:5000 --duration 60
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.stub_upstreams import FaultProfile, StubServer, create_groq_stub, create_sebi_stub
+from benchmarks.synthetic_registry import generate_registry
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ENDPOINTS = {
+    "analyze": "/api/v1/offers/analyze",
+    "verify": "/api/v1/advisors/verify",
+}
+
+OFFER_SENTENCES = [
+    "Join our premium Telegram group for assured 5% weekly returns on F&O trades.",
+    "Guaranteed doubling of your capital in 90 days with our AI trading bot.",
+    "Our SEBI registered research analysts publish model portfolios every quarter.",
+    "Limited slots left: pay the onboarding fee of Rs 25,000 today to get intraday tips.",
+    "Past performance is not indicative of future returns. Read the risk disclosure carefully.",
+    "Invest Rs 1,00,000 and receive Rs 10,000 every month for two years, fully risk free.",
+    "Contact our relationship manager on WhatsApp at +91 98765 43210 for the IPO allotment scheme.",
+    "The fund invests in large-cap equities with a long-term horizon of five years or more.",
+]
+
+
+def pdf_bytes(lines: List[str]) -> bytes:
+    """
+    Minimal single-page PDF with a text layer (Helvetica), readable by PyPDF2
+    """
+    escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+    stream = "BT /F1 11 Tf 50 760 Td 14 TL " + " ".join(f"({line}) '" for line in escaped) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def docx_bytes(lines: List[str]) -> Optional[bytes]:
+    try:
+        from docx import Document
+    except ImportError:
+        return None
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def build_documents(rng: random.Random, count: int = 24) -> List[Tuple[str, bytes, str]]:
+    """
+    (filename, content, content type) samples of every supported type, 5 to 60 sentences each
+    """
+    documents = []
+    for index in range(count):
+        lines = [rng.choice(OFFER_SENTENCES) for _ in range(rng.randint(5, 60))]
+        kind = index % 3
+        if kind == 0:
+            documents.append((f"offer_{index}.pdf", pdf_bytes(lines), "application/pdf"))
+            continue
+        if kind == 1:
+            content = docx_bytes(lines)
+            if content is not None:
+                documents.append((f"offer_{index}.docx", content,
+                                  "application/vnd.openxmlformats-officedocument.wordprocessingml.document"))
+                continue
+        documents.append((f"offer_{index}.txt", "\n".join(lines).encode(), "text/plain"))
+    return documents
+
+
+def write_offer_documents(directory: Path, line_count: int = 2500, seed: int = 3) -> Dict[str, Path]:
+    """
+    offer.txt, offer.pdf and offer.docx with the same lines, for the per-MB memory tests.
+    The lines vary, so the DOCX compresses about as well as a real document; the default
+    size keeps fixed costs from dominating while staying below spaCy's 1M character limit.
+    """
+    rng = random.Random(seed)
+    names = ["Rahul Sharma", "Priya Nair", "Amit Verma", "Sneha Iyer", "Vikram Rao", "Anjali Mehta"]
+    lines = [f"{rng.choice(OFFER_SENTENCES)} Ref {rng.randint(10**5, 10**9)}: {rng.choice(names)} "
+             f"promises {rng.randint(1, 99)}% by {rng.randint(1, 28)}/{rng.randint(1, 12)}/2025."
+             for _ in range(line_count)]
+    paths = {}
+    for ext, content in ((".txt", "\n".join(lines).encode()), (".pdf", pdf_bytes(lines)), (".docx", docx_bytes(lines))):
+        if content is not None:
+            paths[ext] = directory / f"offer{ext}"
+            paths[ext].write_bytes(content)
+    return paths
+
+
+class TrafficMix:
+    def __init__(self, weights: Dict[str, float], advisors: List[Dict], seed: int = 11):
+        self.rng = random.Random(seed)
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.advisors = advisors
+        self.documents = build_documents(self.rng)
+
+    def next_request(self) -> Tuple[str, Dict[str, Any]]:
+        name = self.rng.choices(self.names, self.weights)[0]
+        return name, getattr(self, f"_{name}")()
+
+    def _analyze(self) -> Dict[str, Any]:
+        advisor = self.rng.choice(self.advisors)
+        text_data = {
+            "companyName": advisor.get("companyName", "Wealth Growth Partners"),
+            "advisorName": advisor["name"].title() if self.rng.random() < 0.7 else "Rahul Investment Guru",
+            "links": self.rng.choice(["https://t.me/assured_returns", "https://example.in/offer", ""]),
+            "emails": self.rng.choice(["desk@wealthgrowth.in", "support.gains@gmail.com", ""]),
+            "contactInfo": "+91 98765 43210",
+        }
+        files = [("files", document) for document in self.rng.sample(self.documents, self.rng.choice([0, 1, 1, 2]))]
+        return {"data": {"textData": json.dumps(text_data)}, "files": files or None}
+
+    def _verify(self) -> Dict[str, Any]:
+        roll = self.rng.random()
+        if roll < 0.6:
+            advisor = self.rng.choice(self.advisors)
+            data = {"name": advisor["name"].title(), "companyName": advisor.get("companyName", "")}
+            if self.rng.random() < 0.5:
+                data["registrationNumber"] = advisor["registrationNumber"]
+        elif roll < 0.85:
+            data = {"name": f"{self.rng.choice(['Karan', 'Neha', 'Rohit', 'Pooja'])} "
+                            f"{self.rng.choice(['Malhotra', 'Bansal', 'Kapoor', 'Saxena'])} {self.rng.randint(1, 10**6)}",
+                    "registrationNumber": f"INH{self.rng.randint(0, 10**9 - 1):09d}"}
+        else:
+            data = {"name": "Quick Profit Scam Advisors", "companyName": "Guaranteed Returns Fraud Ltd",
+                    "contactInfo": "9999999999"}
+        return {"data": data, "files": None}
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, status: str, latency_ms: float):
+        self.latencies_ms.append(latency_ms)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self, elapsed_s: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+        count = len(latencies)
+        ok = sum(value for status, value in self.statuses.items() if status.startswith("2"))
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(count - 1, int(p / 100 * count))], 1)
+
+        return {
+            "requests": count,
+            "throughput_rps": round(count / elapsed_s, 2) if elapsed_s else 0.0,
+            "error_rate": round(1 - ok / count, 4) if count else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+            "latency_ms": {"p50": percentile(50), "p90": percentile(90), "p99": percentile(99),
+                           "max": round(latencies[-1], 1) if latencies else None},
+        }
+
+
+class LoadRunner:
+    def __init__(self, base_url: str, mix: TrafficMix, duration_s: float, warmup_s: float,
+                 concurrency: int, rate: Optional[float], timeout_s: float):
+        self.base_url = base_url
+        self.mix = mix
+        self.duration_s = duration_s
+        self.warmup_s = warmup_s
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout_s = timeout_s
+        self.stats = {name: EndpointStats() for name in ENDPOINTS}
+        self._measure_from = 0.0
+
+    async def run(self) -> Dict[str, Any]:
+        limits = httpx.Limits(max_connections=max(self.concurrency, 256), max_keepalive_connections=256)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout_s, limits=limits) as client:
+            started = time.monotonic()
+            self._measure_from = started + self.warmup_s
+            end = self._measure_from + self.duration_s
+            if self.rate:
+                await self._open_loop(client, end)
+            else:
+                await asyncio.gather(*(self._closed_loop(client, end) for _ in range(self.concurrency)))
+        return {name: stats.summary(self.duration_s) for name, stats in self.stats.items() if stats.latencies_ms}
+
+    async def _closed_loop(self, client: httpx.AsyncClient, end: float):
+        while time.monotonic() < end:
+            await self._send(client)
+
+    async def _open_loop(self, client: httpx.AsyncClient, end: float):
+        rng = random.Random(5)
+        pending = set()
+        next_at = time.monotonic()
+        while next_at < end:
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+            task = asyncio.create_task(self._send(client))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            next_at += rng.expovariate(self.rate)
+        await asyncio.gather(*pending)
+
+    async def _send(self, client: httpx.AsyncClient):
+        name, request = self.mix.next_request()
+        sent_at = time.monotonic()
+        try:
+            response = await client.post(ENDPOINTS[name], data=request["data"], files=request["files"])
+            status = str(response.status_code)
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if sent_at >= self._measure_from:
+            self.stats[name].record(status, (time.monotonic() - sent_at) * 1000)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(port: int, groq_url: str, sebi_url: str, workers: int, cache_dir: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "GROQ_API_KEY": "load-test-stub",
+        "GROQ_BASE_URL": groq_url,
+        "SEBI_BASE_URL": sebi_url,
+        "SEBI_HTTP_CACHE_DIR": cache_dir,
+        "SEBI_REGISTRY_WATCH": "0",
+    }
+    if workers > 0:
+        code = ("import main; from app.utils.prefork import PreforkServer; "
+                f"PreforkServer('main:app', host='127.0.0.1', port={port}, workers={workers}, "
+                "preload=main.preload, post_fork=main.post_fork, log_level='warning').run()")
+        command = [sys.executable, "-c", code]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+
+def wait_healthy(base_url: str, process: Optional[subprocess.Popen], timeout_s: float = 120.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"API server at {base_url} did not become healthy within {timeout_s:.0f}s")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{'endpoint':<10} {'requests':>8} {'rps':>8} {'errors':>7} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9}  statuses")
+    for name, summary in report["endpoints"].items():
+        latency = summary["latency_ms"]
+        print(f"{name:<10} {summary['requests']:>8} {summary['throughput_rps']:>8} "
+              f"{summary['error_rate'] * 100:>6.1f}% {latency['p50']:>9} {latency['p90']:>9} "
+              f"{latency['p99']:>9} {latency['max']:>9}  {summary['statuses']}")
+    for name, counters in report.get("upstreams", {}).items():
+        print(f"{name} stub: {counters}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Base URL of an already running API (skips starting one)")
+    parser.add_argument("--server-workers", type=int, default=0,
+                        help="Start the API under the prefork server with this many workers (default: one uvicorn process)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before the measurement")
+    parser.add_argument("--concurrency", type=int, default=16, help="Closed-loop clients")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests per second")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("analyze=1,verify=2"))
+    parser.add_argument("--timeout", type=float, default=60.0, help="Client timeout per request in seconds")
+    parser.add_argument("--groq-latency-ms", type=float, default=400.0)
+    parser.add_argument("--groq-error-rate", type=float, default=0.0)
+    parser.add_argument("--sebi-latency-ms", type=float, default=150.0)
+    parser.add_argument("--sebi-error-rate", type=float, default=0.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Spread of the injected latencies")
+    parser.add_argument("--advisors", type=int, default=2000, help="Synthetic advisors listed on the SEBI stub")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    advisors = generate_registry(args.advisors)
+    groq_stub = StubServer(create_groq_stub(FaultProfile(args.groq_latency_ms, args.latency_sigma, args.groq_error_rate)))
+    sebi_stub = StubServer(create_sebi_stub(FaultProfile(args.sebi_latency_ms, args.latency_sigma, args.sebi_error_rate),
+                                            advisors))
+    process = None
+    with groq_stub, sebi_stub, tempfile.TemporaryDirectory(prefix="sebi-load-test-") as cache_dir:
+        base_url = args.target
+        if base_url is None:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            process = start_api(port, groq_stub.url, sebi_stub.url, args.server_workers, cache_dir)
+        try:
+            wait_healthy(base_url, process)
+            print(f"Driving {base_url} for {args.warmup:.0f}s warm-up + {args.duration:.0f}s "
+                  + (f"at {args.rate} req/s" if args.rate else f"with {args.concurrency} clients"))
+            runner = LoadRunner(base_url, TrafficMix(args.mix, advisors), args.duration, args.warmup,
+                                args.concurrency, args.rate, args.timeout)
+            endpoints = asyncio.run(runner.run())
+            report = {
+                "config": {key: value for key, value in vars(args).items() if key != "json"},
+                "endpoints": endpoints,
+                "upstreams": {
+                    name: httpx.get(f"{stub.url}/__stats", timeout=5).json()
+                    for name, stub in (("groq", groq_stub), ("sebi", sebi_stub))
+                },
+            }
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Local stand-ins for the Groq completion API and the SEBI website, for load tests.
+
+The Groq stub answers any POST ending in /chat/completions with a well-formed
+chat completion: an offer analysis, a packed multi-offer analysis or an advisor
+analysis, depending on the prompt. The SEBI stub serves an intermediaries page
+linking to paginated research-analyst listings built from a synthetic registry,
+plus /search.html. Both add latency drawn from a log-normal distribution
+around a median and fail a configurable share of requests (500 or 429 for
+Groq, 503 for SEBI). GET /__stats on either returns its request counters.
+
+Usage (from python_backend/), e.g. to point a manually started server at them:
+    python -m benchmarks.stub_upstreams --groq-port 9101 --sebi-port 9102 --latency-ms 300
+    GROQ_BASE_URL=http://127.0.0.1:9101 SEBI_BASE_URL=http://127.0.0.1:9102 GROQ_API_KEY=stub python main.py
+"""
+
+import argparse
+import asyncio
+import html
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_registry import generate_registry
+
+ROWS_PER_PAGE = 200
+
+
+@dataclass
+class FaultProfile:
+    latency_ms: float = 200.0
+    # Spread of the log-normal latency; 0 gives a constant latency
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    seed: int = 7
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def delay_s(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        # The median of lognormvariate(0, sigma) is 1, so latency_ms stays the median
+        factor = self._rng.lognormvariate(0, self.latency_sigma) if self.latency_sigma else 1.0
+        return factor * self.latency_ms / 1000
+
+    def fail(self) -> bool:
+        return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+
+class _Counters:
+    def __init__(self):
+        self.values: Dict[str, int] = {}
+
+    def add(self, name: str):
+        self.values[name] = self.values.get(name, 0) + 1
+
+
+def _offer_analysis(rng: random.Random) -> Dict:
+    risk_score = rng.randint(5, 95)
+    return {
+        "overallRisk": "high" if risk_score > 66 else "medium" if risk_score > 33 else "low",
+        "riskScore": risk_score,
+        "riskKeywords": rng.sample(["guaranteed", "assured", "double", "urgent", "limited slots", "tips"], 2),
+        "recommendations": ["Verify the advisor's SEBI registration before investing"],
+        "redFlags": ["Promises fixed returns"] if risk_score > 50 else [],
+        "advisorStatus": rng.choice(["registered", "unregistered"]),
+        "sebiRegistration": None,
+        "fraudProbability": risk_score,
+        "analysisDetails": "Stubbed analysis for load testing",
+    }
+
+
+def _advisor_analysis(rng: random.Random) -> Dict:
+    return {
+        "status": rng.choice(["unverified", "suspicious", "potential_fraud"]),
+        "isRegistered": False,
+        "registrationStatus": "not_found",
+        "riskLevel": rng.choice(["high", "medium"]),
+        "warnings": ["Advisor not found on the SEBI website"],
+        "recommendations": ["Do not transfer money before verifying the registration"],
+        "details": {"analysis": "Stubbed advisor analysis", "red_flags": [], "missing_info": []},
+        "verification_method": "ai_analysis_with_live_sebi_check",
+    }
+
+
+def create_groq_stub(profile: FaultProfile) -> FastAPI:
+    app = FastAPI()
+    counters = _Counters()
+    rng = random.Random(profile.seed)
+
+    @app.post("/{path:path}")
+    async def chat_completions(path: str, request: Request):
+        if not path.endswith("chat/completions"):
+            return JSONResponse({"error": {"message": f"Unknown path /{path}"}}, status_code=404)
+        body = await request.json()
+        await asyncio.sleep(profile.delay_s())
+        if profile.fail():
+            status = rng.choice([429, 500])
+            counters.add(f"error_{status}")
+            return JSONResponse({"error": {"message": "Injected failure", "type": "stub_error"}}, status_code=status,
+                                headers={"retry-after": "1"} if status == 429 else None)
+
+        system = body["messages"][0]["content"]
+        user = body["messages"][-1]["content"]
+        if "offerIndex" in system:
+            count = int(user.split("these ", 1)[1].split(" ", 1)[0])
+            content = {"results": [{"offerIndex": index, **_offer_analysis(rng)} for index in range(count)]}
+            counters.add("packed_offer_analysis")
+        elif "SEBI compliance expert" in system:
+            content = _advisor_analysis(rng)
+            counters.add("advisor_analysis")
+        else:
+            content = _offer_analysis(rng)
+            counters.add("offer_analysis")
+        text = json.dumps(content)
+        return {
+            "id": f"chatcmpl-stub-{rng.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(system + user) // 4, "completion_tokens": len(text) // 4,
+                      "total_tokens": (len(system + user) + len(text)) // 4},
+        }
+
+    @app.get("/__stats")
+    async def stats():
+        return counters.values
+
+    return app
+
+
+def create_sebi_stub(profile: FaultProfile, advisors: List[Dict]) -> FastAPI:
+    app = FastAPI()
+    counters = _Counters()
+    pages = [advisors[start:start + ROWS_PER_PAGE] for start in range(0, len(advisors), ROWS_PER_PAGE)]
+    searchable = {advisor["registrationNumber"].lower(): advisor for advisor in advisors}
+
+    async def faulty(name: str) -> Optional[HTMLResponse]:
+        await asyncio.sleep(profile.delay_s())
+        if profile.fail():
+            counters.add("error_503")
+            return HTMLResponse("<html><body>Service Unavailable</body></html>", status_code=503)
+        counters.add(name)
+        return None
+
+    def listing(rows: List[Dict]) -> str:
+        return "".join(
+            f"<tr><td>{html.escape(row['name'])}</td><td>{row['registrationNumber']}</td>"
+            f"<td>{html.escape(row.get('companyName', ''))}</td><td>{row['status']}</td></tr>"
+            for row in rows
+        )
+
+    @app.get("/intermediaries.html")
+    async def intermediaries():
+        failure = await faulty("intermediaries")
+        if failure is not None:
+            return failure
+        links = "".join(
+            f'<li><a href="/sebiweb/other/OtherAction.do?intmId={index}">Research Analyst list {index + 1}</a></li>'
+            for index in range(len(pages))
+        )
+        return HTMLResponse(f"<html><head><title>Intermediaries</title></head><body><ul>{links}</ul></body></html>")
+
+    @app.get("/sebiweb/other/OtherAction.do")
+    async def advisor_page(intmId: int = 0):
+        failure = await faulty("listing")
+        if failure is not None:
+            return failure
+        rows = pages[intmId] if 0 <= intmId < len(pages) else []
+        return HTMLResponse(f"<html><body><table>{listing(rows)}</table></body></html>")
+
+    @app.get("/search.html")
+    async def search(q: str = ""):
+        failure = await faulty("search")
+        if failure is not None:
+            return failure
+        query = q.strip('"').lower()
+        hit = searchable.get(query)
+        rows = [hit] if hit else [advisor for advisor in advisors if advisor["name"].lower() == query][:5]
+        # The query is not echoed: the service's name matcher would find it on the page
+        return HTMLResponse(f"<html><body><p>{len(rows)} results</p><table>{listing(rows)}</table></body></html>")
+
+    @app.get("/__stats")
+    async def stats():
+        return counters.values
+
+    return app
+
+
+class StubServer:
+    """
+    Runs an ASGI app with uvicorn on a background thread; use as a context manager
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 0):
+        self.config = uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(self.config)
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+        self.url: Optional[str] = None
+
+    def __enter__(self) -> 'StubServer':
+        self._thread.start()
+        while not self.server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("Stub server failed to start")
+            time.sleep(0.01)
+        host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groq-port", type=int, default=9101)
+    parser.add_argument("--sebi-port", type=int, default=9102)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--advisors", type=int, default=2000, help="Synthetic advisors listed on the SEBI stub")
+    args = parser.parse_args()
+
+    profile = dict(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma, error_rate=args.error_rate)
+    with StubServer(create_groq_stub(FaultProfile(**profile)), port=args.groq_port) as groq_stub, \
+            StubServer(create_sebi_stub(FaultProfile(**profile), generate_registry(args.advisors)),
+                       port=args.sebi_port) as sebi_stub:
+        print(f"Groq stub: {groq_stub.url}\nSEBI stub: {sebi_stub.url}\nCtrl-C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Synthetic SEBI-style advisor registries and noisy lookup queries.
+
+Records look like app/data/sebi_advisors.json (Indian personal names, optional
+middle names and firm names, INH/INA registration numbers). Queries are drawn
+from the registry and damaged the way user input and OCR'd documents are:
+keyboard typos, transliteration variants, initials, dropped middle names,
+punctuation and casing for names; separators, casing, dropped prefixes and
+leading zeros for registration numbers.
+"""
+
+import random
+from typing import Dict, Iterator, List, Tuple
+
+FIRST_NAMES = [
+    "Aarav", "Abhishek", "Aditi", "Aditya", "Ajay", "Akash", "Amit", "Amitabh", "Ananya", "Anil",
+    "Anjali", "Ankit", "Anand", "Anupama", "Arjun", "Arun", "Aruna", "Ashok", "Ayesha", "Balaji",
+    "Bhavna", "Chetan", "Deepa", "Deepak", "Devendra", "Dinesh", "Divya", "Farhan", "Gaurav", "Geeta",
+    "Girish", "Gopal", "Harish", "Harpreet", "Hemant", "Indira", "Ishaan", "Jagdish", "Jaya", "Jyoti",
+    "Kamal", "Karan", "Kavita", "Kiran", "Krishna", "Kunal", "Lakshmi", "Lalit", "Madhav", "Mahesh",
+    "Manish", "Manoj", "Meena", "Meera", "Mohan", "Mukesh", "Nandini", "Naveen", "Neha", "Nikhil",
+    "Nisha", "Pankaj", "Pooja", "Pradeep", "Prakash", "Pranav", "Prasad", "Pratibha", "Priya", "Rahul",
+    "Rajesh", "Rajiv", "Rakesh", "Ramesh", "Ravi", "Rekha", "Ritu", "Rohan", "Sachin", "Sandeep",
+    "Sanjay", "Sarita", "Satish", "Shalini", "Shankar", "Shilpa", "Shreya", "Shweta", "Siddharth", "Sneha",
+    "Srinivas", "Subhash", "Sudha", "Sunil", "Sunita", "Suresh", "Swati", "Tanvi", "Tarun", "Uday",
+    "Usha", "Varun", "Venkatesh", "Vidya", "Vijay", "Vikas", "Vikram", "Vinod", "Vishal", "Yash",
+]
+
+MIDDLE_NAMES = [
+    "Kumar", "Prasad", "Chandra", "Lal", "Nath", "Mohan", "Raj", "Devi", "Kumari", "Narayan",
+    "Shankar", "Bai", "Singh", "Rani", "Pal",
+]
+
+SURNAMES = [
+    "Agarwal", "Ahuja", "Bajaj", "Banerjee", "Bhat", "Bhatt", "Bose", "Chatterjee", "Chaudhary", "Chopra",
+    "Das", "Desai", "Deshmukh", "Dubey", "Dutta", "Gandhi", "Ghosh", "Goel", "Gupta", "Hegde",
+    "Iyer", "Iyengar", "Jain", "Joshi", "Kapoor", "Khan", "Khanna", "Kulkarni", "Kumar", "Malhotra",
+    "Mehta", "Menon", "Mishra", "Mukherjee", "Naidu", "Nair", "Pandey", "Patel", "Pillai", "Rao",
+    "Reddy", "Saxena", "Sen", "Shah", "Sharma", "Shetty", "Shukla", "Singh", "Sinha", "Srivastava",
+    "Subramanian", "Thakur", "Tiwari", "Trivedi", "Varma", "Verma", "Yadav", "Zaveri",
+]
+
+FIRM_SUFFIXES = [
+    "Capital Advisors Pvt Ltd", "Research Analysts LLP", "Wealth Management Pvt Ltd", "Investment Advisory",
+    "Financial Services Ltd", "Securities Research", "Equity Research Pvt Ltd", "Portfolio Advisors",
+]
+
+# Spelling variants seen when the same Indian name is transliterated differently
+TRANSLITERATIONS = [
+    ("ee", "i"), ("i", "ee"), ("oo", "u"), ("u", "oo"), ("sh", "s"), ("v", "w"), ("w", "v"),
+    ("ksh", "x"), ("th", "t"), ("dh", "d"), ("aa", "a"), ("y", "i"), ("ph", "f"), ("bh", "b"),
+]
+
+KEYBOARD_NEIGHBOURS = {
+    'a': 'qsz', 'b': 'vgn', 'c': 'xdv', 'd': 'sfe', 'e': 'wrd', 'f': 'dgr', 'g': 'fht', 'h': 'gjy',
+    'i': 'uok', 'j': 'hku', 'k': 'jli', 'l': 'kop', 'm': 'nj', 'n': 'bmh', 'o': 'ipl', 'p': 'ol',
+    'q': 'wa', 'r': 'etf', 's': 'adw', 't': 'ryg', 'u': 'yij', 'v': 'cbf', 'w': 'qes', 'x': 'zcs',
+    'y': 'tuh', 'z': 'xa',
+}
+
+
+def generate_registry(size: int, seed: int = 42) -> List[Dict]:
+    """
+    size advisor records with unique registration numbers and realistic name collisions
+    """
+    rng = random.Random(seed)
+    serials = rng.sample(range(1, 999_999_999), size)
+    records = []
+    for position, serial in enumerate(serials):
+        parts = [rng.choice(FIRST_NAMES)]
+        if rng.random() < 0.35:
+            parts.append(rng.choice(MIDDLE_NAMES))
+        surname = rng.choice(SURNAMES)
+        parts.append(surname)
+        prefix = "INH" if rng.random() < 0.8 else "INA"
+        active = rng.random() < 0.9
+        record = {
+            "id": f"RA_{position:07d}",
+            "name": ' '.join(parts).upper(),
+            "registrationNumber": f"{prefix}{serial:09d}",
+            "licenseId": f"RA{position:07d}",
+            "status": "Active" if active else "Suspended",
+            "category": "Research Analyst" if prefix == "INH" else "Investment Adviser",
+            "sebiVerified": active,
+        }
+        if rng.random() < 0.4:
+            record["companyName"] = f"{surname} {rng.choice(FIRM_SUFFIXES)}"
+        records.append(record)
+    return records
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    if len(word) < 3:
+        return word
+    position = rng.randrange(1, len(word))
+    kind = rng.random()
+    char = word[position].lower()
+    if kind < 0.3 and char in KEYBOARD_NEIGHBOURS:
+        return word[:position] + rng.choice(KEYBOARD_NEIGHBOURS[char]) + word[position + 1:]
+    if kind < 0.55:
+        return word[:position] + word[position + 1:]
+    if kind < 0.8 and position < len(word) - 1:
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    return word[:position] + word[position] + word[position:]
+
+
+def _transliterate(word: str, rng: random.Random) -> str:
+    lowered = word.lower()
+    options = [(old, new) for old, new in TRANSLITERATIONS if old in lowered]
+    if not options:
+        return word
+    old, new = rng.choice(options)
+    return lowered.replace(old, new, 1)
+
+
+def noisy_name(name: str, rng: random.Random) -> str:
+    """
+    The registry name as a user or a scanned document might spell it
+    """
+    parts = name.split()
+    if len(parts) == 3 and rng.random() < 0.3:
+        parts.pop(1)  # dropped middle name
+    elif len(parts) == 3 and rng.random() < 0.2:
+        parts[1] = parts[1][0] + "."  # middle initial
+    for position in range(len(parts)):
+        roll = rng.random()
+        if roll < 0.25:
+            parts[position] = _typo(parts[position], rng)
+        elif roll < 0.4:
+            parts[position] = _transliterate(parts[position], rng)
+    text = ' '.join(parts)
+    casing = rng.random()
+    if casing < 0.4:
+        text = text.title()
+    elif casing < 0.6:
+        text = text.lower()
+    if rng.random() < 0.1:
+        text = text.replace(' ', '  ', 1)
+    if rng.random() < 0.1:
+        text = f"Mr. {text}" if rng.random() < 0.5 else f"{text},"
+    return text
+
+
+def noisy_registration(registration_number: str, rng: random.Random) -> str:
+    """
+    The registration number with the formatting damage seen in offers and documents
+    """
+    prefix, digits = registration_number[:3], registration_number[3:]
+    roll = rng.random()
+    if roll < 0.2:
+        text = f"{prefix}-{digits}"
+    elif roll < 0.35:
+        text = f"{prefix} {digits[:3]} {digits[3:6]} {digits[6:]}"
+    elif roll < 0.5:
+        text = prefix + (digits.lstrip('0') or '0')
+    elif roll < 0.6:
+        text = digits
+    else:
+        text = registration_number
+    return text.lower() if rng.random() < 0.3 else text
+
+
+def generate_queries(records: List[Dict], count: int, seed: int = 7) -> Iterator[Tuple[int, str, str]]:
+    """
+    (record position, noisy name, noisy registration number) for count sampled records
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        position = rng.randrange(len(records))
+        record = records[position]
+        yield position, noisy_name(record["name"], rng), noisy_registration(record["registrationNumber"], rng)
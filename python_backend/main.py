@@ -1,8 +1,17 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import offer_analysis, advisor_verification
+from app.routers import offer_analysis, advisor_verification, admin
+from app.services.sebi_advisor_service import get_sebi_advisor_service
+from app.services.service_container import ServiceContainer
+from app.utils.admission import AdmissionController, AdmissionControlMiddleware
+from app.utils.compression import CompressionMiddleware
+from app.utils.fast_json import FastJSONResponse
+from app.utils.request_profiling import RequestProfiler, RequestProfilingMiddleware
+from app.utils.upload_ingest import RequestSizeLimitMiddleware
 from dotenv import load_dotenv
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,12 +20,33 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create and warm up the shared services before the first request; close their pools on shutdown
+    """
+    services = ServiceContainer(job_handler=offer_analysis.run_analysis_job)
+    await services.start()
+    app.state.services = services
+    try:
+        yield
+    finally:
+        await services.close()
+
 app = FastAPI(
     title="SEBI AI Analysis API",
     description="API for analyzing investment offers and advisor verification",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Compact JSON, encoded with orjson when it is installed
+    default_response_class=FastJSONResponse
 )
 
+# Per-endpoint-class concurrency limits with bounded wait queues (429 + Retry-After beyond them).
+# Added before CORS so it runs inside it and the 429s carry CORS headers.
+app.state.admission = AdmissionController.from_env()
+app.add_middleware(AdmissionControlMiddleware, controller=app.state.admission)
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -26,11 +56,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Profile-Id"],
+)
+
+# Oversized upload requests are refused before the multipart parser spools them
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_bytes=int(os.getenv("MAX_UPLOAD_REQUEST_MB", "100")) * 1024 * 1024,
+    path_prefixes=("/api/v1/offers/analyze",),
+)
+# Batch bodies are read into memory in one piece, so they get their own, smaller limit.
+# Added after the upload limit so it runs first: /analyze/batch also matches /analyze.
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_bytes=int(os.getenv("MAX_BATCH_REQUEST_MB", "10")) * 1024 * 1024,
+    path_prefixes=("/api/v1/advisors/verify-batch", "/api/v1/offers/analyze/batch"),
 )
 
+# brotli/gzip for responses of at least RESPONSE_COMPRESSION_MIN_BYTES, as the client accepts
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")),
+)
+
+# Opt-in profiling (X-Profile-Request header or sampling), outermost so queueing and
+# compression are part of the profiled time
+app.state.profiler = RequestProfiler.from_env()
+app.add_middleware(RequestProfilingMiddleware, profiler=app.state.profiler)
+
 # ✅ Use consistent prefixes
 app.include_router(offer_analysis.router, prefix="/api/v1/offers", tags=["Investment Offers"])
 app.include_router(advisor_verification.router, prefix="/api/v1/advisors", tags=["Advisor Verification"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+
+def preload():
+    """
+    Run once in the prefork master before the workers are forked, so the workers
+    share the warmed-up model and registry; each worker's lifespan then builds its
+    own clients and pools
+    """
+    ServiceContainer().warm_up()
+
+def post_fork():
+    """
+    Run in every prefork worker right after the fork: threads, locks and database
+    connections cannot be shared with the master
+    """
+    get_sebi_advisor_service().reset_after_fork()
 
 # Add a simple health check endpoint
 @app.get("/health")
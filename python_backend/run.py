@@ -1,6 +1,7 @@
 """
 Script to run the FastAPI server with proper initialization of all models and dependencies.
 """
+import argparse
 import os
 import sys
 import logging
@@ -116,8 +117,27 @@ def create_upload_dir():
     upload_dir.mkdir(exist_ok=True)
     return upload_dir
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the SEBI AI Analysis API server")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVER_WORKERS", "0")),
+                        help="Production mode: preload models and the registry once, then fork this "
+                             "many workers (default: single development server with auto-reload)")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("SERVER_MAX_REQUESTS", "0")),
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-requests-jitter", type=int,
+                        default=int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0")),
+                        help="Add up to this many requests to each worker's limit so they do not recycle together")
+    parser.add_argument("--max-rss-mb", type=float, default=float(os.getenv("SERVER_MAX_RSS_MB", "0")),
+                        help="Recycle a worker once its resident memory passes this many MB (0 = never)")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("SERVER_GRACEFUL_TIMEOUT_S", "30")),
+                        help="Seconds a stopping worker gets to finish its in-flight requests")
+    return parser.parse_args()
+
 def main():
     """Main function to start the server"""
+    args = parse_args()
     logger.info("Starting SEBI AI Analysis API server...")
     
     # Initial setup
@@ -140,11 +160,29 @@ def main():
     upload_dir = create_upload_dir()
     
     # Start the server
+    if args.workers > 0:
+        logger.info(f"Starting FastAPI server with {args.workers} preforked workers...")
+        import main as app_module
+        from app.utils.prefork import PreforkServer
+        PreforkServer(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            max_requests=args.max_requests,
+            max_requests_jitter=args.max_requests_jitter,
+            max_rss_mb=args.max_rss_mb,
+            graceful_timeout_s=args.graceful_timeout,
+            preload=app_module.preload,
+            post_fork=app_module.post_fork,
+        ).run()
+        return
+    
     logger.info("Starting FastAPI server...")
     uvicorn.run(
         "main:app",
-        host="0.0.0.0",
-        port=5000,
+        host=args.host,
+        port=args.port,
         reload=True,
         log_level="info"
     )
@@ -0,0 +1,51 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Allow running as `python scripts/build_registry.py` from python_backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.registry_format import open_registry, write_registry
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "app" / "data"
+
+
+def build_registry(input_path: Path, output_path: Path):
+    """
+    Compile the advisor JSON into the memory-mapped registry file loaded by SEBIAdvisorService
+    """
+    started = time.perf_counter()
+    with open(input_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    print(f"Loaded {len(records)} advisor records from {input_path}")
+
+    meta = write_registry(records, output_path, source=input_path)
+    elapsed = time.perf_counter() - started
+
+    # Re-open to make sure the file is readable before workers pick it up
+    compiled = open_registry(output_path)
+    print(f"Wrote {output_path} ({compiled.get_stats()['file_bytes']:,} bytes, "
+          f"{meta['record_count']} records, {len(compiled.registration_index)} registration numbers, "
+          f"{compiled.name_tables.get_stats()['distinct_strings']} distinct names) in {elapsed:.2f}s")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the SEBI advisor registry into its binary format")
+    parser.add_argument("--input", type=Path, default=DATA_DIR / "sebi_advisors.json",
+                        help="advisor JSON produced by fetch_sebi_advisors.py")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="registry file to write (default: input path with .reg suffix)")
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"Advisor data file not found: {args.input}")
+        print("Run fetch_sebi_advisors.py first to download advisor data")
+        sys.exit(1)
+    build_registry(args.input, args.output or args.input.with_suffix(".reg"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,146 @@
-import requests
+import argparse
 import json
+import logging
 import os
+import sys
 from pathlib import Path
 
-def fetch_all_sebi_advisors():
+# Allow running as `python scripts/fetch_sebi_advisors.py` from python_backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.registry_delta import DeltaTracker, build_manifest, load_manifest
+from app.services.registry_fetcher import DEFAULT_URL_TEMPLATE, PARSERS, RegistryFetcher
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "app" / "data"
+
+def fetch_all_sebi_advisors(fetcher: RegistryFetcher, restart: bool = False):
     """
-    Fetch all advisor details from SEBI website
+    Fetch all advisor listing pages from SEBI website (resuming from checkpoints)
     """
-    base_url = "https://www.sebi.gov.in/sebiweb/other/OtherAction.do?doRecognisedFpi=yes&intmId=14"
-    all_records = []
-    
     print("Starting to fetch SEBI advisor data...")
-    
-    for page in range(1, 700):  # total pages
-        try:
-            url = base_url.format(page)
-            print(f"Fetching page {page}...")
-            
-            resp = requests.get(url, timeout=10)
-            if resp.status_code != 200:
-                print(f"Failed to fetch page {page}: Status {resp.status_code}")
-                break
-                
-            data = resp.json()  # if it returns JSON
-            if not data or not data.get("records"):
-                print(f"No more data found at page {page}")
-                break
-                
-            all_records.extend(data["records"])
-            print(f"Page {page}: Added {len(data['records'])} records")
-            
-        except requests.RequestException as e:
-            print(f"Request error on page {page}: {e}")
-            break
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error on page {page}: {e}")
-            break
-        except Exception as e:
-            print(f"Unexpected error on page {page}: {e}")
-            break
-
-    print(f"Total advisors fetched: {len(all_records)}")
-    return all_records
-
-def save_advisor_data(advisor_data):
+    report = fetcher.run(restart=restart)
+
+    print(f"Pages fetched: {report.pages_fetched}, resumed from checkpoint: {report.pages_resumed}, "
+          f"listing ends at page {report.last_page}")
+    for page, error in report.failed_pages.items():
+        print(f"Failed page {page}: {error}")
+    print(f"Total advisors fetched: {report.records} in {report.elapsed_s:.1f}s")
+    return report
+
+def save_advisor_data(advisor_data, file_path: Path = DATA_DIR / "sebi_advisors.json",
+                      delta_tracker: DeltaTracker = None, manifest_path: Path = None):
     """
-    Save advisor data to JSON file
+    Stream advisor data to a JSON file (one record per line, replaced atomically so a
+    running server never reads a partial file). With a delta tracker, only added, changed
+    and removed records are written to the delta file, and an unchanged registry is left
+    untouched so the server does not reload it.
     """
-    # Create data directory if it doesn't exist
-    data_dir = Path(__file__).parent.parent / "data"
-    data_dir.mkdir(exist_ok=True)
-    
-    file_path = data_dir / "sebi_advisors.json"
-    
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(advisor_data, f, indent=2, ensure_ascii=False)
-    
-    print(f"Advisor data saved to: {file_path}")
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+
+    count = 0
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("[\n")
+            for record in advisor_data:
+                if count:
+                    f.write(",\n")
+                f.write(json.dumps(record, ensure_ascii=False))
+                if delta_tracker is not None:
+                    delta_tracker.observe(record)
+                count += 1
+            f.write("\n]\n")
+    except BaseException:
+        # Reading the fetched records or writing failed: leave no partial output or delta behind
+        tmp_path.unlink(missing_ok=True)
+        if delta_tracker is not None:
+            delta_tracker.abort()
+        raise
+
+    if delta_tracker is not None:
+        report = delta_tracker.finish()
+        print(f"Delta: {report.added} added, {report.changed} changed, {report.removed} removed, "
+              f"{report.unchanged} unchanged -> {delta_tracker.delta_path}")
+        if not report.has_changes and file_path.exists():
+            tmp_path.unlink()
+            print(f"Advisor data unchanged: {file_path}")
+            return file_path
+
+    os.replace(tmp_path, file_path)
+    if delta_tracker is not None:
+        delta_tracker.write_manifest(manifest_path)
+    print(f"Advisor data saved to: {file_path} ({count} records)")
     return file_path
 
+def previous_manifest(output: Path, manifest_path: Path):
+    """
+    Key -> content hash of the previous snapshot (built from the existing JSON on the first delta sync)
+    """
+    if manifest_path.exists():
+        return load_manifest(manifest_path)
+    if output.exists():
+        with open(output, encoding='utf-8') as f:
+            return build_manifest(json.load(f))
+    return {}
+
 def main():
     """
     Main function to fetch and save SEBI advisor data
     """
+    parser = argparse.ArgumentParser(description="Fetch the SEBI advisor registry with resumable, concurrent page fetching")
+    parser.add_argument("--url-template", default=DEFAULT_URL_TEMPLATE,
+                        help="listing URL with a {page} placeholder")
+    parser.add_argument("--format", choices=sorted(PARSERS), default="auto", help="response parser")
+    parser.add_argument("--workers", type=int, default=8, help="pages fetched concurrently")
+    parser.add_argument("--start-page", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=700)
+    parser.add_argument("--attempts", type=int, default=4, help="attempts per page before giving up")
+    parser.add_argument("--checkpoint-dir", type=Path, default=DATA_DIR / ".sync",
+                        help="per-page checkpoint files; rerun to resume")
+    parser.add_argument("--output", type=Path, default=DATA_DIR / "sebi_advisors.json")
+    parser.add_argument("--restart", action="store_true", help="discard checkpoints and fetch everything again")
+    parser.add_argument("--allow-partial", action="store_true", help="write the output even if some pages failed")
+    parser.add_argument("--no-delta", action="store_true",
+                        help="always rewrite the output instead of diffing against the previous snapshot")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
     try:
-        advisors = fetch_all_sebi_advisors()
-        if advisors:
-            file_path = save_advisor_data(advisors)
-            print(f"Successfully saved {len(advisors)} advisor records")
-            
-            # Print sample record for verification
-            if advisors:
-                print("\nSample record:")
-                print(json.dumps(advisors[0], indent=2))
-        else:
-            print("No advisor data was fetched")
-            
-    except Exception as e:
+        fetcher = RegistryFetcher(
+            checkpoint_dir=args.checkpoint_dir,
+            url_template=args.url_template,
+            parser=PARSERS[args.format](),
+            max_workers=args.workers,
+            start_page=args.start_page,
+            max_pages=args.max_pages,
+            max_attempts=args.attempts,
+        )
+        report = fetch_all_sebi_advisors(fetcher, restart=args.restart)
+    except ValueError as e:
         print(f"Error in main: {e}")
+        sys.exit(2)
+
+    if not report.complete and not args.allow_partial:
+        print("Some pages failed; rerun to resume (checkpoints are kept) or pass --allow-partial")
+        sys.exit(1)
+    if not report.records:
+        print("No advisor data was fetched")
+        sys.exit(1)
+
+    if args.no_delta:
+        save_advisor_data(fetcher.iter_records(report.last_page), args.output)
+    else:
+        manifest_path = args.output.with_suffix(".manifest.json")
+        tracker = DeltaTracker(previous_manifest(args.output, manifest_path), args.output.with_suffix(".delta.ndjson"))
+        save_advisor_data(fetcher.iter_records(report.last_page), args.output, tracker, manifest_path)
+    print(f"Successfully saved {report.records} advisor records")
+
+    # Print sample record for verification
+    sample = next(fetcher.iter_records(report.last_page), None)
+    if sample:
+        print("\nSample record:")
+        print(json.dumps(sample, indent=2))
 
 if __name__ == "__main__":
     main()
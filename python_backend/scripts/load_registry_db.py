@@ -0,0 +1,57 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Allow running as `python scripts/load_registry_db.py` from python_backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.registry_store import DatabaseRegistry, RegistryStoreError
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "app" / "data"
+
+
+def load_registry_db(input_path: Path, database_url: str):
+    """
+    Replace the registry tables (and their indexes) with the advisor JSON, in one transaction
+    """
+    started = time.perf_counter()
+    with open(input_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    print(f"Loaded {len(records)} advisor records from {input_path}")
+
+    database = DatabaseRegistry.from_url(database_url)
+    try:
+        database.load(records, source=str(input_path))
+        print(f"Registry database now holds {database.record_count()} records "
+              f"({time.perf_counter() - started:.2f}s)")
+    finally:
+        database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the SEBI advisor registry into PostgreSQL or SQLite")
+    parser.add_argument("--input", type=Path, default=DATA_DIR / "sebi_advisors.json",
+                        help="advisor JSON produced by fetch_sebi_advisors.py")
+    parser.add_argument("--database-url", default=os.getenv("SEBI_REGISTRY_DATABASE_URL"),
+                        help="postgresql://... or sqlite:///path (default: SEBI_REGISTRY_DATABASE_URL)")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        print("No database URL given; pass --database-url or set SEBI_REGISTRY_DATABASE_URL")
+        sys.exit(2)
+    if not args.input.exists():
+        print(f"Advisor data file not found: {args.input}")
+        print("Run fetch_sebi_advisors.py first to download advisor data")
+        sys.exit(1)
+    try:
+        load_registry_db(args.input, args.database_url)
+    except (RegistryStoreError, ValueError) as e:
+        print(f"Error loading registry database: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
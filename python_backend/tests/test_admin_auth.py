@@ -0,0 +1,38 @@
+"""
+Admin router authentication: closed unless ADMIN_API_TOKEN is set and matched
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.routers import admin
+
+
+def get_document_memory(headers=None):
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/v1/admin")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+            return await c.get("/api/v1/admin/document-memory", headers=headers or {})
+
+    return asyncio.run(run())
+
+
+def test_admin_endpoints_do_not_exist_without_configured_token(monkeypatch):
+    monkeypatch.delenv("ADMIN_API_TOKEN", raising=False)
+    assert get_document_memory().status_code == 404
+    assert get_document_memory({"X-Admin-Token": ""}).status_code == 404
+
+
+def test_admin_endpoints_need_matching_token(monkeypatch):
+    monkeypatch.setenv("ADMIN_API_TOKEN", "secret")
+    assert get_document_memory().status_code == 401
+    assert get_document_memory({"X-Admin-Token": "secre"}).status_code == 401
+    assert get_document_memory({"X-Admin-Token": "secret"}).status_code == 200
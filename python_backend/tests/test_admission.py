@@ -0,0 +1,111 @@
+"""
+Admission control tests
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.admission import (
+    AdmissionControlMiddleware, AdmissionController, AdmissionLimiter, AdmissionRejected, EndpointClass
+)
+
+
+def make_app(max_concurrency=1, max_queue=1, queue_timeout_s=0.2, work_s=0.3):
+    controller = AdmissionController([EndpointClass(
+        "analysis", (("POST", "/analyze"),),
+        AdmissionLimiter("analysis", max_concurrency, max_queue, queue_timeout_s),
+    )])
+    app = FastAPI()
+    app.add_middleware(AdmissionControlMiddleware, controller=controller)
+
+    @app.post("/analyze")
+    async def analyze():
+        await asyncio.sleep(work_s)
+        return {"status": "done"}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app, controller
+
+
+def client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_overload_is_rejected_with_retry_after_and_health_is_unaffected():
+    async def run():
+        app, controller = make_app(queue_timeout_s=1.0)
+        async with client(app) as c:
+            burst = [asyncio.create_task(c.post("/analyze")) for _ in range(4)]
+            await asyncio.sleep(0.05)
+            health = await c.get("/health")
+            responses = await asyncio.gather(*burst)
+        return health, responses, controller.get_metrics()["classes"]["analysis"]
+
+    health, responses, metrics = asyncio.run(run())
+    assert health.status_code == 200
+    statuses = sorted(response.status_code for response in responses)
+    # One running, one waiting in the queue, two turned away
+    assert statuses == [200, 200, 429, 429]
+    rejected = [response for response in responses if response.status_code == 429]
+    assert all(int(response.headers["retry-after"]) >= 1 for response in rejected)
+    assert metrics["admitted"] == 2 and metrics["rejected_queue_full"] == 2
+    assert metrics["in_flight"] == 0 and metrics["queued_now"] == 0
+
+
+def test_queued_request_times_out():
+    async def run():
+        app, controller = make_app(queue_timeout_s=0.1, work_s=0.5)
+        async with client(app) as c:
+            first = asyncio.create_task(c.post("/analyze"))
+            await asyncio.sleep(0.05)
+            second = await c.post("/analyze")
+            await first
+        return second, controller.get_metrics()["classes"]["analysis"]
+
+    second, metrics = asyncio.run(run())
+    assert second.status_code == 429
+    assert metrics["rejected_timeout"] == 1
+
+
+def test_waiters_are_admitted_in_order_and_cancelled_waiters_free_their_place():
+    async def run():
+        limiter = AdmissionLimiter("test", max_concurrency=1, max_queue=3, queue_timeout_s=5)
+        order = []
+        first = await limiter.acquire()
+
+        async def waiter(name):
+            admitted_at = await limiter.acquire()
+            order.append(name)
+            limiter.release(admitted_at)
+
+        tasks = [asyncio.create_task(waiter(name)) for name in ("a", "b", "c")]
+        await asyncio.sleep(0.01)
+        tasks[1].cancel()
+        limiter.release(first)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return order, limiter
+
+    order, limiter = asyncio.run(run())
+    assert order == ["a", "c"]
+    assert limiter.in_flight == 0 and limiter.queued == 0
+
+
+def test_full_queue_raises_immediately():
+    async def run():
+        limiter = AdmissionLimiter("test", max_concurrency=1, max_queue=0, queue_timeout_s=5)
+        await limiter.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        return rejected.value
+
+    assert asyncio.run(run()).retry_after >= 1
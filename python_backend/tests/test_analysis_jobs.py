@@ -0,0 +1,109 @@
+"""
+Analysis job queue tests with a stub handler in place of document processing and the LLM call
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.analysis_jobs import (
+    CANCELLED,
+    QUEUED,
+    SUCCEEDED,
+    AnalysisJobQueue,
+    JobQueueFullError,
+    JobStore,
+)
+
+
+def make_queue(tmp_path, handler, **kwargs):
+    options = dict(workers=2, ttl_s=60, spool_dir=tmp_path / "spool")
+    options.update(kwargs)
+    return AnalysisJobQueue(handler, **options)
+
+
+def test_runs_jobs_and_long_polls(tmp_path):
+    async def handler(payload):
+        await asyncio.sleep(0.05)
+        return {"files": [Path(f["path"]).read_bytes().decode() for f in payload["files"]], **payload["textData"]}
+
+    async def scenario():
+        queue = make_queue(tmp_path, handler)
+        await queue.start()
+        upload = tmp_path / "upload.txt"
+        upload.write_text("hello")
+        job = await queue.submit({"textData": {"advisorName": "X"}}, [("offer.txt", str(upload))])
+        assert job.status == QUEUED
+        finished = await queue.wait(job.id, timeout=5)
+        assert finished.status == SUCCEEDED
+        assert finished.result == {"files": ["hello"], "advisorName": "X"}
+        # Spooled uploads are removed once the job is done
+        assert not (tmp_path / "spool" / job.id).exists()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancel_bound_and_expiry(tmp_path):
+    started = []
+
+    async def handler(payload):
+        started.append(payload["n"])
+        await asyncio.sleep(30)
+
+    async def scenario():
+        queue = make_queue(tmp_path, handler, workers=1, max_pending=2, ttl_s=0.01)
+        await queue.start()
+        running = await queue.submit({"n": 1})
+        queued = await queue.submit({"n": 2})
+        with pytest.raises(JobQueueFullError):
+            await queue.submit({"n": 3})
+
+        await asyncio.sleep(0.05)
+        assert (await queue.cancel(queued.id)).status == CANCELLED
+        assert (await queue.cancel(running.id)).status == CANCELLED
+        assert started == [1]
+
+        await asyncio.sleep(0.02)
+        assert await queue.purge_expired() == 2
+        assert queue.get(running.id) is None
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_unfinished_jobs_survive_restart(tmp_path):
+    async def slow(payload):
+        await asyncio.sleep(30)
+
+    async def fast(payload):
+        return {"n": payload["n"]}
+
+    async def first_run():
+        queue = make_queue(tmp_path, slow, workers=1, store=JobStore(tmp_path / "jobs.db"))
+        await queue.start()
+        jobs = []
+        for n in range(3):
+            upload = tmp_path / f"upload{n}.pdf"
+            upload.write_bytes(b"%PDF-1.4")
+            jobs.append(await queue.submit({"n": n}, [("a.pdf", str(upload))]))
+        await asyncio.sleep(0.05)
+        await queue.stop()
+        return [job.id for job in jobs]
+
+    async def second_run(job_ids):
+        queue = make_queue(tmp_path, fast, store=JobStore(tmp_path / "jobs.db"))
+        await queue.start()
+        results = [await queue.wait(job_id, timeout=5) for job_id in job_ids]
+        await queue.stop()
+        return results
+
+    job_ids = asyncio.run(first_run())
+    results = asyncio.run(second_run(job_ids))
+
+    assert [job.status for job in results] == [SUCCEEDED] * 3
+    assert [job.result for job in results] == [{"n": 0}, {"n": 1}, {"n": 2}]
@@ -0,0 +1,70 @@
+"""
+Batch offer analysis tests: packing stays within one submitter, and a pack whose
+response does not line up is retried one offer at a time
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.batch_analysis import BatchAnalysisService
+
+ANALYSIS = {
+    "overallRisk": "low",
+    "riskScore": 10,
+    "riskKeywords": [],
+    "recommendations": [],
+    "redFlags": [],
+    "advisorStatus": "registered",
+    "sebiRegistration": None,
+    "fraudProbability": 5,
+    "analysisDetails": "",
+}
+
+
+class StubAnalyzer:
+    """Packed responses drop the last offer; single-offer requests echo the text"""
+
+    def __init__(self):
+        self.packed, self.single = [], []
+
+    async def analyze_investment_offers(self, texts):
+        self.packed.append(texts)
+        return [dict(ANALYSIS) for _ in texts[:-1]]
+
+    async def analyze_investment_offer(self, text):
+        self.single.append(text)
+        if text == "boom":
+            raise RuntimeError("upstream error")
+        return {**ANALYSIS, "analysisDetails": text}
+
+
+def test_packs_only_offers_of_the_same_submitter():
+    service = BatchAnalysisService(StubAnalyzer(), processor=object(), pack_max_chars=100, pack_size=2)
+    inputs = {"a1": "x", "b1": "x", "a2": "x", "a3": "x", "n1": "x", "b2": "x", "long": "y" * 101}
+    submitters = {"a1": "alice", "a2": "alice", "a3": "alice", "b1": "bob", "b2": "bob", "long": "bob"}
+
+    packs = service.pack(inputs, submitters)
+
+    assert sorted(packs) == sorted([["a1", "a2"], ["a3"], ["b1", "b2"], ["n1"], ["long"]])
+
+
+def test_mismatched_pack_is_retried_one_offer_at_a_time():
+    analyzer = StubAnalyzer()
+    service = BatchAnalysisService(analyzer, processor=object())
+
+    async def run():
+        futures = [asyncio.get_running_loop().create_future() for _ in range(3)]
+        await service._analyze_pack(["first", "second", "boom"], futures, asyncio.Semaphore(1))
+        return [future.result() for future in futures]
+
+    results = asyncio.run(run())
+
+    assert analyzer.single == ["first", "second", "boom"]
+    assert [result["analysisDetails"] for result in results[:2]] == ["first", "second"]
+    assert results[2]["riskKeywords"] == ["analysis_error"]
+    # Every offer gets its own result object
+    assert len({id(result) for result in results}) == 3
+    assert service.get_metrics()["pack_retries"] == 1
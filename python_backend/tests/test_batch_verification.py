@@ -0,0 +1,74 @@
+"""
+Batch verification tests: only exact registration matches are settled by the local
+registry, everything else goes to live verification (a stub verifier here)
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.batch_verification import BatchVerificationService
+from app.services.sebi_advisor_service import SEBIAdvisorService
+from app.services.verification_cache import VerificationCache
+
+RECORDS = [
+    {"name": "RAMESH KUMAR SHARMA", "registrationNumber": "INA000001234", "status": "Active", "sebiVerified": True},
+    {"name": "SURESH PATEL", "registrationNumber": "INA000009999", "status": "Suspended", "sebiVerified": False},
+]
+
+
+class StubFraudCheck:
+    def check_fraud_patterns(self, advisor):
+        return {"is_suspicious": False, "warnings": [], "recommendations": []}
+
+
+class StubVerifier:
+    def __init__(self):
+        self.verification_cache = VerificationCache()
+        self.sebi_service = StubFraudCheck()
+        self.live = []
+
+    async def verify_advisor(self, advisor):
+        self.live.append(advisor)
+        return {"status": "found_on_sebi", "verification_method": "live_sebi_website"}
+
+
+def run_batch(tmp_path, records):
+    data_file = tmp_path / "sebi_advisors.json"
+    data_file.write_text(json.dumps(RECORDS))
+    verifier = StubVerifier()
+    service = BatchVerificationService(verifier, registry=SEBIAdvisorService(data_file=data_file))
+
+    async def collect():
+        return [line async for line in service.verify_stream(records)]
+
+    lines = asyncio.run(collect())
+    return lines[:-1], lines[-1]["summary"], verifier
+
+
+def test_exact_registration_matches_are_resolved_locally(tmp_path):
+    lines, summary, verifier = run_batch(tmp_path, [
+        {"name": "Anyone", "registrationNumber": "ina-0000-01234"},
+        {"name": "Someone Else", "registrationNumber": "INA000009999"},
+    ])
+
+    assert [line["resolvedBy"] for line in lines] == ["local_registry", "local_registry"]
+    assert [line["result"]["status"] for line in lines] == ["verified", "suspicious"]
+    assert summary["local_registry"] == 2 and not verifier.live
+
+
+def test_name_matches_and_wrong_numbers_go_to_live_verification(tmp_path):
+    lines, summary, verifier = run_batch(tmp_path, [
+        # A strong name match alone is not final
+        {"name": "Ramesh Kumar Sharma"},
+        # A wrong registration number falls back to the name, which is not final either
+        {"name": "Ramesh Kumar Sharma", "registrationNumber": "INH000001234"},
+        {"name": "Suresh Patel", "registrationNumber": "1234"},
+    ])
+
+    assert [line["resolvedBy"] for line in lines] == ["live_verification"] * 3
+    assert summary["local_registry"] == 0 and summary["live_verification"] == 3
+    assert len(verifier.live) == 3
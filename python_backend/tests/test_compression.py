@@ -0,0 +1,72 @@
+"""
+Response compression and JSON encoding tests
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils import fast_json
+from app.utils.compression import CompressionMiddleware, negotiate_encoding
+
+
+def make_app():
+    app = FastAPI(default_response_class=fast_json.FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=256)
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/large")
+    async def large():
+        return {"items": [{"name": "advisor", "note": "₹ guaranteed"}] * 100}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for index in range(3):
+                yield fast_json.dumps({"index": index}) + b"\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+
+def fetch(path, accept_encoding):
+    async def go():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers={"accept-encoding": accept_encoding})
+    return asyncio.run(go())
+
+
+def test_negotiates_accepted_encoding():
+    assert negotiate_encoding("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert negotiate_encoding("br;q=0, gzip;q=0.5", ("br", "gzip")) == "gzip"
+    assert negotiate_encoding("identity", ("br", "gzip")) is None
+    assert negotiate_encoding("*", ("gzip",)) == "gzip"
+
+
+def test_compresses_only_above_threshold():
+    small = fetch("/small", "gzip")
+    assert "content-encoding" not in small.headers
+    assert small.content == b'{"status":"ok"}'
+
+    large = fetch("/large", "gzip")
+    assert large.headers["content-encoding"] == "gzip"
+    assert int(large.headers["content-length"]) < len(large.content)
+    assert large.json()["items"][0]["note"] == "₹ guaranteed"
+
+    assert "content-encoding" not in fetch("/large", "identity").headers
+
+
+def test_streams_are_flushed_per_chunk():
+    response = fetch("/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text.splitlines() == ['{"index":0}', '{"index":1}', '{"index":2}']
@@ -0,0 +1,70 @@
+"""
+Memory regression tests for the NLP stages of process_document: peak memory of
+every stage after text extraction, per MB of extracted text, must stay within
+TEXT_STAGE_BUDGETS. Needs the spaCy en_core_web_sm model and the NLTK punkt data;
+extraction and combine_text_data are covered by test_extraction_memory.py.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+spacy = pytest.importorskip("spacy")
+nltk = pytest.importorskip("nltk")
+if not spacy.util.is_package("en_core_web_sm"):
+    pytest.skip("spaCy model en_core_web_sm is not installed", allow_module_level=True)
+try:
+    nltk.data.find("tokenizers/punkt")
+except LookupError:
+    pytest.skip("NLTK punkt data is not installed", allow_module_level=True)
+
+from app.utils.memory_tracking import MB, document_memory
+from app.utils.text_processing import document_processor
+from benchmarks.load_test import write_offer_documents
+
+# Peak MB per MB of extracted text, the same for every file type: measured values
+# (2.6, 3281, 2.0, 13.4 and 3283 MB/MB with a pipeline of en_core_web_sm's layout)
+# plus about 25% headroom. spaCy needs roughly 1GB per 100,000 characters for the
+# parser and NER, so spacy_doc dominates.
+TEXT_STAGE_BUDGETS = {
+    "detect_language": 3.2,
+    "spacy_doc": 4100,
+    "nltk_sentences": 2.5,
+    "extract_features": 17,
+    "total": 4100,
+}
+
+
+@pytest.fixture(scope="module")
+def documents(tmp_path_factory):
+    return write_offer_documents(tmp_path_factory.mktemp("documents"))
+
+
+@pytest.fixture
+def tracked(monkeypatch):
+    # Warm up first so spaCy's lazily built state is not charged to the document
+    document_processor.process_texts(["Guaranteed 12% monthly returns, contact our SEBI registered advisor."])
+    monkeypatch.setattr(document_memory, "sample_rate", 1.0)
+    return document_memory
+
+
+@pytest.mark.parametrize("ext", [".txt", ".pdf", ".docx"])
+def test_nlp_stages_peak_memory_per_text_mb(documents, tracked, ext):
+    if ext not in documents:
+        pytest.skip("python-docx is not installed")
+    result = document_processor.process_document(str(documents[ext]))
+    assert result["success"]
+
+    report = tracked.get_metrics()["recent"][-1]
+    assert report["kind"] == "process_document" and report["label"] == f"offer{ext}"
+    assert {"spacy_doc", "nltk_sentences", "extract_features"} <= set(report["stages"])
+
+    text_mb = len(result["text"]) / MB
+    measured = {"total": report["peak_mb"] / text_mb,
+                **{name: stage["peak_mb"] / text_mb for name, stage in report["stages"].items()}}
+    over = {name: f"{value:.2f} MB/MB > {TEXT_STAGE_BUDGETS[name]}" for name, value in measured.items()
+            if name in TEXT_STAGE_BUDGETS and value > TEXT_STAGE_BUDGETS[name]}
+    assert not over, f"offer{ext} over its memory budget: {over}"
@@ -0,0 +1,97 @@
+"""
+Memory regression tests for text extraction and combine_text_data: peak memory per
+MB of input must stay within EXTRACTION_BUDGETS. The NLP stages are stubbed out, so
+these run without the spaCy model; test_document_memory.py covers those stages.
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.memory_tracking import document_memory
+from app.utils.text_processing import combine_text_data, document_processor
+from benchmarks.load_test import write_offer_documents
+
+# Peak MB per MB of input: measured values (3.1, 5.5, 37.8 and 0.23 MB/MB on the
+# documents below) plus about 25% headroom. DOCX is a zip about 5x smaller than
+# its text, hence the larger figure per MB of file.
+EXTRACTION_BUDGETS = {
+    ".txt": {"extract_text_from_txt": 4},
+    ".pdf": {"extract_text_from_pdf": 7},
+    ".docx": {"extract_text_from_docx": 48},
+    "combine_text_data": {"combine_text_data": 0.3, "total": 0.3},
+}
+
+
+@pytest.fixture(scope="module")
+def documents(tmp_path_factory):
+    return write_offer_documents(tmp_path_factory.mktemp("documents"))
+
+
+@pytest.fixture
+def tracked(monkeypatch):
+    monkeypatch.setattr(document_memory, "sample_rate", 1.0)
+    return document_memory
+
+
+def assert_within_budget(report, budgets):
+    measured = {"total": report["peak_per_input_mb"],
+                **{name: stage["peak_per_input_mb"] for name, stage in report["stages"].items()}}
+    over = {name: f"{value} MB/MB > {budgets[name]}" for name, value in measured.items()
+            if name in budgets and value > budgets[name]}
+    assert not over, f"{report['kind']} {report['label']} over its memory budget: {over}"
+
+
+def features(text):
+    """process_texts-shaped result with features in proportion to the text, without spaCy"""
+    return {
+        "success": True,
+        "language": "en",
+        "text": text,
+        "entities": {
+            "organizations": re.findall(r"SEBI|IPO|F&O", text),
+            "people": re.findall(r"(?:Rahul|Priya|Amit|Sneha|Vikram|Anjali) \w+", text),
+            "money": re.findall(r"Rs [\d,]+", text),
+            "percentages": re.findall(r"\d+%", text),
+            "dates": re.findall(r"\d+/\d+/\d{4}", text),
+        },
+        "investment_details": {
+            "returns_mentioned": re.findall(r"[^.]*returns[^.]*\.", text),
+            "risk_statements": re.findall(r"[^.]*risk[^.]*\.", text),
+            "timeframes": re.findall(r"\d+ (?:days|years)", text),
+            "investment_amounts": re.findall(r"Rs [\d,]+", text),
+        },
+        "contact_info": {"emails": [], "phones": re.findall(r"\+91 [\d ]+\d", text), "websites": []},
+        "key_phrases": re.findall(r"Ref \d+", text),
+    }
+
+
+@pytest.mark.parametrize("ext", [".txt", ".pdf", ".docx"])
+def test_extraction_peak_memory_per_input_mb(documents, tracked, monkeypatch, ext):
+    if ext not in documents:
+        pytest.skip("python-docx is not installed")
+    monkeypatch.setattr(document_processor, "process_texts", lambda texts: [features(texts[0])])
+
+    result = document_processor.process_document(str(documents[ext]))
+    assert result["success"] and "Ref " in result["text"]
+
+    report = tracked.get_metrics()["recent"][-1]
+    assert report["kind"] == "process_document" and report["label"] == f"offer{ext}"
+    assert set(report["stages"]) == {f"extract_text_from_{ext[1:]}"}
+    assert_within_budget(report, EXTRACTION_BUDGETS[ext])
+
+
+def test_combine_text_data_peak_memory_per_input_mb(documents, tracked, monkeypatch):
+    monkeypatch.setattr(tracked, "sample_rate", 0.0)
+    results = [features(document_processor.extract_text(str(path))) for path in documents.values()]
+    monkeypatch.setattr(tracked, "sample_rate", 1.0)
+
+    combine_text_data({"companyName": "Wealth Growth Partners"}, results)
+
+    report = tracked.get_metrics()["recent"][-1]
+    assert report["kind"] == "combine_text_data"
+    assert_within_budget(report, EXTRACTION_BUDGETS["combine_text_data"])
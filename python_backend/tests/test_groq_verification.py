@@ -0,0 +1,125 @@
+"""
+Advisor verification through GroqService when the live SEBI check is degraded: a stub
+session that times out or fails, a stub LLM client that must not be called
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.groq_service import GroqService
+from app.services.sebi_advisor_service import SEBIAdvisorService
+from app.services.sebi_http_cache import SEBIHttpCache
+from app.services.sebi_live_verification import SEBILiveVerificationService
+from app.services.verification_cache import VerificationCache
+from app.utils.adaptive_limiter import AdaptiveConcurrencyLimiter, CircuitBreaker
+
+ADVISOR = {"name": "Unknown Wealth Guru", "registrationNumber": "INA000077777"}
+
+
+class StubSession:
+    def __init__(self, error=None, delay=0.0):
+        self.error = error
+        self.delay = delay
+
+    def get(self, url, timeout=None, **kwargs):
+        if self.error is not None:
+            raise self.error
+        # A slow upstream: the request times out like requests would
+        time.sleep(min(self.delay, timeout))
+        raise requests.Timeout(f"read timed out after {timeout}s")
+
+    def close(self):
+        pass
+
+
+class StubCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        raise AssertionError("the LLM must not be asked about a degraded SEBI check")
+
+
+class StubClient:
+    def __init__(self):
+        self.chat = type("Chat", (), {"completions": StubCompletions()})()
+
+
+@pytest.fixture
+def make_service(tmp_path):
+    data_file = tmp_path / "sebi_advisors.json"
+    data_file.write_text(json.dumps([{"name": "RAMESH KUMAR SHARMA", "registrationNumber": "INA000001234",
+                                      "status": "Active", "sebiVerified": True}]))
+    created = []
+
+    def make(session, breaker, budget_s=5.0):
+        sebi_service = SEBILiveVerificationService(
+            http_cache=SEBIHttpCache(cache_dir=tmp_path / "http"),
+            registry=SEBIAdvisorService(data_file=data_file),
+            limiter=AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=4),
+            circuit_breaker=breaker,
+        )
+        sebi_service.session = sebi_service.guarded_session.session = session
+        sebi_service.verification_budget = budget_s
+        sebi_service.hedge_delay = 10.0
+        created.append(sebi_service)
+        return GroqService(cache=VerificationCache(), client=StubClient(), sebi_service=sebi_service)
+
+    yield make
+    for sebi_service in created:
+        sebi_service.close()
+
+
+def verify_twice(service):
+    async def scenario():
+        return [await service.verify_advisor(ADVISOR) for _ in range(2)]
+    return asyncio.run(scenario())
+
+
+def test_open_circuit_returns_degraded_result_without_llm_or_cache(make_service):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=60)
+    breaker.record_failure()
+    service = make_service(StubSession(error=AssertionError("the circuit is open, no request may be sent")), breaker)
+
+    first, second = verify_twice(service)
+
+    assert first["status"] == "not_found" and first["upstreamUnavailable"]
+    assert service.client.chat.completions.calls == 0
+    cache_metrics = service.verification_cache.get_metrics()
+    assert cache_metrics["entries"] == 0 and cache_metrics["misses"] == 2
+
+
+def test_failing_upstream_opens_circuit_and_skips_llm(make_service):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=60)
+    service = make_service(StubSession(error=requests.ConnectionError("connection refused")), breaker)
+
+    first, second = verify_twice(service)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert first["upstreamUnavailable"] and second["upstreamUnavailable"]
+    assert service.client.chat.completions.calls == 0
+    assert service.verification_cache.get_metrics()["entries"] == 0
+
+
+def test_exhausted_latency_budget_returns_partial_result(make_service):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=60)
+    service = make_service(StubSession(delay=1.0), breaker, budget_s=0.3)
+
+    started = time.perf_counter()
+    first, _ = verify_twice(service)
+
+    assert time.perf_counter() - started < 2.0
+    assert first["partial"] and first["status"] == "not_found"
+    # Our own deadline cut the requests short: not an upstream failure
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert service.client.chat.completions.calls == 0
+    assert service.verification_cache.get_metrics()["entries"] == 0
@@ -0,0 +1,41 @@
+"""
+HTML extraction backend parity: every installed backend yields the same page text
+and anchors as the stdlib fallback
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.html_extraction import BACKENDS, available_backends, extract_with_stdlib
+
+FIXTURE = """<!DOCTYPE html><html><head><title>Intermediaries</title><style>td { color: red }</style></head>
+<body><div class="nav"><a href="/home">  Home
+ Page </a><a href="/ra.html">Research&nbsp;Analysts</a></div>
+<script>var link = "<a href='/fake'>fake</a>";</script>
+<table><tr><th>Name</th><th>Registration No.</th></tr>
+<tr><td>  RAMESH   KUMAR
+   SHARMA </td><td>INA000001234</td></tr>
+<tr><td>Priya<br>Investment &amp; Advisors</td><td>\tINH000000003 </td></tr></table>
+<p>Tel:<b>022</b>-<i>2644</i> 9000</p><a href="/x"><span>Nested</span>   <em>link</em></a>
+</body></html>"""
+
+
+@pytest.mark.parametrize("backend", [name for name in available_backends() if name != "stdlib"])
+def test_backend_matches_stdlib_fallback(backend):
+    text, links = BACKENDS[backend][1](FIXTURE)
+    expected_text, expected_links = extract_with_stdlib(FIXTURE)
+
+    assert text == expected_text
+    assert links == expected_links
+
+
+def test_whitespace_in_cells_and_anchors_is_collapsed():
+    text, links = extract_with_stdlib(FIXTURE)
+
+    assert "ramesh kumar sharma ina000001234" in text
+    assert "fake" not in text and "color" not in text
+    assert [link["text"] for link in links] == ["Home Page", "Research Analysts", "Nested link"]
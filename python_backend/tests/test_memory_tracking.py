@@ -0,0 +1,76 @@
+"""
+Peak-memory tracker tests
+"""
+
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.memory_tracking import MB, MemoryTracker, memory_stage
+
+
+def allocate(size_mb, keep=False):
+    block = bytearray(int(size_mb * MB))
+    return block if keep else None
+
+
+def test_nested_stages_report_their_own_peaks_and_retained_memory():
+    tracker = MemoryTracker(sample_rate=1.0)
+    with tracker.track("process_document", label="offer.pdf") as report:
+        report.input_bytes = 2 * MB
+        with memory_stage("extract"):
+            text = allocate(4, keep=True)
+            with memory_stage("tokenize"):
+                allocate(8)
+        with memory_stage("features"):
+            allocate(1)
+    del text
+
+    summary = report.to_dict()
+    stages = summary["stages"]
+    assert 8 <= stages["tokenize"]["peak_mb"] < 9 and stages["tokenize"]["retained_mb"] < 0.1
+    # The nested stage's peak also counts for the stage around it
+    assert 12 <= stages["extract"]["peak_mb"] < 13 and 4 <= stages["extract"]["retained_mb"] < 4.5
+    assert 1 <= stages["features"]["peak_mb"] < 1.5
+    assert 12 <= summary["peak_mb"] < 13 and 6 <= summary["peak_per_input_mb"] < 6.5
+    assert not tracemalloc.is_tracing()
+
+    metrics = tracker.get_metrics()
+    assert metrics["tracked"] == 1
+    assert metrics["stages"]["process_document.extract"]["max_peak_per_input_mb"] == stages["extract"]["peak_per_input_mb"]
+    assert metrics["recent"][0]["label"] == "offer.pdf"
+
+
+def test_untracked_calls_do_not_trace():
+    off = MemoryTracker(sample_rate=0.0)
+    with off.track("process_document") as report:
+        with memory_stage("extract") as stage:
+            allocate(1)
+    assert report is None and type(stage).__name__ == "_NullStage"
+    assert not tracemalloc.is_tracing() and off.get_metrics()["tracked"] == 0
+
+
+def test_one_document_is_tracked_at_a_time():
+    tracker = MemoryTracker(sample_rate=1.0)
+    inside, release = threading.Event(), threading.Event()
+    reports = []
+
+    def first():
+        with tracker.track("process_document") as report:
+            reports.append(report)
+            inside.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    inside.wait(5)
+    with tracker.track("process_document") as second:
+        reports.append(second)
+    release.set()
+    thread.join()
+
+    assert reports[0] is not None and reports[1] is None
+    assert tracker.get_metrics()["skipped_busy"] == 1
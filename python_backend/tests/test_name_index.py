@@ -0,0 +1,169 @@
+"""
+Advisor name index tests: trigram and phonetic candidates against a brute-force
+difflib scan, the uncapped search when no limit is given, and identical results
+from the JSON, compiled (memory-mapped) and database registries, and snapshot
+swaps on reload
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.registry_store import DatabaseRegistry
+from app.services.sebi_advisor_service import SEBIAdvisorService
+from app.utils.fuzzy_index import TrigramIndex
+from app.utils.registry_format import write_registry
+from app.utils.registry_tables import NAME_FIELDS, NameTables, normalize_name
+
+FIRST = ["RAMESH", "SURESH", "PRIYA", "ANJALI", "VIKRAM", "SNEHA", "AMIT", "RAHUL"]
+LAST = ["SHARMA", "PATEL", "NAIR", "IYER", "RAO", "MEHTA", "VERMA", "KUMAR"]
+
+
+def make_records(count=400, seed=7):
+    rng = random.Random(seed)
+    records = []
+    for position in range(count):
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)} {rng.choice(LAST)}"
+        record = {"name": name, "registrationNumber": f"INA{position:09d}", "status": "Active", "sebiVerified": True}
+        if position % 5 == 0:
+            record["companyName"] = f"{rng.choice(LAST)} WEALTH ADVISORS"
+        records.append(record)
+    return records
+
+
+def brute_force(records, query, threshold):
+    """(similarity, position) of every record, first name field in field order reaching threshold"""
+    normalized = normalize_name(query)
+    matches = set()
+    for position, record in enumerate(records):
+        for field in NAME_FIELDS:
+            value = record.get(field)
+            if not value:
+                continue
+            similarity = SequenceMatcher(None, normalized, normalize_name(value)).ratio()
+            if similarity >= threshold:
+                matches.add((round(similarity, 6), position))
+                break
+    return matches
+
+
+def test_trigram_index_finds_exact_and_near_strings():
+    index = TrigramIndex(max_candidates=4)
+    ids = index.add_all(["ramesh kumar sharma", "ramesh kumar sharma", "suresh patel", "ramesh kumar verma"])
+    assert ids[0] == ids[1] and len(index) == 3
+
+    scored = dict((string_id, similarity) for similarity, string_id in index.search("ramesh kumar sarma", 0.8))
+    assert set(scored) == {ids[0], ids[3]} and scored[ids[0]] > scored[ids[3]]
+    assert index.search("nobody at all", 0.8) == []
+
+
+def test_scores_keep_the_query_first_argument_order():
+    # ratio() is asymmetric; these two orders give 0.8108 and 0.8649
+    query, candidate = "rajesh kumar sharma", "rekha kumar sharma"
+    expected = SequenceMatcher(None, query, candidate).ratio()
+    assert expected != SequenceMatcher(None, candidate, query).ratio()
+
+    index = TrigramIndex()
+    string_id = index.add(candidate)
+    assert index.search(query, 0.5) == [(expected, string_id)]
+
+
+def test_uncapped_search_matches_brute_force_scan():
+    records = make_records()
+    # Far more near-identical names than the candidate caps, postings budget and block size
+    tables = NameTables.build(records, NAME_FIELDS, max_block_size=10, max_block_candidates=8)
+    tables.index.max_candidates = 8
+    tables.index.max_postings = 50
+    assert max(len(postings) for _, postings in tables.index.iter_postings()) > tables.index.max_postings
+    assert max(len(block) for block in tables.phonetic_blocks.values()) > tables.max_block_size
+
+    for query in ["Ramesh Sharma Patel", "Priya Nair Iyer", "Vikram Rao Mehta"]:
+        expected = brute_force(records, query, 0.7)
+        assert len(expected) > 8
+        found = {(round(similarity, 6), position) for similarity, position, _ in tables.search(query, 0.7, exhaustive=True)}
+        assert found == expected
+        # The capped search scores only the most promising candidates
+        assert len(tables.search(query, 0.7)) < len(expected)
+
+
+@pytest.fixture(params=["json", "compiled", "database"])
+def service(request, tmp_path):
+    records = make_records()
+    data_file = tmp_path / "sebi_advisors.json"
+    data_file.write_text(json.dumps(records))
+    database = None
+    if request.param == "compiled":
+        write_registry(records, data_file.with_suffix(".reg"), source=data_file)
+    elif request.param == "database":
+        database = DatabaseRegistry.from_url(f"sqlite:///{tmp_path / 'registry.db'}", max_candidates=8)
+        database.load(records, source=str(data_file))
+    service = SEBIAdvisorService(data_file=data_file, database=database)
+    if request.param != "database":
+        assert service.snapshot.storage == ("mmap" if request.param == "compiled" else "json")
+        service.snapshot.name_tables.index.max_candidates = 8
+        service.snapshot.name_tables.index.max_postings = 50
+        service.snapshot.name_tables.max_block_size = 10
+        service.snapshot.name_tables.max_block_candidates = 8
+    yield service, records
+    if database is not None:
+        database.close()
+
+
+def test_every_registry_returns_all_matches_without_limit(service):
+    service, records = service
+    query = "Ramesh Sharma Patel"
+    expected = brute_force(records, query, 0.7)
+
+    matches = service.search_advisor_by_name(query, threshold=0.7)
+
+    assert {(round(match["similarity_score"], 6), int(match["registrationNumber"][3:])) for match in matches} == expected
+    scores = [match["similarity_score"] for match in matches]
+    assert scores == sorted(scores, reverse=True)
+    # With a limit only the most promising candidates are scored: a subset of the full answer
+    top = service.search_advisor_by_name(query, threshold=0.7, limit=3)
+    assert len(top) == 3 and scores[:2] == [match["similarity_score"] for match in top[:2]]
+    assert {match["registrationNumber"] for match in top} <= {match["registrationNumber"] for match in matches}
+
+
+def test_reload_swaps_snapshot_without_disturbing_readers_of_the_old_one(tmp_path):
+    data_file = tmp_path / "sebi_advisors.json"
+    data_file.write_text(json.dumps(make_records(10)))
+    service = SEBIAdvisorService(data_file=data_file)
+    swapped = []
+    service.add_reload_listener(swapped.append)
+    old = service.snapshot
+    assert not service.reload()
+
+    data_file.write_text(json.dumps([{"name": "ZARA KHAN", "registrationNumber": "INA999999999", "status": "Active"}]))
+    os.utime(data_file, (time.time() + 10, time.time() + 10))
+    assert service.reload()
+
+    assert service.snapshot.version == old.version + 1 and swapped == [service.snapshot]
+    # A request holding the old snapshot keeps answering from it
+    assert service.search_advisor_by_registration("INA000000003", snapshot=old)["registrationNumber"] == "INA000000003"
+    assert service.search_advisor_by_registration("INA000000003") is None
+    assert service.search_advisor_by_name("Zara Khan", limit=1)[0]["registrationNumber"] == "INA999999999"
+
+    current = service.snapshot
+    data_file.write_text("[{\"name\": ")
+    os.utime(data_file, (time.time() + 20, time.time() + 20))
+    assert not service.reload()
+    assert service.snapshot is current and service.get_reload_status()["last_error"]
+
+
+def test_importing_the_service_module_does_not_load_the_registry():
+    backend = Path(__file__).resolve().parent.parent
+    code = ("import app.services.sebi_advisor_service as module, app.services.sebi_live_verification; "
+            "assert module._shared_service is None")
+    result = subprocess.run([sys.executable, "-c", code], cwd=backend, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
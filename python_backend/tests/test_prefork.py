@@ -0,0 +1,48 @@
+"""
+Prefork server memory reporting tests
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.prefork import read_process_memory, read_reports, write_report
+
+
+def worker_report(slot, pid, requests, rss, pss):
+    return {
+        "worker": slot,
+        "pid": pid,
+        "started_at": 1.0,
+        "requests": requests,
+        "memory_mb": {"rss": rss, "pss": pss, "shared": rss - 10, "private": 10},
+    }
+
+
+def test_read_process_memory_reports_this_process():
+    memory = read_process_memory()
+    assert memory["rss"] > 0
+    if memory["pss"] is not None:
+        assert memory["shared"] + memory["private"] <= memory["rss"] + 1
+
+
+def test_read_reports_totals_live_workers_only(tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    write_report(tmp_path, "master", {**worker_report(None, os.getpid(), 0, 300, 60)})
+    write_report(tmp_path, "1001", worker_report(1, os.getpid(), 7, 310, 70))
+    write_report(tmp_path, "1002", worker_report(0, os.getpid(), 5, 320, 80))
+    write_report(tmp_path, "1003", worker_report(2, dead.pid, 9, 400, 200))
+
+    reports = read_reports(tmp_path)
+
+    assert reports["master"]["pid"] == os.getpid()
+    assert [report["worker"] for report in reports["workers"]] == [0, 1]
+    assert reports["totals"] == {"workers": 2, "requests": 12, "rss_mb": 630.0, "pss_mb": 210.0}
+
+
+def test_read_reports_without_prefork_server(tmp_path):
+    assert read_reports(tmp_path / "missing") is None
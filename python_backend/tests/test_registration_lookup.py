@@ -0,0 +1,55 @@
+"""
+Registration-number lookups: only the exact canonical number (ignoring separators,
+whitespace and case) may match; other prefixes and bare digits never do
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.registry_store import DatabaseRegistry
+from app.services.sebi_advisor_service import SEBIAdvisorService
+from app.utils.registry_format import write_registry
+
+RECORDS = [
+    {"name": "JOHN SMITH", "registrationNumber": "INH000000001", "status": "Active"},
+    {"name": "RAJESH KUMAR", "registrationNumber": "INH000000003", "status": "Active"},
+    {"name": "RAMESH KUMAR SHARMA", "registrationNumber": "INA000001234", "status": "Active"},
+]
+
+MATCHING = ["INA000001234", "ina000001234", "INA-0000-01234", " ina 000001234 "]
+NOT_MATCHING = ["INH000001234", "XYZ1234", "1234", "01234", "000001234", "INA1234",
+                "000000003", "3", "RA1", "INH1", "INA000000003"]
+
+
+@pytest.fixture(params=["json", "compiled", "database"])
+def service(request, tmp_path):
+    data_file = tmp_path / "sebi_advisors.json"
+    data_file.write_text(json.dumps(RECORDS))
+    database = None
+    if request.param == "compiled":
+        write_registry(RECORDS, data_file.with_suffix(".reg"), source=data_file)
+    elif request.param == "database":
+        database = DatabaseRegistry.from_url(f"sqlite:///{tmp_path / 'registry.db'}")
+        database.load(RECORDS, source=str(data_file))
+    service = SEBIAdvisorService(data_file=data_file, database=database)
+    if request.param == "compiled":
+        assert service.snapshot.storage == "mmap"
+    yield service
+    if database is not None:
+        database.close()
+
+
+@pytest.mark.parametrize("registration_number", MATCHING)
+def test_canonical_number_matches_regardless_of_formatting(service, registration_number):
+    assert service.search_advisor_by_registration(registration_number)["name"] == "RAMESH KUMAR SHARMA"
+
+
+@pytest.mark.parametrize("registration_number", NOT_MATCHING)
+def test_wrong_prefix_and_digit_only_numbers_are_not_found(service, registration_number):
+    assert service.search_advisor_by_registration(registration_number) is None
+    assert service.verify_advisor({"registrationNumber": registration_number})["status"] == "not_found"
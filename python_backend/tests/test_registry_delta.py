@@ -0,0 +1,86 @@
+"""
+Delta sync and NDJSON journal tests
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.registry_delta import DeltaTracker, load_manifest
+from app.utils.ndjson import NDJSONWriter, iter_ndjson
+from scripts.fetch_sebi_advisors import save_advisor_data
+
+
+def sync(records, tmp_path):
+    manifest_path = tmp_path / "sebi_advisors.manifest.json"
+    tracker = DeltaTracker(load_manifest(manifest_path), tmp_path / "sebi_advisors.delta.ndjson")
+    for record in records:
+        tracker.observe(record)
+    report = tracker.finish()
+    tracker.write_manifest(manifest_path)
+    return report, list(iter_ndjson(tracker.delta_path))
+
+
+def test_delta_reports_added_changed_and_removed(tmp_path):
+    first = [
+        {"name": "JOHN SMITH", "registrationNumber": "INH000000001", "status": "Active"},
+        {"name": "PRIYA SHARMA", "registrationNumber": "INH000000002", "status": "Active"},
+        {"name": "RAJESH KUMAR", "registrationNumber": "INH000000003", "status": "Active"},
+    ]
+    report, delta = sync(first, tmp_path)
+    assert (report.added, report.changed, report.removed) == (3, 0, 0)
+
+    second = [
+        first[0],
+        # Same advisor, differently formatted number, new status
+        {"name": "PRIYA SHARMA", "registrationNumber": "INH-000000002", "status": "Suspended"},
+        {"name": "AMIT PATEL", "registrationNumber": "INA000000004", "status": "Active"},
+    ]
+    report, delta = sync(second, tmp_path)
+    assert (report.added, report.changed, report.removed, report.unchanged) == (1, 1, 1, 1)
+    assert {(line["op"], line["key"]) for line in delta} == {
+        ("changed", "reg:INH000000002"),
+        ("added", "reg:INA000000004"),
+        ("removed", "reg:INH000000003"),
+    }
+
+    report, delta = sync(second, tmp_path)
+    assert not report.has_changes
+    assert delta == []
+
+
+def test_failed_save_leaves_previous_snapshot_and_no_delta(tmp_path):
+    output = tmp_path / "sebi_advisors.json"
+    output.write_text("[]")
+    manifest_path = tmp_path / "sebi_advisors.manifest.json"
+    tracker = DeltaTracker({}, tmp_path / "sebi_advisors.delta.ndjson")
+
+    def records():
+        yield {"name": "JOHN SMITH", "registrationNumber": "INH000000001"}
+        raise OSError("journal unreadable")
+
+    with pytest.raises(OSError):
+        save_advisor_data(records(), output, tracker, manifest_path)
+
+    assert output.read_text() == "[]"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["sebi_advisors.json"]
+
+
+def test_ndjson_reader_skips_torn_tail_and_reads_ranges(tmp_path):
+    path = tmp_path / "records.ndjson"
+    with NDJSONWriter(path) as writer:
+        first = writer.append([{"page": 1, "i": i} for i in range(3)])
+    with open(path, "ab") as f:
+        f.write(b'{"page": 2, "i"')  # crash mid-write
+    with NDJSONWriter(path) as writer:
+        second = writer.append([{"page": 3, "i": 0}])
+
+    assert [r["page"] for r in iter_ndjson(path, first[0], first[1])] == [1, 1, 1]
+    assert list(iter_ndjson(path, second[0], second[1])) == [{"page": 3, "i": 0}]
+    lines = path.read_bytes().splitlines()
+    assert json.loads(lines[-1]) == {"page": 3, "i": 0}
+    assert [r["page"] for r in iter_ndjson(path)] == [1, 1, 1, 3]
@@ -0,0 +1,195 @@
+"""
+Registry fetcher tests against a local fixture server (no access to sebi.gov.in)
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.registry_delta import DeltaTracker, load_manifest
+from app.services.registry_fetcher import HTMLPageParser, JSONPageParser, PageParser, RegistryFetcher
+from app.utils.ndjson import iter_ndjson
+from scripts.fetch_sebi_advisors import save_advisor_data
+
+PAGE_SIZE = 5
+TOTAL_PAGES = 12
+
+
+def page_records(page):
+    return [
+        {"name": f"ADVISOR {page}-{i}", "registrationNumber": f"INH{page:04d}{i:05d}"}
+        for i in range(PAGE_SIZE)
+    ]
+
+
+def html_page(page):
+    cards = ''.join(
+        '<div class="fixed-table-body card-table">'
+        f'<div class="card-view"><div class="title"><span>Name</span></div><div class="value"><span>{r["name"]}</span></div></div>'
+        f'<div class="card-view"><div class="title"><span>Registration No.</span></div><div class="value"><span>{r["registrationNumber"]}</span></div></div>'
+        '</div>'
+        for r in page_records(page)
+    )
+    return f"<html><body><script>var x = '<div class=\"title\">';</script>{cards}</body></html>"
+
+
+class FixtureServer:
+    """
+    Serves TOTAL_PAGES pages of records; pages listed in flaky fail with 503 the given number of times.
+    statuses maps a registration number to the status field it is served with.
+    """
+
+    def __init__(self, fmt="json", flaky=None, broken=()):
+        self.fmt = fmt
+        self.flaky = dict(flaky or {})
+        self.broken = set(broken)
+        self.statuses = {}
+        self.requests = []
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                page = int(parse_qs(urlparse(self.path).query)["page"][0])
+                fixture.requests.append(page)
+                if page in fixture.broken:
+                    return self._send(503, "unavailable")
+                if fixture.flaky.get(page):
+                    fixture.flaky[page] -= 1
+                    return self._send(503, "try again")
+                if fixture.fmt == "json":
+                    records = page_records(page) if page <= TOTAL_PAGES else []
+                    for record in records:
+                        if record["registrationNumber"] in fixture.statuses:
+                            record["status"] = fixture.statuses[record["registrationNumber"]]
+                    return self._send(200, json.dumps({"records": records}), "application/json")
+                body = html_page(page) if page <= TOTAL_PAGES else "<html><body>No records</body></html>"
+                return self._send(200, body, "text/html")
+
+            def _send(self, status, body, content_type="text/plain"):
+                payload = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url_template = f"http://127.0.0.1:{self.server.server_port}/listing?page={{page}}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def make_server():
+    servers = []
+
+    def factory(**kwargs):
+        server = FixtureServer(**kwargs)
+        servers.append(server)
+        return server
+
+    yield factory
+    for server in servers:
+        server.close()
+
+
+def make_fetcher(server, tmp_path, **kwargs):
+    options = dict(max_workers=4, max_pages=50, backoff_base_s=0.01, backoff_max_s=0.05, timeout=5)
+    options.update(kwargs)
+    return RegistryFetcher(tmp_path / "checkpoints", url_template=server.url_template, **options)
+
+
+def expected_records():
+    return [record for page in range(1, TOTAL_PAGES + 1) for record in page_records(page)]
+
+
+def test_url_template_needs_page_placeholder(tmp_path):
+    with pytest.raises(ValueError):
+        RegistryFetcher(tmp_path, url_template="https://example.invalid/listing")
+
+
+def test_page_parsers_must_implement_parse():
+    class NoParse(PageParser):
+        pass
+
+    with pytest.raises(TypeError, match="parse"):
+        NoParse()
+
+
+def test_fetches_every_page_in_order_with_retries(make_server, tmp_path):
+    server = make_server(flaky={3: 2, 7: 1})
+    fetcher = make_fetcher(server, tmp_path, parser=JSONPageParser())
+
+    report = fetcher.run()
+
+    assert report.complete
+    assert report.last_page == TOTAL_PAGES + 1
+    assert report.records == TOTAL_PAGES * PAGE_SIZE
+    assert list(fetcher.iter_records(report.last_page)) == expected_records()
+    assert server.requests.count(3) == 3
+
+
+def test_resumes_from_checkpoints(make_server, tmp_path):
+    server = make_server(broken={5})
+    fetcher = make_fetcher(server, tmp_path, max_attempts=2)
+
+    first = fetcher.run()
+    assert not first.complete
+    assert list(first.failed_pages) == [5]
+
+    server.broken.clear()
+    server.requests.clear()
+    second = fetcher.run()
+
+    assert second.complete
+    # Only the failed page is fetched again
+    assert sorted(server.requests) == [5]
+    assert list(fetcher.iter_records(second.last_page)) == expected_records()
+
+
+def test_sync_after_a_complete_one_sees_upstream_changes(make_server, tmp_path):
+    server = make_server()
+    fetcher = make_fetcher(server, tmp_path, parser=JSONPageParser())
+    output = tmp_path / "sebi_advisors.json"
+    manifest_path = tmp_path / "sebi_advisors.manifest.json"
+
+    def sync():
+        report = fetcher.run()
+        assert report.complete
+        tracker = DeltaTracker(load_manifest(manifest_path), tmp_path / "sebi_advisors.delta.ndjson")
+        save_advisor_data(fetcher.iter_records(report.last_page), output, tracker, manifest_path)
+        return list(iter_ndjson(tracker.delta_path))
+
+    assert len(sync()) == TOTAL_PAGES * PAGE_SIZE
+    server.statuses["INH000300002"] = "Suspended"
+    server.requests.clear()
+
+    delta = sync()
+
+    # Every page is fetched again rather than resumed from the finished sync's checkpoints
+    assert set(range(1, TOTAL_PAGES + 2)) <= set(server.requests)
+    assert [(line["op"], line["key"]) for line in delta] == [("changed", "reg:INH000300002")]
+    assert {"name": "ADVISOR 3-2", "registrationNumber": "INH000300002", "status": "Suspended"} in json.loads(output.read_text())
+
+
+def test_parses_sebi_html_cards(make_server, tmp_path):
+    server = make_server(fmt="html")
+    fetcher = make_fetcher(server, tmp_path, parser=HTMLPageParser())
+
+    report = fetcher.run()
+
+    assert report.complete
+    assert list(fetcher.iter_records(report.last_page)) == expected_records()
@@ -0,0 +1,62 @@
+"""
+Registry database tests against the SQLite backend
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.registry_store import DatabaseRegistry, RegistryStore
+from app.services.sebi_advisor_service import SEBIAdvisorService
+
+RECORDS = [
+    {"name": "RAMESH KUMAR SHARMA", "registrationNumber": "INA000001234", "status": "Active", "sebiVerified": True},
+    {"name": "PRIYA INVESTMENT ADVISORS", "registrationNumber": "INA000005678", "status": "Active", "sebiVerified": True},
+    {"name": "SURESH PATEL", "registrationNumber": "INA000009999", "status": "Suspended", "sebiVerified": False},
+]
+
+
+def make_service(tmp_path):
+    data_file = tmp_path / "sebi_advisors.json"
+    data_file.write_text(json.dumps(RECORDS))
+    database = DatabaseRegistry.from_url(f"sqlite:///{tmp_path / 'registry.db'}")
+    database.load(RECORDS, source=str(data_file))
+    return SEBIAdvisorService(data_file=data_file, database=database), database
+
+
+def test_lookups_served_from_database(tmp_path):
+    service, database = make_service(tmp_path)
+    try:
+        assert service.search_advisor_by_registration("ina-000001234")["name"] == "RAMESH KUMAR SHARMA"
+        matches = service.search_advisor_by_name("Ramesh Kumar Sarma", threshold=0.7, limit=5)
+        assert [m["registrationNumber"] for m in matches] == ["INA000001234"]
+        assert service.verify_advisor({"registrationNumber": "INA000009999"})["status"] == "suspicious"
+        # The JSON is never parsed while the database answers
+        assert not service.snapshot.advisor_data
+    finally:
+        database.close()
+
+
+def test_falls_back_to_in_process_registry(tmp_path):
+    service, database = make_service(tmp_path)
+    # A closed registry behaves like an unreachable database
+    database.close()
+
+    result = service.verify_advisor({"registrationNumber": "INA000005678"})
+
+    assert result["status"] == "verified"
+    assert service.get_stats()["database_fallbacks"] == 1
+    assert len(service.snapshot.advisor_data) == len(RECORDS)
+
+
+def test_incomplete_backend_fails_when_created():
+    class PartialStore(RegistryStore):
+        async def connect(self):
+            pass
+
+    with pytest.raises(TypeError, match="find_registration"):
+        PartialStore()
@@ -0,0 +1,131 @@
+"""
+Per-request profiling tests
+"""
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.request_profiling import (
+    ProfileStore, RequestProfiler, RequestProfilingMiddleware, bind, collapsed_stacks, stage
+)
+
+executor = ThreadPoolExecutor(max_workers=2)
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def parse_page(seconds):
+    with stage("parse_page", pages=3):
+        busy(seconds)
+
+
+ADMIN_TOKEN = "secret"
+PROFILE_REQUEST = {"X-Profile-Request": "1", "X-Admin-Token": ADMIN_TOKEN}
+
+
+def make_app(tmp_path, **options):
+    options.setdefault("admin_token", ADMIN_TOKEN)
+    profiler = RequestProfiler(ProfileStore(tmp_path), interval_s=0.002, **options)
+    app = FastAPI()
+    app.add_middleware(RequestProfilingMiddleware, profiler=profiler)
+
+    @app.post("/analyze")
+    async def analyze(work_s: float = 0.1):
+        with stage("extract"):
+            await asyncio.to_thread(busy, work_s)
+        # Thread pools need bind() to see the request's profile
+        await asyncio.wrap_future(executor.submit(bind(parse_page), work_s / 2))
+        return {"status": "done"}
+
+    return app, profiler
+
+
+def client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_header_triggered_profile_has_stages_and_samples(tmp_path):
+    async def run():
+        app, profiler = make_app(tmp_path)
+        async with client(app) as c:
+            plain = await c.post("/analyze", params={"work_s": 0.01})
+            profiled = await c.post("/analyze", headers=PROFILE_REQUEST)
+        return plain, profiled, profiler
+
+    plain, profiled, profiler = asyncio.run(run())
+    assert plain.status_code == 200 and "x-profile-id" not in plain.headers
+    profile_id = profiled.headers["x-profile-id"]
+
+    profile = profiler.store.get(profile_id)
+    assert profile["status"] == 200 and profile["trigger"] == "header"
+    assert profile["duration_ms"] >= 150
+    assert set(profile["stage_totals"]) == {"extract", "parse_page"}
+    assert profile["stage_totals"]["extract"]["total_ms"] >= 100
+    assert profile["stages"][1]["attrs"] == {"pages": 3}
+    # The worker threads were sampled while inside their stages
+    assert any("busy (" in stack for stack in profile["stacks"])
+    assert collapsed_stacks(profile).splitlines()[0].rsplit(" ", 1)[1].isdigit()
+    assert [summary["id"] for summary in profiler.store.list()] == [profile_id]
+
+
+def test_sampling_keeps_only_slow_requests_and_header_needs_admin_token(tmp_path):
+    async def run():
+        app, profiler = make_app(tmp_path, sample_rate=1.0, min_duration_s=0.1)
+        async with client(app) as c:
+            fast = await c.post("/analyze", params={"work_s": 0.01})
+            slow = await c.post("/analyze", params={"work_s": 0.15})
+            profiler.sample_rate = 0.0
+            wrong_token = await c.post("/analyze", params={"work_s": 0.01},
+                                       headers={"X-Profile-Request": "1", "X-Admin-Token": "wrong"})
+        return fast, slow, wrong_token, profiler
+
+    fast, slow, wrong_token, profiler = asyncio.run(run())
+    stored = [summary["id"] for summary in profiler.store.list()]
+    assert stored == [slow.headers["x-profile-id"]]
+    assert fast.headers["x-profile-id"] not in stored
+    assert "x-profile-id" not in wrong_token.headers
+    assert profiler.get_metrics()["rejected_token"] == 1
+
+
+def test_header_profiling_is_off_without_admin_token(tmp_path):
+    async def run():
+        app, profiler = make_app(tmp_path, admin_token=None)
+        async with client(app) as c:
+            bare = await c.post("/analyze", params={"work_s": 0.01}, headers={"X-Profile-Request": "1"})
+            with_token = await c.post("/analyze", params={"work_s": 0.01}, headers=PROFILE_REQUEST)
+        return bare, with_token, profiler
+
+    bare, with_token, profiler = asyncio.run(run())
+    assert "x-profile-id" not in bare.headers and "x-profile-id" not in with_token.headers
+    assert profiler.store.list() == []
+
+
+def test_store_keeps_newest_profiles_and_rejects_unsafe_ids(tmp_path):
+    async def run():
+        app, profiler = make_app(tmp_path)
+        profiler.store.keep = 2
+        async with client(app) as c:
+            for _ in range(3):
+                await c.post("/analyze", params={"work_s": 0.01}, headers=PROFILE_REQUEST)
+                await asyncio.sleep(0.01)
+        return profiler
+
+    profiler = asyncio.run(run())
+    assert len(profiler.store.list()) == 2
+    assert profiler.store.get("../../etc/passwd") is None
+    # Outside a profiled request stage() and bind() do nothing
+    with stage("idle") as idle:
+        assert bind(parse_page) is parse_page
+    assert type(idle).__name__ == "_NullStage"
@@ -0,0 +1,84 @@
+"""
+SEBI HTTP cache tests: freshness, promotion from the disk tier to memory, and
+disk-tier eviction
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.sebi_http_cache import CachedPage, SEBIHttpCache
+
+
+class StubResponse:
+    def __init__(self, status_code=200, headers=None, text="<html><body><a href='/x'>Advisor</a></body></html>"):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+
+class StubSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append((url, headers))
+        return self.responses.pop(0)
+
+
+def test_freshness_follows_cache_control_and_explicit_now(tmp_path):
+    page = CachedPage(url="u", text="", expires_at=100.0)
+    assert page.is_fresh(now=0.0) and page.is_fresh(now=99.0) and not page.is_fresh(now=100.0)
+    assert not page.is_fresh()
+
+    cache = SEBIHttpCache(cache_dir=tmp_path, default_ttl=60)
+    assert cache._freshness({"Cache-Control": "no-store"}) == (False, 0.0)
+    assert cache._freshness({"Cache-Control": "no-cache"}) == (True, 0.0)
+    cacheable, expires_at = cache._freshness({"Cache-Control": "max-age=120", "Age": "20"})
+    assert cacheable and 99 <= expires_at - time.time() <= 100
+
+
+def test_disk_entries_are_promoted_to_memory(tmp_path):
+    first = SEBIHttpCache(cache_dir=tmp_path)
+    first.fetch(StubSession(StubResponse(headers={"Cache-Control": "max-age=600"})), "https://sebi.test/page")
+
+    # A new process: empty memory tier, same disk tier
+    second = SEBIHttpCache(cache_dir=tmp_path)
+    session = StubSession()
+    page = second.fetch(session, "https://sebi.test/page")
+    again = second.fetch(session, "https://sebi.test/page")
+
+    assert page.links == [{"href": "/x", "text": "Advisor"}] and again is page
+    assert not session.requests
+    metrics = second.get_metrics()
+    assert metrics["disk_hits"] == 1 and metrics["memory_hits"] == 1
+
+
+def test_disk_tier_sweeps_expired_entries_and_evicts_to_its_limits(tmp_path):
+    cache = SEBIHttpCache(cache_dir=tmp_path, max_disk_entries=3, disk_retention_s=60, sweep_every=1000)
+    now = time.time()
+    for index, expires_in in enumerate([-3600, 10, 600, 300, 900]):
+        page = CachedPage(url=f"u{index}", text="x" * 100, fetched_at=now - 7200, expires_at=now + expires_in)
+        cache._write_disk(f"entry{index}", page)
+
+    cache.sweep_disk(now=now)
+
+    # entry0 expired an hour ago (past retention); entry1 expires soonest of the rest
+    assert sorted(path.stem for path in tmp_path.glob("*.json")) == ["entry2", "entry3", "entry4"]
+    assert cache.get_metrics()["disk_evictions"] == 2
+
+    cache.max_disk_bytes = 2 * os.path.getsize(tmp_path / "entry2.json")
+    cache.sweep_disk(now=now)
+    assert sorted(path.stem for path in tmp_path.glob("*.json")) == ["entry2", "entry4"]
+
+
+def test_writes_trigger_a_sweep(tmp_path):
+    cache = SEBIHttpCache(cache_dir=tmp_path, max_disk_entries=2, sweep_every=2)
+    now = time.time()
+    for index in range(5):
+        cache._write_disk(f"entry{index}", CachedPage(url="u", text="", fetched_at=now, expires_at=now + 60 + index))
+    assert len(list(tmp_path.glob("*.json"))) <= 3
@@ -0,0 +1,114 @@
+"""
+Live SEBI verification tests with a stub HTTP session: what counts as an upstream
+failure for the circuit breaker, and latency budget handling
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.sebi_http_cache import SEBIHttpCache
+from app.services.sebi_live_verification import SEBILiveVerificationService, _GuardedSession
+from app.utils.adaptive_limiter import AdaptiveConcurrencyLimiter, CircuitBreaker
+from app.utils.deadline import Deadline, DeadlineExceeded
+
+
+class StubResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = "<html><body>No records found</body></html>"
+
+
+class StubSession:
+    """Answers every request the same way: a status code, an exception or a delay"""
+
+    def __init__(self, status_code=200, error=None, delay=0.0):
+        self.status_code = status_code
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    def get(self, url, timeout=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return StubResponse(self.status_code)
+
+    def close(self):
+        pass
+
+
+def guarded(session, failure_threshold=2):
+    breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout_s=60)
+    # Latency target 2s: timeouts of at least 2s count against the upstream
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=4, latency_target_s=2.0)
+    return _GuardedSession(session, limiter, breaker, max_queue_wait=1.0), breaker
+
+
+def call(guarded_session, timeout):
+    try:
+        guarded_session.get("https://sebi.test/page", timeout=timeout)
+    except requests.RequestException:
+        pass
+
+
+def test_budget_capped_timeouts_open_the_circuit_and_cut_the_limit():
+    # The verification budget (8s) is below the request timeout (10s), so real requests
+    # are granted deadline-capped timeouts; a throttling upstream must still trip the breaker
+    guarded_session, breaker = guarded(StubSession(error=requests.Timeout("read timed out")))
+    limit = guarded_session.limiter.limit
+    call(guarded_session, timeout=7.5)
+    call(guarded_session, timeout=6.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert guarded_session.limiter.limit < limit
+
+
+def test_timeouts_in_the_last_slice_of_the_deadline_are_inconclusive():
+    guarded_session, breaker = guarded(StubSession(error=requests.Timeout("read timed out")))
+    for _ in range(5):
+        call(guarded_session, timeout=0.5)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.get_metrics()["consecutive_failures"] == 0
+
+
+@pytest.mark.parametrize("session", [
+    StubSession(error=requests.Timeout("read timed out")),
+    StubSession(error=requests.ConnectionError("connection refused")),
+    StubSession(status_code=503),
+])
+def test_full_timeouts_connection_errors_and_5xx_open_the_circuit(session):
+    guarded_session, breaker = guarded(session)
+    call(guarded_session, timeout=10.0)
+    call(guarded_session, timeout=10.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_throttling_and_client_errors_are_not_outages():
+    for status_code in (429, 404):
+        guarded_session, breaker = guarded(StubSession(status_code=status_code))
+        for _ in range(3):
+            call(guarded_session, timeout=10.0)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slow_upstream_without_hedge_capacity_raises_deadline_exceeded(tmp_path):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, max_limit=1)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=60)
+    service = SEBILiveVerificationService(
+        http_cache=SEBIHttpCache(cache_dir=tmp_path), limiter=limiter, circuit_breaker=breaker
+    )
+    service.session = StubSession(delay=1.0)
+    service.guarded_session.session = service.session
+    service.hedge_delay = 0.05
+    try:
+        with pytest.raises(DeadlineExceeded):
+            service._fetch_hedged("https://sebi.test/page", Deadline(0.3), None)
+    finally:
+        service.close()
@@ -0,0 +1,111 @@
+"""
+Upload ingestion tests: magic-byte sniffing and chunked spooling with per-type limits
+"""
+
+import asyncio
+import io
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request, UploadFile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.processor_config import ProcessorConfig
+from app.utils.upload_ingest import (
+    RequestSizeLimitMiddleware,
+    UploadRejected,
+    format_size,
+    sniff_file_type,
+    spool_upload,
+)
+
+
+def make_upload(content: bytes, filename: str) -> UploadFile:
+    # size unknown, as for a chunked request part
+    return UploadFile(io.BytesIO(content), filename=filename)
+
+
+def make_zip(*names: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name in names:
+            archive.writestr(name, "<xml/>")
+    return buffer.getvalue()
+
+
+def test_sniffs_type_from_content_not_filename():
+    assert sniff_file_type(b"%PDF-1.7\n...", "offer.txt") == '.pdf'
+    assert sniff_file_type(b"PK\x03\x04\x14\x00[Content_Types].xml", "offer.bin") == '.docx'
+    assert sniff_file_type(b"PK\x03\x04\x14\x00payload.exe", "archive.zip") is None
+    assert sniff_file_type(b"\xef\xbb\xbfGuaranteed returns", None) == '.txt'
+    assert sniff_file_type("Guaranteed 30% returns\n".encode(), "offer.pdf") == '.txt'
+    assert sniff_file_type(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR", "scan.png") is None
+
+
+def test_spools_in_chunks_with_sniffed_suffix(tmp_path):
+    config = ProcessorConfig(upload_chunk_bytes=4)
+    spooled = asyncio.run(spool_upload(make_upload(b"%PDF-1.4 body", "offer"), config, tmp_path))
+
+    assert spooled.file_type == '.pdf'
+    assert spooled.path.endswith('.pdf')
+    assert Path(spooled.path).read_bytes() == b"%PDF-1.4 body"
+    assert spooled.size == 13
+
+
+def test_rejects_oversized_and_unsupported_uploads(tmp_path):
+    config = ProcessorConfig(max_txt_size_mb=1, upload_chunk_bytes=64 * 1024)
+    too_big = make_upload(b"a" * (1024 * 1024 + 1), "notes.txt")
+
+    with pytest.raises(UploadRejected) as excinfo:
+        asyncio.run(spool_upload(too_big, config, tmp_path))
+    assert excinfo.value.status_code == 413
+    # Reading stopped at the first chunk past the limit and the partial file is gone
+    assert too_big.file.tell() <= 1024 * 1024 + 64 * 1024
+    assert os.listdir(tmp_path) == []
+
+    with pytest.raises(UploadRejected) as excinfo:
+        asyncio.run(spool_upload(make_upload(b"\x7fELF\x02\x01\x01\x00\x00", "run.txt"), config, tmp_path))
+    assert excinfo.value.status_code == 415
+
+
+def test_docx_needs_word_document_part(tmp_path):
+    config = ProcessorConfig()
+    docx = make_zip("[Content_Types].xml", "_rels/.rels", "word/document.xml")
+    spooled = asyncio.run(spool_upload(make_upload(docx, "offer.docx"), config, tmp_path))
+    assert spooled.file_type == '.docx'
+
+    # An OOXML container that is not a Word document (here a spreadsheet) under a .docx name
+    xlsx = make_zip("[Content_Types].xml", "_rels/.rels", "xl/workbook.xml")
+    assert sniff_file_type(xlsx, "offer.docx") == '.docx'
+    with pytest.raises(UploadRejected) as excinfo:
+        asyncio.run(spool_upload(make_upload(xlsx, "offer.docx"), config, tmp_path))
+    assert excinfo.value.status_code == 415
+    assert os.listdir(tmp_path) == [os.path.basename(spooled.path)]
+
+
+def test_size_limits_below_one_megabyte_are_reported_exactly():
+    assert format_size(10 * 1024 * 1024) == "10MB"
+    assert format_size(512 * 1024) == "512KB"
+    assert format_size(100) == "100 bytes"
+
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    limited = RequestSizeLimitMiddleware(app, max_bytes=512 * 1024)
+
+    async def post(body: bytes):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=limited), base_url="http://test") as client:
+            return await client.post("/upload", content=body)
+
+    response = asyncio.run(post(b"x" * (512 * 1024 + 1)))
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body too large (maximum 512KB)"}
+    assert asyncio.run(post(b"x" * 10)).json() == {"size": 10}
@@ -0,0 +1,75 @@
+"""
+Advisor verification cache tests: complete results are cached, degraded ones never are
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.verification_cache import VerificationCache
+
+ADVISOR = {"name": "Ramesh Kumar Sharma", "registrationNumber": "INA000001234"}
+
+
+def counting_compute(result):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return dict(result)
+    return compute, calls
+
+
+def test_complete_results_are_served_from_cache():
+    cache = VerificationCache()
+    key = cache.make_key(ADVISOR)
+    compute, calls = counting_compute({"status": "not_found"})
+
+    async def scenario():
+        await cache.get_or_compute(key, compute)
+        return await cache.get_or_compute(key, compute)
+
+    assert asyncio.run(scenario()) == {"status": "not_found"}
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("degraded", [
+    {"status": "not_found", "partial": True},
+    {"status": "verified", "upstreamUnavailable": True, "verification_method": "local_registry_fallback"},
+    {"status": "not_found", "ai_analysis_error": "timeout"},
+])
+def test_degraded_results_are_not_cached(degraded):
+    cache = VerificationCache()
+    key = cache.make_key(ADVISOR)
+    compute, calls = counting_compute(degraded)
+
+    async def scenario():
+        await cache.get_or_compute(key, compute)
+        await cache.get_or_compute(key, compute)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert cache.get_metrics()["entries"] == 0 and cache.get_metrics()["degraded_skipped"] == 2
+
+
+def test_degraded_refresh_keeps_the_stale_entry():
+    cache = VerificationCache(positive_ttl=0, stale_ttl=60)
+    key = cache.make_key(ADVISOR)
+    assert cache.set(key, {"status": "verified"})
+    compute, calls = counting_compute({"status": "not_found", "partial": True})
+
+    async def scenario():
+        first = await cache.get_or_compute(key, compute)
+        await asyncio.sleep(0.01)
+        second = await cache.get_or_compute(key, compute)
+        await asyncio.sleep(0.01)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == {"status": "verified"}
+    # The failed refresh did not block the next one
+    assert len(calls) == 2